@@ -0,0 +1,6 @@
+from django.contrib import admin
+
+from .models import PuzzleTypeDifficulty, StageAccuracy
+
+admin.site.register(StageAccuracy)
+admin.site.register(PuzzleTypeDifficulty)
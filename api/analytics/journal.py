@@ -0,0 +1,107 @@
+"""Per worker buffer of answer events, written to the journal in batches.
+
+Events are added once the answer's transaction commits and are written with one
+bulk insert when the buffer holds ANALYTICS_EVENT_BATCH_SIZE events or the oldest
+is ANALYTICS_EVENT_FLUSH_INTERVAL seconds old, and when the worker exits. One
+timer, armed with the first event of a batch and cancelled by the flush, flushes
+it on time even if no other answer arrives. A worker that is killed loses what it buffered, the journal
+feeds statistics only, scores live in the play tables.
+"""
+import atexit
+import logging
+import threading
+import time
+from functools import partial
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+
+from core import tracing
+
+from .models import AnswerEvent
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = settings.ANALYTICS_EVENT_BATCH_SIZE
+FLUSH_INTERVAL = settings.ANALYTICS_EVENT_FLUSH_INTERVAL
+
+
+class EventBuffer:
+    def __init__(self, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.events = []
+        self.started_at = None
+        self.timer = None
+        self.lock = threading.Lock()
+
+    def add(self, events):
+        with self.lock:
+            if not self.events:
+                self.started_at = time.monotonic()
+            self.events.extend(events)
+            full = len(self.events) >= self.batch_size
+            due = time.monotonic() - self.started_at >= self.flush_interval
+            if not (full or due) and self.timer is None:
+                self.schedule()
+
+        if full or due:
+            self.flush()
+
+    def schedule(self):
+        self.timer = threading.Timer(self.flush_interval, self.flush_on_timer)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def cancel(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    def reset(self):
+        """Drops the buffered events and the armed timer, without writing them."""
+        with self.lock:
+            self.cancel()
+            self.events = []
+            self.started_at = None
+
+    def flush_on_timer(self):
+        try:
+            self.flush()
+        finally:
+            # NOTE: Every timer is a new thread with its own database connection.
+            connections.close_all()
+
+    def flush(self) -> int:
+        with self.lock:
+            self.cancel()
+            events, self.events = self.events, []
+
+        if not events:
+            return 0
+
+        inserted_at = timezone.now()
+        for event in events:
+            event.inserted_at = inserted_at
+
+        try:
+            with tracing.span("analytics.flush_answer_events", events=len(events)):
+                AnswerEvent.objects.bulk_create(events, batch_size=self.batch_size)
+        except DatabaseError:
+            logger.exception(f"Dropped {len(events)} answer events.")
+            return 0
+
+        return len(events)
+
+    def __len__(self):
+        return len(self.events)
+
+
+buffer = EventBuffer(batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL)
+atexit.register(buffer.flush)
+
+
+def record(events):
+    """Journal answer events once the current transaction commits."""
+    transaction.on_commit(partial(buffer.add, list(events)))
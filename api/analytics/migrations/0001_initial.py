@@ -0,0 +1,123 @@
+# Generated by Django 4.0 on 2026-10-19 09:12
+
+import datetime
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# NOTE: Frozen here, the table as of this migration, later columns come with their own.
+CREATE_TABLE = """
+CREATE TABLE analytics_answerevent (
+    id bigserial NOT NULL,
+    created_at timestamp with time zone NOT NULL,
+    game_id integer NOT NULL,
+    stage_id integer NOT NULL,
+    player_id integer NOT NULL,
+    puzzle_type smallint NOT NULL CHECK (puzzle_type >= 0),
+    choice_id integer NULL,
+    wager integer NOT NULL,
+    delta integer NOT NULL,
+    correct boolean NOT NULL,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+CREATE TABLE analytics_answerevent_default PARTITION OF analytics_answerevent DEFAULT;
+"""
+
+CREATE_PARTITION = (
+    "CREATE TABLE IF NOT EXISTS analytics_answerevent_{day:%Y%m%d} PARTITION OF "
+    "analytics_answerevent FOR VALUES FROM ('{day} 00:00+00') TO ('{end} 00:00+00')"
+)
+
+
+def create_answer_event_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        schema_editor.create_model(apps.get_model("analytics", "AnswerEvent"))
+        return
+
+    schema_editor.execute(CREATE_TABLE)
+    # NOTE: A week ahead, until the create_answer_event_partitions task takes over.
+    today = django.utils.timezone.now().date()
+    for offset in range(8):
+        day = today + datetime.timedelta(days=offset)
+        schema_editor.execute(
+            CREATE_PARTITION.format(day=day, end=day + datetime.timedelta(days=1))
+        )
+
+
+def drop_answer_event_table(apps, schema_editor):
+    schema_editor.delete_model(apps.get_model("analytics", "AnswerEvent"))
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="AnswerEvent",
+                    fields=[
+                        (
+                            "id",
+                            models.BigAutoField(
+                                auto_created=True,
+                                primary_key=True,
+                                serialize=False,
+                                verbose_name="ID",
+                            ),
+                        ),
+                        ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                        ("game_id", models.IntegerField()),
+                        ("stage_id", models.IntegerField()),
+                        ("player_id", models.IntegerField()),
+                        ("puzzle_type", models.PositiveSmallIntegerField()),
+                        ("choice_id", models.IntegerField(null=True)),
+                        ("wager", models.IntegerField()),
+                        ("delta", models.IntegerField()),
+                        ("correct", models.BooleanField()),
+                    ],
+                ),
+            ],
+        ),
+        # NOTE: The table is created from the state above, partitioned on postgres.
+        migrations.RunPython(create_answer_event_table, drop_answer_event_table),
+        migrations.CreateModel(
+            name="PuzzleTypeDifficulty",
+            fields=[
+                ("answers", models.PositiveIntegerField(default=0)),
+                ("correct", models.PositiveIntegerField(default=0)),
+                ("wagered", models.BigIntegerField(default=0)),
+                (
+                    "puzzle_type",
+                    models.PositiveSmallIntegerField(primary_key=True, serialize=False),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="RollupCursor",
+            fields=[
+                ("name", models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ("last_event_id", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="StageAccuracy",
+            fields=[
+                ("answers", models.PositiveIntegerField(default=0)),
+                ("correct", models.PositiveIntegerField(default=0)),
+                ("wagered", models.BigIntegerField(default=0)),
+                ("stage_id", models.IntegerField(primary_key=True, serialize=False)),
+                ("game_id", models.IntegerField(db_index=True)),
+                ("puzzle_type", models.PositiveSmallIntegerField()),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.0.10 on 2026-10-19 05:53
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="answerevent",
+            name="inserted_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,59 @@
+from django.db import models
+from django.utils import timezone
+
+
+class AnswerEvent(models.Model):
+    """One answered stage. Rows are only ever inserted, see analytics.journal.
+
+    Ids are plain integers rather than foreign keys so writing the journal never
+    touches the play tables. On postgres the table is partitioned by day on
+    created_at, see analytics.partitions.
+    """
+
+    created_at = models.DateTimeField(default=timezone.now)
+    # NOTE: Set when the buffered event is written, the rollups wait on this one.
+    inserted_at = models.DateTimeField(default=timezone.now)
+    game_id = models.IntegerField()
+    stage_id = models.IntegerField()
+    player_id = models.IntegerField()
+    puzzle_type = models.PositiveSmallIntegerField()
+    # NOTE: Empty for lock in stages, those are answered with every choice at once.
+    choice_id = models.IntegerField(null=True)
+    wager = models.IntegerField()
+    delta = models.IntegerField()
+    correct = models.BooleanField()
+
+
+class Accuracy(models.Model):
+    answers = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    wagered = models.BigIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def accuracy(self):
+        return self.correct / self.answers if self.answers else None
+
+
+class StageAccuracy(Accuracy):
+    stage_id = models.IntegerField(primary_key=True)
+    game_id = models.IntegerField(db_index=True)
+    puzzle_type = models.PositiveSmallIntegerField()
+
+
+class PuzzleTypeDifficulty(Accuracy):
+    puzzle_type = models.PositiveSmallIntegerField(primary_key=True)
+
+    @property
+    def difficulty(self):
+        accuracy = self.accuracy
+        return None if accuracy is None else 1 - accuracy
+
+
+class RollupCursor(models.Model):
+    """The last AnswerEvent id folded into the aggregate tables."""
+
+    name = models.CharField(max_length=64, primary_key=True)
+    last_event_id = models.BigIntegerField(default=0)
@@ -0,0 +1,46 @@
+"""Daily partitions of the answer event journal, postgres only.
+
+The parent table is created by migration 0001 with PARTITION BY RANGE (created_at)
+and a default partition, later columns are added by their own migrations. A
+day's partition has to exist before its first event, so create_partitions runs
+every day and keeps a few days ahead. Old days can be detached or dropped
+without touching the rest of the journal.
+"""
+import datetime
+
+from django.db import connection as default_connection
+from django.utils import timezone
+
+TABLE = "analytics_answerevent"
+
+CREATE_PARTITION = (
+    "CREATE TABLE IF NOT EXISTS {name} PARTITION OF "
+    + TABLE
+    + " FOR VALUES FROM ('{start}') TO ('{end}')"
+)
+
+
+def partition_name(day: datetime.date) -> str:
+    return f"{TABLE}_{day:%Y%m%d}"
+
+
+def create_partitions(*, days_ahead: int, connection=default_connection):
+    """Create the partitions of today and the following days, returns their names."""
+    if connection.vendor != "postgresql":
+        return []
+
+    today = timezone.now().date()
+    names = []
+
+    with connection.cursor() as cursor:
+        for offset in range(days_ahead + 1):
+            day = today + datetime.timedelta(days=offset)
+            name = partition_name(day)
+            end = day + datetime.timedelta(days=1)
+            # NOTE: Partition bounds are UTC days, like created_at.
+            cursor.execute(
+                CREATE_PARTITION.format(name=name, start=f"{day} 00:00+00", end=f"{end} 00:00+00")
+            )
+            names.append(name)
+
+    return names
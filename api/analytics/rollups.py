@@ -0,0 +1,75 @@
+"""Incremental rollups of the answer event journal into the aggregate tables.
+
+Every run folds the events after the cursor's last_event_id, up to the highest
+id among events inserted more than ANALYTICS_ROLLUP_LAG seconds ago. The lag is
+measured from inserted_at, stamped when a worker writes its buffer, not from
+created_at, stamped when the answer was buffered. So a batch is only skipped
+over by a higher id if its insert takes longer than the lag to commit.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+
+from .models import AnswerEvent, PuzzleTypeDifficulty, RollupCursor, StageAccuracy
+
+CURSOR_NAME = "answer-events"
+ROLLUP_LAG = settings.ANALYTICS_ROLLUP_LAG
+
+TOTALS = {
+    "answers": Count("id"),
+    "correct": Count("id", filter=Q(correct=True)),
+    "wagered": Sum("wager"),
+}
+
+
+def merge(model, rows, key: str, fields=()):
+    """Add aggregated rows to the stored totals, creating the missing ones with fields."""
+    stored = model.objects.in_bulk([row[key] for row in rows])
+    created, updated = [], []
+
+    for row in rows:
+        aggregate = stored.get(row[key])
+        if aggregate is None:
+            aggregate = model(**{field: row[field] for field in (key, *fields)})
+            created.append(aggregate)
+        else:
+            updated.append(aggregate)
+
+        for field in TOTALS:
+            setattr(aggregate, field, getattr(aggregate, field) + (row[field] or 0))
+
+    model.objects.bulk_create(created)
+    model.objects.bulk_update(updated, list(TOTALS))
+
+
+def rollup_answer_events() -> int:
+    """Fold new journal events into the aggregate tables, returns how many were folded."""
+    settled = timezone.now() - datetime.timedelta(seconds=ROLLUP_LAG)
+
+    with transaction.atomic():
+        # NOTE: The cursor row lock keeps two runs from folding the same events.
+        RollupCursor.objects.get_or_create(name=CURSOR_NAME)
+        cursor = RollupCursor.objects.select_for_update().get(name=CURSOR_NAME)
+
+        events = AnswerEvent.objects.filter(id__gt=cursor.last_event_id)
+        last_event_id = events.filter(inserted_at__lte=settled).aggregate(last=Max("id"))["last"]
+        if last_event_id is None:
+            return 0
+
+        events = events.filter(id__lte=last_event_id)
+
+        stages = list(
+            events.values("stage_id", "game_id", "puzzle_type").annotate(**TOTALS).order_by()
+        )
+        merge(StageAccuracy, stages, "stage_id", fields=("game_id", "puzzle_type"))
+
+        puzzle_types = list(events.values("puzzle_type").annotate(**TOTALS).order_by())
+        merge(PuzzleTypeDifficulty, puzzle_types, "puzzle_type")
+
+        cursor.last_event_id = last_event_id
+        cursor.save(update_fields=["last_event_id"])
+
+    return sum(stage["answers"] for stage in stages)
@@ -0,0 +1,20 @@
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from django.conf import settings
+
+from . import partitions, rollups
+
+logger = get_task_logger(__name__)
+
+
+@shared_task(bind=True)
+def rollup_answer_events(self):
+    folded = rollups.rollup_answer_events()
+    logger.info(f"{folded} answer events folded into the aggregates.")
+    return {"folded": folded}
+
+
+@shared_task(bind=True)
+def create_answer_event_partitions(self):
+    names = partitions.create_partitions(days_ahead=settings.ANALYTICS_PARTITION_DAYS_AHEAD)
+    return {"partitions": names}
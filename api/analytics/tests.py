@@ -0,0 +1,118 @@
+import datetime
+import time
+
+import pytest
+from django.utils import timezone
+
+from . import journal, partitions, rollups
+from .models import AnswerEvent, PuzzleTypeDifficulty, StageAccuracy
+
+
+def answer_event(*, stage_id=1, puzzle_type=1, correct=True, wager=10, minutes_ago=5):
+    created_at = timezone.now() - datetime.timedelta(minutes=minutes_ago)
+    return AnswerEvent(
+        created_at=created_at,
+        inserted_at=created_at,
+        game_id=1,
+        stage_id=stage_id,
+        player_id=1,
+        puzzle_type=puzzle_type,
+        choice_id=None if puzzle_type == 3 else stage_id * 10,
+        wager=wager,
+        delta=wager if correct else -wager,
+        correct=correct,
+    )
+
+
+def test_event_buffer_flushes_in_batches(db, django_assert_num_queries):
+    buffer = journal.EventBuffer(batch_size=3, flush_interval=60)
+
+    with django_assert_num_queries(0):
+        buffer.add([answer_event(), answer_event()])
+    assert len(buffer) == 2
+    assert buffer.timer is not None
+
+    with django_assert_num_queries(1):
+        buffer.add([answer_event()])
+    assert len(buffer) == 0
+    assert buffer.timer is None
+    assert AnswerEvent.objects.count() == 3
+
+
+def test_event_buffer_flushes_when_due(db):
+    buffer = journal.EventBuffer(batch_size=100, flush_interval=0)
+    buffer.add([answer_event()])
+    assert AnswerEvent.objects.count() == 1
+
+
+def test_event_buffer_flushes_on_a_timer(transactional_db):
+    buffer = journal.EventBuffer(batch_size=100, flush_interval=0.05)
+    buffer.add([answer_event()])
+    timer = buffer.timer
+    buffer.add([answer_event()])
+    assert buffer.timer is timer
+
+    deadline = time.monotonic() + 5
+    while not AnswerEvent.objects.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert AnswerEvent.objects.count() == 2
+    assert len(buffer) == 0
+
+
+def test_event_buffer_reset_disarms_its_timer(db):
+    buffer = journal.EventBuffer(batch_size=100, flush_interval=60)
+    buffer.add([answer_event()])
+    timer = buffer.timer
+
+    buffer.reset()
+    assert len(buffer) == 0 and buffer.timer is None
+    assert timer.finished.is_set()
+
+
+def test_record_waits_for_commit(db, django_capture_on_commit_callbacks, monkeypatch):
+    buffer = journal.EventBuffer(batch_size=1, flush_interval=60)
+    monkeypatch.setattr(journal, "buffer", buffer)
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        journal.record([answer_event()])
+        assert AnswerEvent.objects.count() == 0
+
+    callbacks[0]()
+    assert AnswerEvent.objects.count() == 1
+
+
+def test_rollup_is_incremental(db):
+    AnswerEvent.objects.bulk_create(
+        [
+            answer_event(stage_id=1, correct=True),
+            answer_event(stage_id=1, correct=False),
+            answer_event(stage_id=2, puzzle_type=3, correct=False, wager=20),
+            # NOTE: Too recent, left for the next run.
+            answer_event(stage_id=2, puzzle_type=3, correct=True, minutes_ago=0),
+        ]
+    )
+
+    assert rollups.rollup_answer_events() == 3
+    assert rollups.rollup_answer_events() == 0
+
+    stage = StageAccuracy.objects.get(stage_id=1)
+    assert (stage.answers, stage.correct, stage.wagered, stage.accuracy) == (2, 1, 20, 0.5)
+    assert PuzzleTypeDifficulty.objects.get(puzzle_type=3).difficulty == 1
+
+    AnswerEvent.objects.filter(stage_id=2).update(
+        inserted_at=timezone.now() - datetime.timedelta(minutes=5)
+    )
+    AnswerEvent.objects.bulk_create([answer_event(stage_id=1, correct=True)])
+    # NOTE: Buffered long ago but only just written, it waits for the lag like any other.
+    late = answer_event(stage_id=1, correct=True, minutes_ago=10)
+    late.inserted_at = timezone.now()
+    AnswerEvent.objects.bulk_create([late])
+
+    assert rollups.rollup_answer_events() == 2
+    stage = StageAccuracy.objects.get(stage_id=1)
+    assert (stage.answers, stage.correct) == (3, 2)
+    assert PuzzleTypeDifficulty.objects.get(puzzle_type=3).accuracy == 0.5
+
+
+def test_partitions_are_daily():
+    assert partitions.partition_name(datetime.date(2022, 2, 3)) == "analytics_answerevent_20220203"
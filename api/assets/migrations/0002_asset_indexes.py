@@ -0,0 +1,29 @@
+# Generated by Django 4.0.10 on 2026-10-19 05:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="spotifyasset",
+            index=models.Index(
+                condition=models.Q(("image__isnull", False)),
+                fields=["spotify_type", "id"],
+                name="asset_type_with_image",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="spotifyasset",
+            index=models.Index(
+                condition=models.Q(("image__isnull", False), ("preview__isnull", False)),
+                fields=["spotify_type", "id"],
+                name="asset_type_playable",
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.0.10 on 2026-10-19 06:31
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0002_asset_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="spotifyasset",
+            name="asset_type_with_image",
+        ),
+        migrations.RemoveIndex(
+            model_name="spotifyasset",
+            name="asset_type_playable",
+        ),
+    ]
@@ -1,13 +1,18 @@
+from functools import partial
 from typing import Optional
 
-from django.contrib.auth.models import User
-from django.db.utils import IntegrityError
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User, update_last_login
+from django.db import transaction
 from django.http import Http404
-from django.shortcuts import get_object_or_404
 from ninja import Router
+from ninja.errors import HttpError
 from oauthlib.common import generate_token
 from oauthlib.oauth2 import rfc6749
 
+from assets import tasks as asset_tasks
+from profile_api import profiles
+
 from . import jwt, models, schemas, spotify
 from .schemas import URL
 
@@ -24,28 +29,40 @@ def get_spotify_user_authorization_url(request, game_code: Optional[str] = None)
     return spotify.create_spotify_oauth2_url(state=state)
 
 
+def save_spotify_user(*, spotify_user: schemas.SpotifyProfile, spotify_token: schemas.SpotifyToken):
+    include = {"username", "email"}
+
+    with transaction.atomic():
+        owner, owner_created = User.objects.get_or_create(**spotify_user.dict(include=include))
+        models.SpotifyToken.objects.update_or_create(owner=owner, defaults=spotify_token.dict())
+        update_last_login(None, owner)
+        # NOTE: Reuses the /me payload the caller fetched instead of asking spotify for it again.
+        profiles.create_profile(owner=owner, spotify_profile=spotify_user)
+        # Syncing the users top tracks and artists is slow, it runs once the login commits.
+        transaction.on_commit(partial(asset_tasks.get_users_top_data.delay, owner_id=owner.id))
+
+    return owner
+
+
 @router.post("", response=schemas.AuthorizationResponse, url_name="auth")
-def verify_spotify_authorization(request, code: str, state: str):
+async def verify_spotify_authorization(request, code: str, state: str):
     try:
-        spotify_token = spotify.get_spotify_token_from_callback(callback_code=code)
-        session = spotify.create_spotify_session_with_token(spotify_token=spotify_token)
-        response = session.get("https://api.spotify.com/v1/me")
+        spotify_token = await spotify.aget_spotify_token_from_callback(callback_code=code)
     except rfc6749.errors.InvalidGrantError as e:
         raise Http404(e.error)
-
+    except rfc6749.errors.OAuth2Error as e:
+        raise HttpError(502, f"Spotify authorization failed: {e.error}")
+
+    response = await spotify.aget_spotify_api(
+        spotify.SPOTIFY_ME_URL, access_token=spotify_token.access_token
+    )
+    if response.status_code != 200:
+        raise HttpError(502, f"Spotify profile request failed: {response.status_code}")
     spotify_user = schemas.SpotifyProfile(**response.json())
-    include = {"username", "email"}
-    owner, owner_created = User.objects.get_or_create(**spotify_user.dict(include=include))
 
-    try:
-        token, token_created = models.SpotifyToken.objects.get_or_create(
-            owner=owner, **spotify_token.dict()
-        )
-    except IntegrityError as e:
-        models.SpotifyToken.objects.filter(owner=owner).update(**spotify_token.dict())
-        token = get_object_or_404(models.SpotifyToken, owner=owner)
-        token_created = False
-        token.save()
+    owner = await sync_to_async(save_spotify_user)(
+        spotify_user=spotify_user, spotify_token=spotify_token
+    )
 
     verified_user = schemas.User.from_orm(owner)
 
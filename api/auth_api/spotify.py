@@ -1,18 +1,35 @@
+import threading
+import time
+from functools import partial
+from typing import Optional
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from oauthlib.oauth2 import BackendApplicationClient
+from oauthlib.oauth2.rfc6749.errors import InvalidGrantError, MissingTokenError, raise_from_error
 from requests.auth import HTTPBasicAuth
 from requests_oauthlib import OAuth2Session
 
-from . import schemas
+from core import http
+from core.cache import cache_lock
+
+from . import models, schemas
 
 SPOTIFY_CLIENT = settings.SPOTIFY_CLIENT
 SPOTIFY_SECRET = settings.SPOTIFY_SECRET
 SPOTIFY_REDIRECT = settings.SPOTIFY_REDIRECT
+SPOTIFY_TOKEN_REFRESH_MARGIN = settings.SPOTIFY_TOKEN_REFRESH_MARGIN
 
 # SPOTIFY_REDIRECT = "http://localhost:8000/api/auth/callback" #TODO: REMOVE
 
 SPOTIFY_AUTHORIZE_URL = "https://accounts.spotify.com/authorize"
 SPOTIFY_TOKEN_URL = "https://accounts.spotify.com/api/token"
+SPOTIFY_ME_URL = "https://api.spotify.com/v1/me"
+
+SPOTIFY_BACKEND_TOKEN_KEY = "spotify:backend-token"
+SPOTIFY_BACKEND_TOKEN_MARGIN = 60
 
 
 def create_spotify_session():
@@ -29,7 +46,7 @@ def create_spotify_session():
         scope=scope,
         redirect_uri=SPOTIFY_REDIRECT,
     )
-    return session
+    return http.mount_shared_adapter(session)
 
 
 def create_spotify_oauth2_url(*, state):
@@ -44,24 +61,181 @@ def get_spotify_token_from_callback(*, callback_code):
     return schemas.SpotifyToken(**token)
 
 
-def create_spotify_session_with_token(*, spotify_token: schemas.SpotifyToken):
+async def aget_spotify_token_from_callback(*, callback_code) -> schemas.SpotifyToken:
+    """Async get_spotify_token_from_callback, raises the same oauthlib errors."""
+    data = {
+        "grant_type": "authorization_code",
+        "code": callback_code,
+        "redirect_uri": SPOTIFY_REDIRECT,
+    }
+    async with http.async_client() as client:
+        response = await client.post(
+            SPOTIFY_TOKEN_URL, data=data, auth=(SPOTIFY_CLIENT, SPOTIFY_SECRET)
+        )
+
+    token = parse_token_response(response)
+    token["expires_at"] = time.time() + token["expires_in"]
+    return schemas.SpotifyToken(**token)
+
+
+def parse_token_response(response) -> dict:
+    """The token of a token endpoint response, raising what oauthlib raises for a bad one."""
+    try:
+        token = response.json()
+    except ValueError:
+        token = {}
+
+    if not isinstance(token, dict):
+        token = {}
+    if "error" in token:
+        raise_from_error(token["error"], token)
+    if response.status_code != 200 or "access_token" not in token or "expires_in" not in token:
+        raise MissingTokenError(status_code=response.status_code)
+    return token
+
+
+async def aget_spotify_api(url: str, *, access_token: str):
+    async with http.async_client() as client:
+        return await client.get(url, headers={"Authorization": f"Bearer {access_token}"})
+
+
+def token_expires_soon(*, expires_at: float, margin: int = SPOTIFY_TOKEN_REFRESH_MARGIN):
+    return expires_at - time.time() <= margin
+
+
+def save_refreshed_token(
+    *, owner_id: int, token: dict, replaces: Optional[schemas.SpotifyToken] = None
+) -> schemas.SpotifyToken:
+    """Store a refreshed token, unless the stored one is no longer the token it replaces.
+
+    In that case another caller refreshed first and the token it stored is returned.
+    """
+    # NOTE: Spotify does not always send a new refresh token back, keep the stored one.
+    # Saved with update() so the SpotifyToken post_save receivers don't fire on a refresh.
+    with transaction.atomic():
+        stored = models.SpotifyToken.objects.select_for_update().get(owner_id=owner_id)
+        if replaces is not None and stored.access_token != replaces.access_token:
+            return schemas.SpotifyToken.from_orm(stored)
+
+        refreshed = schemas.SpotifyToken(**{"refresh_token": stored.refresh_token, **token})
+        models.SpotifyToken.objects.filter(owner_id=owner_id).update(**refreshed.dict())
+    return refreshed
+
+
+def refresh_spotify_token(*, owner_id: int, force: bool = False) -> schemas.SpotifyToken:
+    """Refresh a users token if it is about to expire and persist the result.
+
+    Spotify is called without holding a lock, the row is only locked to save the result.
+    When concurrent callers for the same user both refresh, the first token saved is kept.
+    A revoked token can never be refreshed again, it is deleted and InvalidGrantError raised.
+    """
+    stored = models.SpotifyToken.objects.get(owner_id=owner_id)
+    spotify_token = schemas.SpotifyToken.from_orm(stored)
+
+    if not force and not token_expires_soon(expires_at=spotify_token.expires_at):
+        return spotify_token
+
+    session = OAuth2Session(client_id=SPOTIFY_CLIENT, token=spotify_token.dict())
+    basic_auth = HTTPBasicAuth(SPOTIFY_CLIENT, SPOTIFY_SECRET)
+    try:
+        token = session.refresh_token(
+            SPOTIFY_TOKEN_URL, refresh_token=spotify_token.refresh_token, auth=basic_auth
+        )
+    except InvalidGrantError:
+        # NOTE: Unless the user logged in again meanwhile, which stored a new refresh token.
+        models.SpotifyToken.objects.filter(
+            owner_id=owner_id, refresh_token=spotify_token.refresh_token
+        ).delete()
+        raise
+    return save_refreshed_token(owner_id=owner_id, token=token, replaces=spotify_token)
+
+
+def create_spotify_session_with_token(
+    *, spotify_token: schemas.SpotifyToken, owner_id: Optional[int] = None
+):
     extras = {"client_id": SPOTIFY_CLIENT, "client_secret": SPOTIFY_SECRET}
-    include = {"access_token", "refresh_token", "token_type", "expires_in"}
+    include = {"access_token", "refresh_token", "token_type", "expires_in", "expires_at"}
     token = spotify_token.dict(include=include)
 
+    token_updater = None
+    if owner_id is not None:
+        token_updater = partial(_update_token, owner_id=owner_id)
+
     session = OAuth2Session(
         client_id=SPOTIFY_CLIENT,
         token=token,
         auto_refresh_url=SPOTIFY_TOKEN_URL,
         auto_refresh_kwargs=extras,
-        # token_updater=,
+        token_updater=token_updater,
     )
-    return session
+    return http.mount_shared_adapter(session)
 
 
-def create_spotify_backend_session():
+def _update_token(token, *, owner_id):
+    save_refreshed_token(owner_id=owner_id, token=token)
+
+
+def create_spotify_session_for_user(*, owner_id: int):
+    spotify_token = refresh_spotify_token(owner_id=owner_id)
+    return create_spotify_session_with_token(spotify_token=spotify_token, owner_id=owner_id)
+
+
+_backend_token = None
+_backend_token_lock = threading.Lock()
+
+
+def _is_fresh_backend_token(token):
+    if not token:
+        return False
+    expires_at = token.get("expires_at", 0)
+    return not token_expires_soon(expires_at=expires_at, margin=SPOTIFY_BACKEND_TOKEN_MARGIN)
+
+
+def fetch_spotify_backend_token():
     basic_auth = HTTPBasicAuth(SPOTIFY_CLIENT, SPOTIFY_SECRET)
     client = BackendApplicationClient(client_id=SPOTIFY_CLIENT)
-    session = OAuth2Session(client=client)
-    _ = session.fetch_token(SPOTIFY_TOKEN_URL, auth=basic_auth)
-    return session
+    session = http.mount_shared_adapter(OAuth2Session(client=client))
+    return session.fetch_token(SPOTIFY_TOKEN_URL, auth=basic_auth)
+
+
+def get_spotify_backend_token():
+    """Client credentials token shared by every thread and worker.
+
+    Checked in order: this process, the shared cache, then spotify. Only one
+    thread per process and one process per cache fetches a new token at a time.
+    """
+    global _backend_token
+
+    if _is_fresh_backend_token(_backend_token):
+        return _backend_token
+
+    with _backend_token_lock:
+        if _is_fresh_backend_token(_backend_token):
+            return _backend_token
+
+        token = cache.get(SPOTIFY_BACKEND_TOKEN_KEY)
+
+        if not _is_fresh_backend_token(token):
+            with cache_lock(f"{SPOTIFY_BACKEND_TOKEN_KEY}:lock"):
+                # NOTE: Another worker may have renewed it while we waited on the lock.
+                token = cache.get(SPOTIFY_BACKEND_TOKEN_KEY)
+                if not _is_fresh_backend_token(token):
+                    token = fetch_spotify_backend_token()
+                    timeout = int(token["expires_at"] - time.time())
+                    cache.set(SPOTIFY_BACKEND_TOKEN_KEY, token, timeout=timeout)
+
+        _backend_token = token
+        return token
+
+
+async def aget_spotify_backend_token():
+    if _is_fresh_backend_token(_backend_token):
+        return _backend_token
+    # NOTE: Renewals are rare, the locks of the sync path are reused in a thread.
+    return await sync_to_async(get_spotify_backend_token, thread_sensitive=False)()
+
+
+def create_spotify_backend_session():
+    client = BackendApplicationClient(client_id=SPOTIFY_CLIENT)
+    session = OAuth2Session(client=client, token=get_spotify_backend_token())
+    return http.mount_shared_adapter(session)
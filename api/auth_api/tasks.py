@@ -0,0 +1,38 @@
+import time
+from datetime import timedelta
+
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.utils import timezone
+from oauthlib.oauth2.rfc6749.errors import InvalidGrantError
+
+from . import models, spotify
+
+logger = get_task_logger(__name__)
+
+
+@shared_task(bind=True)
+def refresh_spotify_token(self, *, owner_id: int):
+    try:
+        spotify.refresh_spotify_token(owner_id=owner_id)
+    except InvalidGrantError:
+        logger.info(f"Spotify token of user {owner_id} was revoked and deleted.")
+
+
+@shared_task(bind=True)
+def refresh_expiring_spotify_tokens(self):
+    # NOTE: Look ahead by the refresh margin plus one schedule interval so a token
+    # never expires between two runs of this job.
+    look_ahead = settings.SPOTIFY_TOKEN_REFRESH_MARGIN + settings.SPOTIFY_TOKEN_REFRESH_INTERVAL
+    active_since = timezone.now() - timedelta(seconds=settings.SPOTIFY_TOKEN_REFRESH_ACTIVE)
+    expiring = models.SpotifyToken.objects.filter(
+        expires_at__lte=time.time() + look_ahead, owner__last_login__gte=active_since
+    )
+
+    owner_ids = list(expiring.values_list("owner_id", flat=True))
+    for owner_id in owner_ids:
+        refresh_spotify_token.delay(owner_id=owner_id)
+
+    logger.info(f"{len(owner_ids)} spotify tokens queued for refresh.")
+    return {"queued": len(owner_ids)}
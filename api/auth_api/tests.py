@@ -1,9 +1,17 @@
+import time
 from urllib.parse import parse_qs, unquote, urlparse
 
+import httpx
 import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
 from django.urls import reverse
+from oauthlib.oauth2.rfc6749 import errors
 
-from . import jwt, schemas
+from core import http
+
+from . import jwt, models, schemas, spotify, tasks
 from .schemas import URL
 
 
@@ -62,6 +70,26 @@ def test_verify_spotify_authorization_with_invalid_grant(client, route):
     assert response.status_code == 404
 
 
+@pytest.mark.parametrize(
+    "response, error",
+    [
+        (httpx.Response(400, json={"error": "invalid_grant"}), errors.InvalidGrantError),
+        (httpx.Response(503, text="Service Unavailable"), errors.MissingTokenError),
+        (httpx.Response(200, json={"token_type": "Bearer"}), errors.MissingTokenError),
+    ],
+)
+def test_async_token_errors_raise_like_oauthlib(monkeypatch, response, error):
+    monkeypatch.setattr(http, "share_async_clients", False)
+    monkeypatch.setattr(
+        http,
+        "create_async_client",
+        lambda: httpx.AsyncClient(transport=httpx.MockTransport(lambda request: response)),
+    )
+
+    with pytest.raises(error):
+        async_to_sync(spotify.aget_spotify_token_from_callback)(callback_code="code")
+
+
 @pytest.fixture
 def spotify_profile_response():
     response = {
@@ -118,3 +146,117 @@ def test_jwt_access_token(db, spotify_profile_response, create_user):
 
     assert auth.state == state
     assert auth.game_code == "game_keinv"
+
+
+@pytest.fixture
+def spotify_token(db, create_user):
+    def make_token(*, expires_at):
+        owner = create_user(username="run2dos", email="run2dos@gmail.com")
+        return models.SpotifyToken.objects.create(
+            owner=owner,
+            access_token="old-access",
+            token_type="Bearer",
+            expires_in=3600,
+            refresh_token="old-refresh",
+            expires_at=expires_at,
+        )
+
+    return make_token
+
+
+def test_token_expires_soon():
+    now = time.time()
+    assert spotify.token_expires_soon(expires_at=now - 1)
+    assert spotify.token_expires_soon(expires_at=now + 60, margin=300)
+    assert not spotify.token_expires_soon(expires_at=now + 3600, margin=300)
+
+
+def test_save_refreshed_token_keeps_refresh_token(spotify_token):
+    stored = spotify_token(expires_at=time.time())
+    expires_at = time.time() + 3600
+    token = {
+        "access_token": "new-access",
+        "token_type": "Bearer",
+        "expires_in": 3600,
+        "expires_at": expires_at,
+    }
+
+    refreshed = spotify.save_refreshed_token(owner_id=stored.owner_id, token=token)
+    stored.refresh_from_db()
+
+    assert refreshed.access_token == "new-access"
+    assert stored.access_token == "new-access"
+    assert stored.refresh_token == "old-refresh"
+    assert stored.expires_at == int(expires_at)
+
+
+def test_refresh_spotify_token_reuses_fresh_token(spotify_token):
+    stored = spotify_token(expires_at=time.time() + 3600)
+    token = spotify.refresh_spotify_token(owner_id=stored.owner_id)
+    assert token.access_token == "old-access"
+
+
+def test_refresh_spotify_token_keeps_a_concurrent_refresh(spotify_token, monkeypatch):
+    stored = spotify_token(expires_at=time.time())
+
+    def refresh_token(session, *args, **kwargs):
+        # NOTE: Another caller refreshes and saves while this one waits on spotify.
+        models.SpotifyToken.objects.filter(pk=stored.pk).update(access_token="their-access")
+        return {"access_token": "new-access", "token_type": "Bearer", "expires_in": 3600}
+
+    monkeypatch.setattr(spotify.OAuth2Session, "refresh_token", refresh_token)
+    token = spotify.refresh_spotify_token(owner_id=stored.owner_id)
+    stored.refresh_from_db()
+
+    assert token.access_token == "their-access"
+    assert stored.access_token == "their-access"
+
+
+def test_refresh_spotify_token_deletes_a_revoked_token(spotify_token, monkeypatch):
+    stored = spotify_token(expires_at=time.time())
+
+    def refresh_token(session, *args, **kwargs):
+        raise errors.InvalidGrantError()
+
+    monkeypatch.setattr(spotify.OAuth2Session, "refresh_token", refresh_token)
+    tasks.refresh_spotify_token(owner_id=stored.owner_id)
+
+    assert not models.SpotifyToken.objects.filter(pk=stored.pk).exists()
+
+
+def test_only_tokens_of_active_users_are_refreshed_ahead(spotify_token, monkeypatch):
+    queued = []
+    monkeypatch.setattr(tasks.refresh_spotify_token, "delay", lambda **kw: queued.append(kw))
+    stored = spotify_token(expires_at=time.time())
+
+    assert tasks.refresh_expiring_spotify_tokens() == {"queued": 0}
+
+    update_last_login(None, stored.owner)
+    assert tasks.refresh_expiring_spotify_tokens() == {"queued": 1}
+    assert queued == [{"owner_id": stored.owner_id}]
+
+
+@pytest.fixture
+def backend_token_cache():
+    cache.delete(spotify.SPOTIFY_BACKEND_TOKEN_KEY)
+    spotify._backend_token = None
+    yield cache
+    cache.delete(spotify.SPOTIFY_BACKEND_TOKEN_KEY)
+    spotify._backend_token = None
+
+
+def test_backend_token_reused_from_shared_cache(backend_token_cache):
+    token = {
+        "access_token": "app-access",
+        "token_type": "Bearer",
+        "expires_in": 3600,
+        "expires_at": time.time() + 3600,
+    }
+    backend_token_cache.set(spotify.SPOTIFY_BACKEND_TOKEN_KEY, token)
+
+    assert spotify.get_spotify_backend_token() == token
+    assert spotify._backend_token == token
+
+    session = spotify.create_spotify_backend_session()
+    assert session.access_token == "app-access"
+    assert session.get_adapter("https://api.spotify.com") is http.adapter
@@ -0,0 +1,65 @@
+"""Isolation for benchmarks run inside a configured deployment.
+
+Benchmarks write users, assets, games and scores, none of which may reach the
+real database, cache or leaderboard. While isolated() is active the default
+database is a throwaway test database, the cache is per process, the
+leaderboard is the in process stand-in, celery tasks run eagerly and Spotify
+and Genius are answered by the stand-ins.
+"""
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import override_settings
+
+from core.celery import app
+from play_api import leaderboard
+
+from . import standins
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "benchmarks",
+    }
+}
+
+
+@contextmanager
+def eager_tasks():
+    previous = {key: app.conf[key] for key in ("task_always_eager", "result_backend")}
+    app.conf.update(task_always_eager=True, result_backend="cache+memory://")
+    try:
+        yield
+    finally:
+        app.conf.update(previous)
+
+
+@contextmanager
+def local_leaderboard():
+    previous = leaderboard.leaderboard
+    leaderboard.leaderboard = leaderboard.LocalLeaderboard()
+    try:
+        yield
+    finally:
+        leaderboard.leaderboard = previous
+
+
+@contextmanager
+def test_database():
+    # NOTE: Same database the test runner would create, so on postgres plans and
+    # locking match production while the real tables stay untouched.
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield connection.settings_dict["NAME"]
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+@contextmanager
+def isolated(*, latency: float = 0.0):
+    # NOTE: Scenarios call the API through the test client, which sends Host: testserver.
+    allowed_hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+    with test_database() as database, override_settings(CACHES=CACHES, ALLOWED_HOSTS=allowed_hosts):
+        with eager_tasks(), local_leaderboard(), standins.installed(latency=latency):
+            yield database
@@ -0,0 +1,179 @@
+"""Multi-user load driver for the play flow.
+
+Every simulated player loads a game, answers each of its stages and reads the
+scoreboard, the same calls the frontend makes. Players are spread over worker
+threads and talk to the API either in process through the django test client
+or to a running server over http, see InProcessTransport and HTTPTransport.
+"""
+import queue
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from urllib.parse import urlencode
+
+import requests
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from auth_api import jwt, schemas as auth_schemas
+
+from .results import summarize
+
+
+@dataclass
+class Player:
+    id: int
+    token: str
+
+    @classmethod
+    def from_user(cls, user):
+        verified_user = auth_schemas.User.from_orm(user)
+        return cls(
+            id=user.id, token=jwt.create_access_token(verified_user=verified_user).access_token
+        )
+
+
+def route(name: str) -> str:
+    return reverse(f"api-1.0.0:{name}")
+
+
+class InProcessTransport:
+    def __init__(self, token: str):
+        self.client = Client(raise_request_exception=False, HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def parse(self, response):
+        if response.get("Content-Type", "").startswith("application/json"):
+            return response.status_code, response.json()
+        return response.status_code, None
+
+    def get(self, path: str, params: dict):
+        return self.parse(self.client.get(path, params))
+
+    def post(self, path: str, params: dict, body=None):
+        url = f"{path}?{urlencode(params)}"
+        return self.parse(self.client.post(url, body, content_type="application/json"))
+
+    def close(self):
+        pass
+
+
+class HTTPTransport:
+    def __init__(self, token: str, *, base_url: str, timeout: float = 30):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {token}"
+
+    def parse(self, response):
+        if response.headers.get("Content-Type", "").startswith("application/json"):
+            return response.status_code, response.json()
+        return response.status_code, None
+
+    def get(self, path: str, params: dict):
+        response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+        return self.parse(response)
+
+    def post(self, path: str, params: dict, body=None):
+        response = self.session.post(
+            f"{self.base_url}{path}", params=params, json=body, timeout=self.timeout
+        )
+        return self.parse(response)
+
+    def close(self):
+        self.session.close()
+
+
+class Recorder:
+    """Latency samples and status counts per route, shared by the worker threads."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.statuses = Counter()
+        self.lock = threading.Lock()
+
+    def call(self, name: str, method, *args):
+        started = time.perf_counter()
+        try:
+            status, payload = method(*args)
+        except requests.RequestException:
+            status, payload = "error", None
+        seconds = time.perf_counter() - started
+
+        with self.lock:
+            self.samples[name].append(seconds)
+            self.statuses[str(status)] += 1
+        return status, payload
+
+
+def lock_in_answers(choices, rng: random.Random):
+    return [{"id": choice["id"], "answer": rng.random() < 0.5} for choice in choices]
+
+
+def play_game(transport, recorder: Recorder, *, game_code: str, player_id: int, wager: int = 10):
+    rng = random.Random(player_id)
+
+    params = {"game_code": game_code, "player_id": player_id}
+    status, payload = recorder.call("play", transport.get, route("play"), params)
+    if status != 200:
+        return
+
+    for stage in payload["stages"]:
+        if stage["puzzle_type"] == 3:
+            params = {"player_id": player_id, "wager": wager}
+            answers = lock_in_answers(stage["choices"], rng)
+            recorder.call("answer_three", transport.post, route("answer_three"), params, answers)
+        else:
+            choice = rng.choice(stage["choices"])
+            params = {"player_id": player_id, "choice_id": choice["id"], "wager": wager}
+            recorder.call("answer", transport.post, route("answer"), params)
+
+    recorder.call("scoreboard", transport.get, route("scoreboard"), {"game_code": game_code})
+
+
+def run(*, game_code: str, players, workers: int, transport_factory=InProcessTransport):
+    """Play game_code once as each of players over workers threads and report per route."""
+    pending = queue.SimpleQueue()
+    for player in players:
+        pending.put(player)
+
+    recorder = Recorder()
+
+    def work():
+        try:
+            while True:
+                try:
+                    player = pending.get_nowait()
+                except queue.Empty:
+                    return
+                transport = transport_factory(player.token)
+                try:
+                    play_game(transport, recorder, game_code=game_code, player_id=player.id)
+                finally:
+                    transport.close()
+        finally:
+            # NOTE: In process, each worker thread opened its own database connections.
+            connections.close_all()
+
+    threads = [threading.Thread(target=work) for _ in range(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - started
+
+    requests_made = sum(len(samples) for samples in recorder.samples.values())
+    answers = len(recorder.samples["answer"]) + len(recorder.samples["answer_three"])
+    return {
+        "players": len(players),
+        "workers": workers,
+        "seconds": round(seconds, 3),
+        "requests": requests_made,
+        "requests_per_second": round(requests_made / seconds, 1),
+        "answers_per_second": round(answers / seconds, 1),
+        "statuses": dict(recorder.statuses),
+        "routes": {name: summarize(samples) for name, samples in recorder.samples.items()},
+    }
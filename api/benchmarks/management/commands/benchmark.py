@@ -0,0 +1,135 @@
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import environment, load, results, scenarios, startup
+from game_api import models as game_models
+
+RESULTS_DIR = settings.BASE_DIR / "benchmarks" / "results"
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the asset ingest, game creation, game payload, payload rendering, answer and "
+        "scoreboard benchmarks "
+        "offline against a throwaway database and the Spotify and Genius stand-ins, and save "
+        "the results as json. --compare prints the change from an earlier run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", type=Path, help="Defaults to benchmarks/results/.")
+        parser.add_argument("--compare", type=Path, help="Results of an earlier run.")
+        parser.add_argument("--ingest-users", type=int, default=5)
+        parser.add_argument("--max-stages", type=int, nargs="+", default=[5, 10, 20])
+        parser.add_argument("--runs", type=int, default=3, help="Games created per max stages.")
+        parser.add_argument("--players", type=int, default=50)
+        parser.add_argument(
+            "--payload-iterations", type=int, default=100, help="Payloads built per method."
+        )
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--scoreboard-entries", type=int, default=10000)
+        parser.add_argument("--reads", type=int, default=20, help="Reads per scoreboard page.")
+        parser.add_argument(
+            "--startup-runs", type=int, default=5, help="Cold starts per process, 0 to skip."
+        )
+        parser.add_argument(
+            "--latency", type=float, default=0.0, help="Seconds slept per stand-in call."
+        )
+
+    def handle(self, *args, output, compare, **options):
+        benchmark_options = {
+            name: options[name]
+            for name in (
+                "ingest_users",
+                "max_stages",
+                "runs",
+                "players",
+                "payload_iterations",
+                "workers",
+                "scoreboard_entries",
+                "reads",
+                "startup_runs",
+                "latency",
+            )
+        }
+
+        outcome = {}
+        if benchmark_options["startup_runs"]:
+            self.step("startup")
+            outcome["startup"] = startup.measure_all(runs=benchmark_options["startup_runs"])
+
+        with environment.isolated(latency=benchmark_options["latency"]):
+            try:
+                outcome.update(self.run(**benchmark_options))
+            except scenarios.ScenarioFailed as error:
+                raise CommandError(str(error))
+            document = results.document(outcome, **benchmark_options)
+
+        path = results.save(document, output or RESULTS_DIR / f"{int(time.time())}.json")
+        self.stdout.write(self.style.SUCCESS(f"Saved results to {path}"))
+
+        if compare:
+            self.print_comparison(results.load(compare), document)
+
+    def step(self, name):
+        self.stdout.write(f"{name}...")
+
+    def run(
+        self,
+        *,
+        ingest_users,
+        max_stages,
+        runs,
+        players,
+        payload_iterations,
+        workers,
+        scoreboard_entries,
+        reads,
+        **options,
+    ):
+        outcome = {}
+
+        self.step("asset ingest")
+        publishers = scenarios.seed_players(ingest_users, prefix="publisher")
+        outcome["asset_ingest"] = scenarios.asset_ingest(publishers)
+
+        self.step("create game")
+        outcome["create_game"], game_codes = scenarios.create_game(
+            publishers[0], max_stages=max_stages, runs=runs
+        )
+        # NOTE: The remaining scenarios use the last, so one of the largest, games.
+        game = game_models.Game.objects.get(game_code=game_codes[-1])
+
+        self.step("game payload")
+        payload_players = scenarios.seed_players(players, prefix="payload")
+        outcome["game_payload"] = scenarios.game_payload(
+            game, [load.Player.from_user(user) for user in payload_players]
+        )
+
+        self.step("payload rendering")
+        outcome["payload_rendering"] = scenarios.payload_rendering(
+            game, iterations=payload_iterations
+        )
+
+        self.step("answers")
+        answer_players = scenarios.seed_players(players, prefix="answers")
+        outcome["answers"] = scenarios.answer_throughput(
+            game, [load.Player.from_user(user) for user in answer_players], workers=workers
+        )
+
+        self.step("scoreboard")
+        scenarios.seed_scoreboard(game, scoreboard_entries)
+        outcome["scoreboard"] = scenarios.scoreboard_reads(
+            game, load.Player.from_user(publishers[0]), reads=reads
+        )
+        return outcome
+
+    def print_comparison(self, previous, current):
+        self.stdout.write(
+            f"Compared with {previous.get('commit')} from {previous.get('created')}, "
+            f"{previous.get('database')} against {current['database']}:"
+        )
+        for metric, before, after in results.compare(previous, current):
+            self.stdout.write(f"{metric}: {before} -> {after} ({results.change(before, after)})")
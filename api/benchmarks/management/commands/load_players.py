@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import load
+from game_api import models as game_models
+from play_api import models as play_models
+
+
+class Command(BaseCommand):
+    help = (
+        "Play a game as many players at once against a running server and report the "
+        "latency per route. The players must exist and not have played the game yet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("game_code")
+        parser.add_argument("--url", required=True, help="Base url of the server, no /api.")
+        parser.add_argument("--players", type=int, default=100)
+        parser.add_argument("--workers", type=int, default=16)
+
+    def handle(self, *args, game_code, url, players, workers, **options):
+        game = game_models.Game.objects.filter(game_code=game_code).first()
+        if game is None:
+            raise CommandError(f"No game with game code {game_code}.")
+
+        played = play_models.ScoreBoard.objects.filter(game=game).values("player_id")
+        users = User.objects.exclude(id__in=played).order_by("id")[:players]
+        load_players = [load.Player.from_user(user) for user in users]
+        if not load_players:
+            raise CommandError("Every player has already played this game.")
+
+        report = load.run(
+            game_code=game_code,
+            players=load_players,
+            workers=workers,
+            transport_factory=lambda token: load.HTTPTransport(token, base_url=url),
+        )
+        for name, value in report.items():
+            self.stdout.write(f"{name}: {value}")
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from benchmarks import synthetic
+
+
+class Command(BaseCommand):
+    help = (
+        "Add a deterministic synthetic dataset of users, observed assets, games and "
+        "scoreboards to the database, written with COPY on postgres. Sizes of observed "
+        "assets, stages and players per game follow --distribution around their means."
+    )
+
+    def add_arguments(self, parser):
+        defaults = synthetic.Sizes()
+        parser.add_argument("--users", type=int, default=defaults.users)
+        parser.add_argument("--assets", type=int, default=defaults.assets)
+        parser.add_argument(
+            "--observed", type=int, default=defaults.observed, help="Mean assets per user."
+        )
+        parser.add_argument("--games", type=int, default=defaults.games)
+        parser.add_argument(
+            "--stages", type=int, default=defaults.stages, help="Mean stages per game."
+        )
+        parser.add_argument(
+            "--players", type=int, default=defaults.players, help="Mean players per game."
+        )
+        parser.add_argument(
+            "--distribution", choices=synthetic.DISTRIBUTIONS, default=defaults.distribution
+        )
+        parser.add_argument("--seed", type=int, default=defaults.seed)
+        parser.add_argument("--batch-size", type=int, default=50000)
+        parser.add_argument(
+            "--noinput", action="store_false", dest="interactive", help="Do not ask to confirm."
+        )
+
+    def handle(self, *args, batch_size, interactive, **options):
+        sizes = synthetic.Sizes(
+            **{field: options[field] for field in synthetic.Sizes.__dataclass_fields__}
+        )
+        if min(sizes.users, sizes.assets, sizes.observed, sizes.stages, sizes.players) < 1:
+            raise CommandError("Every size but --games must be at least 1.")
+
+        database = connection.settings_dict["NAME"]
+        if interactive:
+            answer = input(f"Add synthetic data to the {connection.vendor} database {database}? ")
+            if answer.lower() not in ("y", "yes"):
+                raise CommandError("Seeding cancelled.")
+
+        writer = synthetic.generate(sizes, batch_size=batch_size)
+
+        for table, count in writer.written.items():
+            seconds = writer.seconds[table]
+            self.stdout.write(f"{table}: {count} rows in {seconds:.1f}s")
+        self.stdout.write(f"counters and leaderboard: {writer.seconds['counters']:.1f}s")
+        self.stdout.write(self.style.SUCCESS(f"Seeded {database} with seed {sizes.seed}."))
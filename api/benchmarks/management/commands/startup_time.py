@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks import startup
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the web, asgi and worker processes' imports in fresh interpreters and report "
+        "the cold start time of each and the packages their import time goes to."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5)
+
+    def handle(self, *args, runs, **options):
+        for target in startup.TARGETS:
+            report = startup.measure(target, runs=runs)
+            wall = report["wall"]
+            self.stdout.write(
+                self.style.SUCCESS(f"{target}: p50 {wall['p50_ms']} ms, max {wall['max_ms']} ms")
+            )
+            for package, spent in report["imports_ms"].items():
+                self.stdout.write(f"  {package}: {spent} ms")
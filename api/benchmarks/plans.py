@@ -0,0 +1,149 @@
+"""Query plans of the hot ORM queries.
+
+Each query is explained on the current database and the tables it reads by
+scanning every row are picked out of the plan. The tables that grow with users
+and games must only ever be read through an index, or by reading a partial
+index in full. Each query must also use the index built for it, a plan falling
+back to another index is a regression too. On postgres, sequential scans are
+priced out before explaining, so a small seeded database still shows the index
+the query would use at production scale, or a scan if there is none.
+"""
+import re
+from contextlib import contextmanager
+from typing import Dict, Set
+
+from django.apps import apps
+from django.db import connection
+from django.db.models import Sum
+
+from assets.models import SpotifyAsset
+from game_api import models as game_models
+from game_api import reaper
+from play_api import answer_key, models as play_models
+
+LARGE_TABLES = {
+    "assets_spotifyasset",
+    "assets_spotifyasset_observers",
+    "game_api_game",
+    "game_api_stage",
+    "game_api_choice",
+    "play_api_scoreboard",
+}
+
+EXPECTED_INDEXES = {
+    "choices_of_game": "choice_stage_correct",
+    "correct_choices_of_stage": "choice_stage_correct",
+    "games_of_publisher": "game_publisher_latest",
+    "games_played": "scoreboard_player_score",
+    "scoreboard_of_game": "scoreboard_game_score",
+    "points_of_player": "scoreboard_player_score",
+    "stuck_games": "game_unprocessed",
+}
+
+SCANS = {
+    # NOTE: "SCAN table USING INDEX" still reads every row, only in index order. Older
+    # sqlite versions write "SCAN TABLE table".
+    "sqlite": re.compile(r"\bSCAN (?:TABLE )?(\w+)(?: USING (?:COVERING )?INDEX (\w+))?"),
+    "postgresql": re.compile(r"Seq Scan on (\w+)()"),
+}
+
+
+def partial_indexes() -> Set[str]:
+    """Names of the indexes holding only some rows, reading all of one is fine."""
+    return {
+        index.name
+        for model in apps.get_models()
+        for index in model._meta.indexes
+        if index.condition is not None
+    }
+
+
+def index_on(table: str, columns) -> str:
+    """Name of the index on exactly these columns of a table, as the database has it."""
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return next(
+        name
+        for name, constraint in constraints.items()
+        if constraint["index"] and constraint["columns"] == list(columns)
+    )
+
+
+def expected_indexes() -> Dict[str, str]:
+    # NOTE: The asset queries join through the observers table, which Django indexes by user
+    # under a name derived from a hash, so it is looked up instead of written down.
+    observers_by_user = index_on(SpotifyAsset.observers.through._meta.db_table, ["user_id"])
+    return {
+        "artists_of_publisher": observers_by_user,
+        "tracks_of_publisher": observers_by_user,
+        **EXPECTED_INDEXES,
+    }
+
+
+def queries(*, publisher_id: int, player_id: int, game_id: int, stage_id: int) -> Dict:
+    """The hot queries, as the code running them builds them."""
+    assets = SpotifyAsset.objects.filter(observers=publisher_id, image__isnull=False)
+    return {
+        "artists_of_publisher": assets.filter(spotify_type="artist"),
+        "tracks_of_publisher": assets.filter(spotify_type="track", preview__isnull=False),
+        "choices_of_game": game_models.Choice.objects.filter(stage__game_id=game_id)
+        .values(*answer_key.CHOICE_FIELDS)
+        .order_by("id"),
+        "correct_choices_of_stage": game_models.Choice.objects.filter(
+            stage_id=stage_id, correct=True
+        ),
+        "games_of_publisher": game_models.Game.objects.filter(publisher_id=publisher_id).order_by(
+            "-id"
+        )[:10],
+        "games_played": game_models.Game.objects.filter(scoreboard__player_id=player_id),
+        "scoreboard_of_game": play_models.ScoreBoard.objects.filter(game_id=game_id).order_by(
+            "-score"
+        )[:10],
+        "points_of_player": play_models.ScoreBoard.objects.filter(player_id=player_id)
+        .values("player_id")
+        .annotate(total=Sum("score")),
+        "stuck_games": reaper.stuck_games(),
+    }
+
+
+@contextmanager
+def indexes_preferred():
+    if connection.vendor != "postgresql":
+        yield
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SET enable_seqscan = off")
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("RESET enable_seqscan")
+
+
+def scanned_tables(plan: str) -> Set[str]:
+    partial = partial_indexes()
+    return {
+        table for table, index in SCANS[connection.vendor].findall(plan) if index not in partial
+    }
+
+
+def explain_all(queries: Dict) -> Dict[str, str]:
+    with indexes_preferred():
+        return {name: queryset.explain() for name, queryset in queries.items()}
+
+
+def full_scans(plans: Dict[str, str]) -> Dict[str, Set[str]]:
+    """Large tables each query reads in full, for the queries that read any."""
+    scans = {name: scanned_tables(plan) & LARGE_TABLES for name, plan in plans.items()}
+    return {name: tables for name, tables in scans.items() if tables}
+
+
+def missing_indexes(plans: Dict[str, str]) -> Dict[str, str]:
+    """The index each query was expected to use, for the queries whose plan does not use it."""
+    expected = expected_indexes()
+    return {
+        name: expected[name]
+        for name, plan in plans.items()
+        if not re.search(rf"\b{expected[name]}\b", plan)
+    }
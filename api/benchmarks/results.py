@@ -0,0 +1,93 @@
+"""Machine readable benchmark results and comparisons between runs.
+
+A run is saved as one json document, scenarios nest plain numbers under their
+names. compare() flattens two runs to dotted metric names so any two runs can
+be diffed, metrics only present in one of them are reported too.
+"""
+import json
+import math
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from django.db import connection
+
+
+def percentile(ordered: List[float], percent: float) -> float:
+    index = max(0, math.ceil(percent / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def milliseconds(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def summarize(samples: List[float]) -> dict:
+    """Latency summary in milliseconds of samples in seconds."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_ms": milliseconds(sum(ordered) / len(ordered)),
+        "p50_ms": milliseconds(percentile(ordered, 50)),
+        "p95_ms": milliseconds(percentile(ordered, 95)),
+        "max_ms": milliseconds(ordered[-1]),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def document(scenarios: dict, **options) -> dict:
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "database": connection.vendor,
+        "options": options,
+        "scenarios": scenarios,
+    }
+
+
+def save(results: dict, path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2, sort_keys=True))
+    return path
+
+
+def load(path: Path) -> dict:
+    return json.loads(Path(path).read_text())
+
+
+def flatten(values: dict, prefix: str = "") -> Dict[str, float]:
+    metrics = {}
+    for name, value in values.items():
+        key = f"{prefix}{name}"
+        if isinstance(value, dict):
+            metrics.update(flatten(value, f"{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[key] = value
+    return metrics
+
+
+def compare(previous: dict, current: dict) -> List[Tuple[str, Optional[float], Optional[float]]]:
+    """(metric, previous, current) of every scenario metric in either run, sorted by metric."""
+    before = flatten(previous.get("scenarios", {}))
+    after = flatten(current.get("scenarios", {}))
+    return [(metric, before.get(metric), after.get(metric)) for metric in sorted({*before, *after})]
+
+
+def change(before: Optional[float], after: Optional[float]) -> str:
+    if before is None or after is None:
+        return "n/a"
+    if before == 0:
+        return "0.0%" if after == 0 else "new"
+    return f"{(after - before) / before * 100:+.1f}%"
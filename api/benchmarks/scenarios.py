@@ -0,0 +1,239 @@
+"""Benchmark scenarios, each returns a dict of plain numbers for results.save().
+
+They expect the stand-ins to answer Spotify and Genius and run tasks eagerly,
+see environment.isolated(). Players are seeded the way a login leaves them:
+a profile, a player profile and a long lived Spotify token.
+"""
+import json
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Prefetch
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from ninja.responses import NinjaJSONEncoder
+
+from assets import models as asset_models
+from assets import tasks as asset_tasks
+from auth_api import models as auth_models
+from core import renderers
+from game_api import models as game_models
+from game_api import tasks as game_tasks
+from play_api import answer_key, games
+from play_api import models as play_models
+from play_api import schemas as play_schemas
+from play_api.api import PAGE_SIZE
+from profile_api import models as profile_models
+
+from . import load
+from .results import summarize
+
+
+class ScenarioFailed(Exception):
+    pass
+
+
+def seed_players(count: int, *, prefix: str = "bench"):
+    start = User.objects.count()
+    users = User.objects.bulk_create(
+        User(username=f"{prefix}-{start + index}") for index in range(count)
+    )
+    # NOTE: bulk_create only returns ids on postgres.
+    users = list(User.objects.filter(username__in=[user.username for user in users]))
+
+    profile_models.Profile.objects.bulk_create(
+        profile_models.Profile(user=user, display_name=user.username, occupation="benchmark")
+        for user in users
+    )
+    play_models.PlayerProfile.objects.bulk_create(
+        play_models.PlayerProfile(player=user) for user in users
+    )
+    auth_models.SpotifyToken.objects.bulk_create(
+        auth_models.SpotifyToken(
+            owner=user,
+            access_token=f"standin-{user.username}",
+            token_type="Bearer",
+            expires_in=3600,
+            refresh_token=f"standin-refresh-{user.username}",
+            expires_at=int(time.time()) + 365 * 24 * 3600,
+        )
+        for user in users
+    )
+    return users
+
+
+def timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+def asset_ingest(players):
+    samples = []
+    for player in players:
+        seconds, _ = timed(
+            asset_tasks.get_users_top_data.apply, kwargs={"owner_id": player.id}, throw=True
+        )
+        samples.append(seconds)
+
+    observed = asset_models.SpotifyAsset.observers.through.objects.filter(user__in=players)
+    observed = observed.count()
+    return {
+        "users": len(players),
+        "assets": asset_models.SpotifyAsset.objects.count(),
+        "observed": observed,
+        "observed_per_second": round(observed / sum(samples), 1),
+        "seconds_per_user": summarize(samples),
+    }
+
+
+def create_game(publisher, *, max_stages, runs: int):
+    """Latency of create_game per max_stages, and the game codes it created."""
+    latencies, game_codes = {}, []
+    for stages in max_stages:
+        samples = []
+        for _ in range(runs):
+            seconds, result = timed(
+                game_tasks.create_game.apply,
+                kwargs={"publisher_id": publisher.id, "max_stages": stages},
+                throw=True,
+            )
+            samples.append(seconds)
+            game_codes.append(result.result["game_code"])
+        latencies[str(stages)] = summarize(samples)
+    return latencies, game_codes
+
+
+def game_payload(game, players):
+    """get_game_by_gamecode latency and queries, cold for the first of players and warm after.
+
+    players are load.Player, each has to be new to game.
+    """
+    games.invalidate_stages_payload(game.id)
+    answer_key.invalidate_answer_key(game.id)
+
+    samples, queries = [], []
+    for player in players:
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {player.token}")
+        with CaptureQueriesContext(connection) as captured:
+            seconds, response = timed(
+                client.get,
+                load.route("play"),
+                {"game_code": game.game_code, "player_id": player.id},
+            )
+        if response.status_code != 200:
+            raise ScenarioFailed(f"play returned {response.status_code} for player {player.id}")
+        samples.append(seconds)
+        queries.append(len(captured))
+
+    return {
+        "stages": game.stage_set.count(),
+        "cold_ms": round(samples[0] * 1000, 3),
+        "cold_queries": queries[0],
+        "warm": summarize(samples[1:]),
+        "warm_queries": max(queries[1:], default=0),
+    }
+
+
+def schema_payload(game):
+    """The game payload built object by object through the schemas, as before rows were used."""
+    choices = game_models.Choice.objects.select_related("spotify_asset").order_by("id")
+    stages = game.stage_set.prefetch_related(Prefetch("choice_set", queryset=choices))
+    stages_out = [
+        play_schemas.StageOut(
+            puzzle_type=stage.puzzle_type,
+            question=stage.question,
+            choices=[play_schemas.ChoiceOut.from_orm(choice) for choice in stage.choice_set.all()],
+        )
+        for stage in stages.order_by("id")
+    ]
+    game_out = play_schemas.GameOut.from_orm(game)
+    active_game = play_schemas.ActiveGame(game=game_out, stages=stages_out)
+    return json.dumps(active_game.dict(), cls=NinjaJSONEncoder)
+
+
+def rows_payload(game):
+    game_out = {field: getattr(game, field) for field in play_schemas.GameOut.__fields__}
+    return renderers.renderer.render(
+        None, {"game": game_out, "stages": games.build_stages(game)}, response_status=200
+    )
+
+
+def render_schema(payload):
+    return json.dumps(play_schemas.ActiveGame(**payload).dict(), cls=NinjaJSONEncoder)
+
+
+def render_rows(payload):
+    return renderers.renderer.render(None, payload, response_status=200)
+
+
+def cpu_ms(function, argument, iterations: int) -> float:
+    started = time.process_time()
+    for _ in range(iterations):
+        function(argument)
+    return round((time.process_time() - started) / iterations * 1000, 3)
+
+
+def payload_rendering(game, *, iterations: int):
+    """CPU milliseconds per request of the game payload through the schemas and from rows.
+
+    Building includes the two or three queries, rendering starts from a cached payload.
+    """
+    payload = {
+        "game": {field: getattr(game, field) for field in play_schemas.GameOut.__fields__},
+        "stages": games.build_stages(game),
+    }
+    return {
+        "stages": len(payload["stages"]),
+        "choices": sum(len(stage["choices"]) for stage in payload["stages"]),
+        "build_cpu_ms": {
+            "schemas": cpu_ms(schema_payload, game, iterations),
+            "rows": cpu_ms(rows_payload, game, iterations),
+        },
+        "render_cpu_ms": {
+            "schemas": cpu_ms(render_schema, payload, iterations),
+            "orjson": cpu_ms(render_rows, payload, iterations),
+        },
+    }
+
+
+def answer_throughput(game, players, *, workers: int):
+    return load.run(game_code=game.game_code, players=players, workers=workers)
+
+
+def seed_scoreboard(game, entries: int):
+    readers = seed_players(entries, prefix=f"reader-{game.id}")
+    rng = random.Random(game.id)
+    play_models.ScoreBoard.objects.bulk_create(
+        (
+            play_models.ScoreBoard(game=game, player=reader, score=rng.randint(-500, 500))
+            for reader in readers
+        ),
+        batch_size=1000,
+    )
+
+
+def scoreboard_reads(game, player, *, reads: int):
+    """Latency of the first, a middle and the last scoreboard page of game."""
+    entries = play_models.ScoreBoard.objects.filter(game=game).count()
+    last_page = max(1, -(-entries // PAGE_SIZE))
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {player.token}")
+
+    pages = {"first": 1, "middle": max(1, last_page // 2), "last": last_page}
+    results = {"entries": entries}
+    for name, page in pages.items():
+        samples = []
+        for _ in range(reads):
+            with CaptureQueriesContext(connection) as captured:
+                seconds, response = timed(
+                    client.get,
+                    load.route("scoreboard"),
+                    {"game_code": game.game_code, "page": page},
+                )
+            if response.status_code != 200:
+                raise ScenarioFailed(f"scoreboard page {page} returned {response.status_code}")
+            samples.append(seconds)
+        results[name] = {**summarize(samples), "queries": len(captured)}
+    return results
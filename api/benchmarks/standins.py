@@ -0,0 +1,173 @@
+"""Offline stand-ins for the Spotify and Genius APIs.
+
+Answers the handful of endpoints the game creation and asset tasks call with
+deterministic payloads, so benchmarks measure our code and not the network.
+Every user gets an overlapping slice of one pool of tracks and artists, the
+way real listeners share assets. Installed in place of the shared adapter in
+core.http, calls through it are still timed and traced.
+"""
+import json
+import time
+import zlib
+from contextlib import contextmanager
+from functools import lru_cache
+from urllib.parse import parse_qs, urlsplit
+
+from requests.adapters import HTTPAdapter
+from requests.models import Response
+
+from core import http
+
+TRACK_POOL = 2000
+ARTIST_POOL = 500
+TIME_RANGES = ["short_term", "medium_term", "long_term"]
+
+FIRST_WORDS = ["Velvet", "Copper", "Neon", "Hollow", "Silver", "Paper", "Crimson", "Static"]
+SECOND_WORDS = ["Harbor", "Engines", "Lanterns", "Orchard", "Satellites", "Wolves", "Tides"]
+CITIES = ["Leeds", "Austin", "Osaka", "Lagos", "Montreal", "Bergen", "Perth"]
+GENRES = ["shoegaze", "dub", "post-punk", "soul", "krautrock", "grime", "bossa nova"]
+
+
+def artist_name(number: int) -> str:
+    first = FIRST_WORDS[number % len(FIRST_WORDS)]
+    second = SECOND_WORDS[number // len(FIRST_WORDS) % len(SECOND_WORDS)]
+    return f"{first} {second} {number}"
+
+
+@lru_cache(maxsize=None)
+def artist_numbers():
+    return {artist_name(number): number for number in range(ARTIST_POOL)}
+
+
+def artist_description(number: int) -> str:
+    name = artist_name(number)
+    city = CITIES[number % len(CITIES)]
+    genre = GENRES[number % len(GENRES)]
+    return (
+        f"{name} is a band from {city} formed in {1970 + number % 50}.\n\n"
+        f"{name} released {number % 9 + 2} studio albums and toured widely.\n\n"
+        f"Their records draw on {genre} and were produced in {city}."
+    )
+
+
+def page_of(pool: int, *, token: str, time_range: str, offset: int, limit: int):
+    """The numbers of one page of a users top items, a user always gets the same pages."""
+    start = zlib.crc32(token.encode()) + TIME_RANGES.index(time_range) * 37 + offset * limit
+    return [(start + index) % pool for index in range(limit)]
+
+
+def track(number: int):
+    uri = f"track{number:05d}"
+    return {
+        "id": uri,
+        "name": f"Track {number}",
+        "type": "track",
+        "preview_url": f"https://p.scdn.co/mp3-preview/{uri}",
+        "album": {"images": [{"url": f"https://i.scdn.co/image/{uri}"}]},
+    }
+
+
+def artist(number: int):
+    uri = f"artist{number:05d}"
+    return {
+        "id": uri,
+        "name": artist_name(number),
+        "type": "artist",
+        "images": [{"url": f"https://i.scdn.co/image/{uri}"}],
+    }
+
+
+def top_items(request, query):
+    token = request.headers.get("Authorization", "")
+    time_range = query.get("time_range", ["medium_term"])[0]
+    offset = int(query.get("offset", ["0"])[0])
+    limit = int(query.get("limit", ["20"])[0])
+
+    if request.path_url.startswith("/v1/me/top/tracks"):
+        pool, build = TRACK_POOL, track
+    else:
+        pool, build = ARTIST_POOL, artist
+
+    numbers = page_of(pool, token=token, time_range=time_range, offset=offset, limit=limit)
+    return 200, {"items": [build(number) for number in numbers]}
+
+
+def genius_search(request, query):
+    name = query.get("q", [""])[0]
+    number = artist_numbers().get(name)
+    if number is None:
+        return 200, {"response": {"hits": []}}
+    primary_artist = {"name": name, "id": number}
+    return 200, {"response": {"hits": [{"result": {"primary_artist": primary_artist}}] * 3}}
+
+
+def genius_artist(request, query):
+    number = int(urlsplit(request.url).path.rsplit("/", 1)[-1])
+    if number >= ARTIST_POOL:
+        return 404, {"meta": {"status": 404}}
+    description = {"plain": artist_description(number)}
+    return 200, {"response": {"artist": {"name": artist_name(number), "description": description}}}
+
+
+ROUTES = {
+    ("api.spotify.com", "/v1/me/top/tracks"): top_items,
+    ("api.spotify.com", "/v1/me/top/artists"): top_items,
+    ("api.genius.com", "/search"): genius_search,
+}
+
+
+def route(request):
+    url = urlsplit(request.url)
+    if url.hostname == "api.genius.com" and url.path.startswith("/artists/"):
+        return genius_artist
+    return ROUTES.get((url.hostname, url.path))
+
+
+def json_response(request, status: int, payload) -> Response:
+    response = Response()
+    response.status_code = status
+    response._content = json.dumps(payload).encode()
+    response.headers["Content-Type"] = "application/json"
+    response.encoding = "utf-8"
+    response.url = request.url
+    response.request = request
+    return response
+
+
+class StandInTransport(HTTPAdapter):
+    """Answers requests from ROUTES instead of the network, unknown urls get a 404."""
+
+    def __init__(self, *args, latency: float = 0.0, **kwargs):
+        self.latency = latency
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, *args, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+
+        handler = route(request)
+        if handler is None:
+            return json_response(request, 404, {"error": "not found"})
+
+        status, payload = handler(request, parse_qs(urlsplit(request.url).query))
+        return json_response(request, status, payload)
+
+
+class StandInAdapter(http.InstrumentedHTTPAdapter, StandInTransport):
+    pass
+
+
+@contextmanager
+def installed(*, latency: float = 0.0):
+    """Route every session mounting the shared adapter to the stand-ins while active.
+
+    latency is slept per call to approximate the real round trip.
+    """
+    original = http.adapter
+    http.adapter = StandInAdapter(latency=latency)
+    http.mount_shared_adapter(http.session)
+    try:
+        yield http.adapter
+    finally:
+        http.adapter = original
+        http.mount_shared_adapter(http.session)
@@ -0,0 +1,64 @@
+"""Cold start cost of the web and worker processes.
+
+Each target is started in a fresh interpreter, doing the imports its process
+does before serving the first request or task. The wall time includes the
+interpreter itself. One more run under ``python -X importtime`` attributes the
+import time to top level packages, to see what a regression came from.
+"""
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from django.conf import settings
+
+from .results import summarize
+
+# The urlconf is loaded on the first request, so it is part of the cold start.
+TARGETS = {
+    "web": "import core.wsgi; from django.urls import get_resolver; get_resolver().url_patterns",
+    "asgi": "import core.asgi; from django.urls import get_resolver; get_resolver().url_patterns",
+    "worker": "import django; django.setup(); "
+    "from core.celery import app; app.loader.import_default_modules()",
+}
+
+
+def command(target: str, *options):
+    return [sys.executable, *options, "-c", TARGETS[target]]
+
+
+def start(target: str, *options) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        command(target, *options),
+        # NOTE: Inherits DJANGO_SETTINGS_MODULE from this process.
+        cwd=settings.BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def imports_by_package(importtime: str, top: int = 10) -> dict:
+    """Milliseconds spent importing each top level package, the slowest top of them."""
+    spent = Counter()
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, _, module = line[len("import time:") :].split("|")
+        spent[module.strip().split(".")[0]] += int(own)
+    return {package: round(us / 1000, 1) for package, us in spent.most_common(top)}
+
+
+def measure(target: str, *, runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        start(target)
+        samples.append(time.perf_counter() - started)
+
+    importtime = start(target, "-X", "importtime").stderr
+    return {"wall": summarize(samples), "imports_ms": imports_by_package(importtime)}
+
+
+def measure_all(*, runs: int) -> dict:
+    return {target: measure(target, runs=runs) for target in TARGETS}
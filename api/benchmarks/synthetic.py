@@ -0,0 +1,291 @@
+"""Deterministic synthetic datasets at production scale.
+
+Users with profiles, assets observed by users, and games with stages, choices
+and scoreboards are generated from one seed, the same seed and sizes always
+give the same rows. Rows get their ids up front so related rows can point at
+them without reading anything back, and are written with COPY on postgres and
+batched bulk_create elsewhere, see Writer.
+"""
+import io
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Sequence
+
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import connection, models
+
+from assets.models import SpotifyAsset
+from game_api.models import Choice, Game, Stage
+from play_api import leaderboard, scoring
+from play_api.models import PlayerProfile, ScoreBoard
+from profile_api.models import Profile
+
+from . import standins
+
+DISTRIBUTIONS = ["fixed", "uniform", "pareto"]
+
+# Synthetic users joined one a minute from here on.
+JOINED = datetime(2022, 1, 1, tzinfo=timezone.utc)
+
+# Choices per stage and which of them are correct, by puzzle type, as create_game builds them.
+LAYOUTS = {
+    1: [True, False, False, False],
+    2: [True] + [False] * 9,
+    3: None,
+}
+
+
+@dataclass
+class Sizes:
+    users: int = 20000
+    assets: int = 200000
+    observed: int = 50
+    games: int = 2000
+    stages: int = 30
+    players: int = 25
+    distribution: str = "pareto"
+    seed: int = 0
+
+
+def draw(rng: random.Random, mean: int, *, distribution: str, maximum: int) -> int:
+    """A size with the given mean, pareto sizes have a long tail of a few very large ones."""
+    if distribution == "fixed":
+        size = mean
+    elif distribution == "uniform":
+        size = rng.randint(1, max(1, 2 * mean - 1))
+    else:
+        # NOTE: With alpha 2 the mean is twice the scale.
+        size = round(rng.paretovariate(2) * mean / 2)
+    return max(1, min(size, maximum))
+
+
+def popular(rng: random.Random, population: int) -> int:
+    # NOTE: Skewed towards low numbers so a few assets are observed by many users.
+    return int(population * rng.random() ** 3)
+
+
+def next_id(model) -> int:
+    return (model.objects.aggregate(last=models.Max("pk"))["last"] or 0) + 1
+
+
+def copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    text = value.isoformat() if hasattr(value, "isoformat") else str(value)
+    return text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+
+class Writer:
+    """Writes rows of a model, through COPY on postgres and bulk_create otherwise."""
+
+    def __init__(self, *, batch_size: int = 50000):
+        self.batch_size = batch_size
+        self.written: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+        self.models = set()
+
+    def write(self, model, fields: Sequence[str], rows: Iterable[Sequence]):
+        started = time.perf_counter()
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                count += self.flush(model, fields, batch)
+                batch = []
+        count += self.flush(model, fields, batch)
+
+        table = model._meta.db_table
+        self.written[table] = self.written.get(table, 0) + count
+        self.seconds[table] = self.seconds.get(table, 0) + time.perf_counter() - started
+        self.models.add(model)
+
+    def flush(self, model, fields, batch) -> int:
+        if not batch:
+            return 0
+        if connection.vendor == "postgresql":
+            self.copy(model, fields, batch)
+        else:
+            model.objects.bulk_create(
+                (model(**dict(zip(fields, row))) for row in batch), batch_size=1000
+            )
+        return len(batch)
+
+    def copy(self, model, fields, batch):
+        columns = ", ".join(
+            connection.ops.quote_name(model._meta.get_field(field).column) for field in fields
+        )
+        buffer = io.StringIO()
+        for row in batch:
+            buffer.write("\t".join(copy_value(value) for value in row))
+            buffer.write("\n")
+        buffer.seek(0)
+        table = connection.ops.quote_name(model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN", buffer)
+
+    def reset_sequences(self):
+        # NOTE: Ids were assigned here, move the sequences past them for later inserts.
+        statements = connection.ops.sequence_reset_sql(no_style(), list(self.models))
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+
+class Generator:
+    def __init__(self, sizes: Sizes, writer: Writer):
+        self.sizes = sizes
+        self.writer = writer
+        self.rng = random.Random(sizes.seed)
+        self.user_ids: List[int] = []
+        self.asset_ids: List[int] = []
+        self.observed: Dict[int, List[int]] = {}
+
+    def draw(self, mean: int, maximum: int) -> int:
+        return draw(self.rng, mean, distribution=self.sizes.distribution, maximum=maximum)
+
+    def users(self):
+        first = next_id(User)
+        self.user_ids = list(range(first, first + self.sizes.users))
+
+        fields = ["id", "password", "username", "first_name", "last_name", "email"]
+        fields += ["is_superuser", "is_staff", "is_active", "date_joined"]
+        self.writer.write(
+            User,
+            fields,
+            (
+                (user_id, "!", f"synthetic-{user_id}", "", "", "", False, False, True, joined)
+                for user_id, joined in zip(self.user_ids, self.joined())
+            ),
+        )
+        self.writer.write(
+            Profile,
+            ["user_id", "display_name", "occupation", "country", "data_loaded"],
+            (
+                (user_id, f"synthetic-{user_id}", "synthetic", "US", True)
+                for user_id in self.user_ids
+            ),
+        )
+        fields = ["player_id", "consumed_stars", "biggest_gainer", "biggest_loser", "points"]
+        self.writer.write(
+            PlayerProfile,
+            fields + ["stars"],
+            ((user_id, 0, 0, 0, 0, 0) for user_id in self.user_ids),
+        )
+
+    def joined(self):
+        for minutes in range(len(self.user_ids)):
+            yield JOINED + timedelta(minutes=minutes)
+
+    def assets(self):
+        first = next_id(SpotifyAsset)
+        self.asset_ids = list(range(first, first + self.sizes.assets))
+
+        def rows():
+            for asset_id in self.asset_ids:
+                uri = f"synthetic{asset_id:08d}"
+                image = f"/image/{uri}"
+                # NOTE: One in five is an artist, named after one the Genius stand-in knows.
+                if asset_id % 5 == 0:
+                    name = standins.artist_name(asset_id // 5 % standins.ARTIST_POOL)
+                    yield asset_id, name, uri, "artist", image, None
+                else:
+                    yield asset_id, f"Track {asset_id}", uri, "track", image, f"/preview/{uri}"
+
+        fields = ["id", "name", "spotify_uri", "spotify_type", "image", "preview"]
+        self.writer.write(SpotifyAsset, fields, rows())
+
+        for user_id in self.user_ids:
+            size = self.draw(self.sizes.observed, maximum=len(self.asset_ids) // 2)
+            chosen = set()
+            while len(chosen) < size:
+                chosen.add(self.asset_ids[popular(self.rng, len(self.asset_ids))])
+            self.observed[user_id] = sorted(chosen)
+
+        observers = SpotifyAsset.observers.through
+        self.writer.write(
+            observers,
+            ["spotifyasset_id", "user_id"],
+            (
+                (asset_id, user_id)
+                for user_id, asset_ids in self.observed.items()
+                for asset_id in asset_ids
+            ),
+        )
+
+    def choices_of(self, puzzle_type: int, pool: List[int]):
+        layout = LAYOUTS[puzzle_type]
+        if layout is None:
+            lock_in = [self.rng.random() < 0.5 for _ in range(4)]
+            layout = lock_in + lock_in
+        else:
+            layout = layout[:]
+            self.rng.shuffle(layout)
+        return zip(self.rng.sample(pool, k=len(layout)), layout)
+
+    def games(self):
+        game_id, stage_id = next_id(Game), next_id(Stage)
+        games, stages, choices, scoreboards = [], [], [], []
+
+        for _ in range(self.sizes.games):
+            publisher_id = self.rng.choice(self.user_ids)
+            # NOTE: Games are built from their publishers assets, as create_game does.
+            pool = self.observed.get(publisher_id, [])
+            if len(pool) < 10:
+                pool = self.asset_ids
+
+            game_code = f"{self.rng.getrandbits(128):032X}"
+            name = f"SYNTHETIC-{game_code[:8]}"
+            stage_count = self.draw(self.sizes.stages, maximum=200)
+            # NOTE: max_stages is per puzzle type.
+            max_stages = -(-stage_count // 3)
+            games.append(
+                (game_id, game_code, publisher_id, "synthetic", True, name, max_stages, "done", 0)
+            )
+
+            for _ in range(stage_count):
+                puzzle_type = self.rng.randint(1, 3)
+                stages.append((stage_id, game_id, puzzle_type, "Synthetic question."))
+                choices.extend(
+                    (stage_id, asset_id, correct)
+                    for asset_id, correct in self.choices_of(puzzle_type, pool)
+                )
+                stage_id += 1
+
+            players = self.rng.sample(
+                self.user_ids, k=self.draw(self.sizes.players, maximum=len(self.user_ids))
+            )
+            scoreboards.extend(
+                (game_id, player_id, self.rng.randint(-300, 600)) for player_id in players
+            )
+            game_id += 1
+
+        fields = ["id", "game_code", "publisher_id", "task_id", "processed", "name"]
+        fields += ["max_stages", "phase", "attempts"]
+        self.writer.write(Game, fields, games)
+        self.writer.write(Stage, ["id", "game_id", "puzzle_type", "question"], stages)
+        self.writer.write(Choice, ["stage_id", "spotify_asset_id", "correct"], choices)
+        self.writer.write(ScoreBoard, ["game_id", "player_id", "score"], scoreboards)
+
+    def run(self):
+        self.users()
+        self.assets()
+        self.games()
+        self.writer.reset_sequences()
+
+
+def generate(sizes: Sizes, *, batch_size: int = 50000) -> Writer:
+    """Write a dataset of sizes, then rebuild the player counters and the leaderboard from it."""
+    writer = Writer(batch_size=batch_size)
+    Generator(sizes, writer).run()
+
+    started = time.perf_counter()
+    scoring.rebuild_player_counters()
+    leaderboard.rebuild()
+    writer.seconds["counters"] = time.perf_counter() - started
+    return writer
@@ -0,0 +1,173 @@
+import json
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Prefetch
+
+from analytics import journal
+from assets.models import SpotifyAsset
+from core import http
+from game_api import models as game_models
+from game_api import trivia
+from play_api import answer_key, models as play_models
+
+from . import environment, load, plans, results, scenarios, standins, startup, synthetic
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    answer_key.local_keys.clear()
+    yield
+    cache.clear()
+    answer_key.local_keys.clear()
+    journal.buffer.reset()
+
+
+def test_standins_answer_spotify_and_genius():
+    name = standins.artist_name(7)
+
+    with standins.installed():
+        question, answer = trivia.create_question(answer=name)
+
+        url = "https://api.spotify.com/v1/me/top/tracks?limit=50&time_range=short_term&offset=0"
+        headers = {"Authorization": "Bearer standin"}
+        tracks = http.session.get(url, headers=headers).json()["items"]
+        assert len(tracks) == 50
+        assert http.session.get(url, headers=headers).json()["items"] == tracks
+
+        assert http.session.get("https://api.genius.com/unknown").status_code == 404
+
+    assert answer == name
+    assert question and name.split()[0].lower() not in question.lower()
+    assert not isinstance(http.adapter, standins.StandInAdapter)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_benchmark_scenarios():
+    publisher, *players = scenarios.seed_players(5)
+
+    with environment.eager_tasks(), environment.local_leaderboard(), standins.installed():
+        ingest = scenarios.asset_ingest([publisher])
+        latencies, game_codes = scenarios.create_game(publisher, max_stages=[3], runs=1)
+
+        game = game_models.Game.objects.get(game_code=game_codes[0])
+        load_players = [load.Player.from_user(player) for player in players]
+        payload = scenarios.game_payload(game, load_players[:2])
+        rendering = scenarios.payload_rendering(game, iterations=2)
+        answers = scenarios.answer_throughput(game, load_players[2:], workers=1)
+
+        scenarios.seed_scoreboard(game, 25)
+        scoreboard = scenarios.scoreboard_reads(game, load_players[0], reads=2)
+
+    assert ingest["assets"] == SpotifyAsset.objects.count() > 0
+    assert latencies["3"]["count"] == 1
+    assert payload["cold_queries"] >= payload["warm_queries"]
+    assert rendering["stages"] == payload["stages"]
+    assert set(rendering["build_cpu_ms"]) == {"schemas", "rows"}
+    before, after = (
+        json.loads(build(game)) for build in (scenarios.schema_payload, scenarios.rows_payload)
+    )
+    assert before["game"] == after["game"]
+    assert len(before["stages"]) == len(after["stages"]) == rendering["stages"]
+    assert answers["statuses"] == {"200": answers["requests"]}
+    assert answers["routes"]["play"]["count"] == 2
+    assert scoreboard["entries"] == 29
+    assert scoreboard["last"]["count"] == 2
+
+
+def test_compare_results():
+    previous = {"scenarios": {"play": {"p50_ms": 10.0, "queries": 4}, "gone": 1}}
+    current = {"scenarios": {"play": {"p50_ms": 5.0, "queries": 4}, "new": {"count": 2}}}
+
+    compared = results.compare(previous, current)
+
+    assert compared == [
+        ("gone", 1, None),
+        ("new.count", None, 2),
+        ("play.p50_ms", 10.0, 5.0),
+        ("play.queries", 4, 4),
+    ]
+    assert [results.change(before, after) for _, before, after in compared] == [
+        "n/a",
+        "n/a",
+        "-50.0%",
+        "+0.0%",
+    ]
+    assert results.summarize([0.001, 0.002, 0.003, 0.004])["p50_ms"] == 2.0
+
+
+class RecordingWriter(synthetic.Writer):
+    def __init__(self):
+        super().__init__()
+        self.rows = {}
+
+    def flush(self, model, fields, batch):
+        self.rows.setdefault(model._meta.db_table, []).extend(batch)
+        return len(batch)
+
+
+def test_synthetic_datasets_are_deterministic(db):
+    sizes = synthetic.Sizes(users=30, assets=200, observed=10, games=5, stages=6, players=4)
+
+    first, second = RecordingWriter(), RecordingWriter()
+    synthetic.Generator(sizes, first).run()
+    synthetic.Generator(sizes, second).run()
+    assert first.rows == second.rows
+
+    writer = synthetic.generate(sizes)
+    assert writer.written == {table: len(rows) for table, rows in first.rows.items()}
+    assert play_models.ScoreBoard.objects.values("game", "player").distinct().count() == (
+        writer.written["play_api_scoreboard"]
+    )
+
+    choices = game_models.Choice.objects.order_by("id")
+    stages = game_models.Stage.objects.prefetch_related(Prefetch("choice_set", queryset=choices))
+    for stage in stages:
+        correct = [choice.correct for choice in stage.choice_set.all()]
+        if stage.puzzle_type == 3:
+            assert len(correct) == 8 and correct[:4] == correct[4:]
+        else:
+            assert correct.count(True) == 1
+
+    profile = play_models.PlayerProfile.objects.order_by("-points").first()
+    scores = play_models.ScoreBoard.objects.filter(player_id=profile.player_id)
+    assert profile.points == sum(scores.values_list("score", flat=True))
+
+
+def test_startup_imports_by_package():
+    importtime = "\n".join(
+        [
+            "import time: self [us] | cumulative | imported package",
+            "import time:      1500 |       1500 |     faker.config",
+            "import time:       500 |       2000 |   faker",
+            "import time:      2500 |       2500 | django",
+        ]
+    )
+
+    assert startup.imports_by_package(importtime, top=1) == {"django": 2.5}
+    assert startup.imports_by_package(importtime) == {"django": 2.5, "faker": 2.0}
+
+
+def test_hot_queries_use_indexes(db):
+    sizes = synthetic.Sizes(users=30, assets=300, observed=20, games=10, stages=6, players=5)
+    synthetic.generate(sizes)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+    game = game_models.Game.objects.first()
+    stage = game.stage_set.first()
+    player = play_models.ScoreBoard.objects.filter(game=game).first().player_id
+    queries = plans.queries(
+        publisher_id=game.publisher_id, player_id=player, game_id=game.id, stage_id=stage.id
+    )
+
+    explained = plans.explain_all(queries)
+    assert plans.full_scans(explained) == {}
+    assert plans.missing_indexes(explained) == {}
+    assert plans.full_scans({"scan": "SCAN game_api_game"}) == {"scan": {"game_api_game"}}
+    assert plans.full_scans({"scan": "SCAN TABLE game_api_game"}) == {"scan": {"game_api_game"}}
+    assert plans.missing_indexes({"stuck_games": "SCAN game_api_game"}) == {
+        "stuck_games": "game_unprocessed"
+    }
@@ -2,14 +2,17 @@ from ninja import NinjaAPI
 
 from auth_api.api import router as auth_router
 from auth_api.jwt import AuthBearer, InvalidToken
+from core.renderers import renderer
 from game_api.api import router as game_router
 from play_api.api import router as play_router
+from play_api.scoring import InvalidAnswer
 from profile_api.api import router as profile_router
 
 api = NinjaAPI(
     title="TopsifyleAPI",
     description="Backend API for the spotify based game Topsifyle",
     version="1.0.0",
+    renderer=renderer,
 )
 
 
@@ -19,6 +22,12 @@ def on_invalid_token(request, exc):
     return api.create_response(request, detail, status=401)
 
 
+@api.exception_handler(InvalidAnswer)
+def on_invalid_answer(request, exc):
+    detail = {"detail": str(exc)}
+    return api.create_response(request, detail, status=400)
+
+
 api.add_router("/auth", auth_router, tags=["Authentication"])
 api.add_router("/profile", profile_router, auth=AuthBearer(), tags=["Profile"])
 api.add_router("/game", game_router, tags=["Game"], auth=AuthBearer())
@@ -0,0 +1,49 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager, contextmanager
+from uuid import uuid4
+
+from django.core.cache import cache
+
+
+@contextmanager
+def cache_lock(key: str, *, timeout: int = 10, wait: float = 5.0, interval: float = 0.05):
+    """Lock shared by every process using the same cache backend.
+
+    Yields True once the lock is held, or False if it could not be acquired
+    within ``wait`` seconds. The lock expires after ``timeout`` seconds so a
+    crashed holder never blocks everyone else.
+    """
+    token = uuid4().hex
+    deadline = time.monotonic() + wait
+
+    acquired = cache.add(key, token, timeout)
+    while not acquired and time.monotonic() < deadline:
+        time.sleep(interval)
+        acquired = cache.add(key, token, timeout)
+
+    try:
+        yield acquired
+    finally:
+        if acquired and cache.get(key) == token:
+            cache.delete(key)
+
+
+@asynccontextmanager
+async def async_cache_lock(
+    key: str, *, timeout: int = 10, wait: float = 5.0, interval: float = 0.05
+):
+    """cache_lock for coroutines, waits on the event loop instead of blocking it."""
+    token = uuid4().hex
+    deadline = time.monotonic() + wait
+
+    acquired = await cache.aadd(key, token, timeout)
+    while not acquired and time.monotonic() < deadline:
+        await asyncio.sleep(interval)
+        acquired = await cache.aadd(key, token, timeout)
+
+    try:
+        yield acquired
+    finally:
+        if acquired and await cache.aget(key) == token:
+            await cache.adelete(key)
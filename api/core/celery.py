@@ -1,6 +1,7 @@
 import os
+import time
 
-from celery import Celery
+from celery import Celery, signals
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
@@ -14,3 +15,85 @@ app.autodiscover_tasks()
 @app.task(bind=True)
 def debug_task(self):
     print(f"Request: {self.request!r}")
+
+
+# NOTE: Queued and run times and a span of every task, see core.metrics and core.tracing.
+# The publish time travels in a message header so the queued time spans processes.
+
+
+@signals.before_task_publish.connect
+def stamp_published_at(headers=None, **kwargs):
+    from core import tracing
+
+    headers["published_at"] = time.time()
+    # NOTE: Adds traceparent so the task's span joins the trace that queued it.
+    tracing.inject(headers)
+
+
+@signals.task_prerun.connect
+def record_queued_time(task=None, **kwargs):
+    from core import metrics, tracing
+
+    carrier = {key: getattr(task.request, key, None) for key in ("traceparent", "tracestate")}
+    carrier = {key: value for key, value in carrier.items() if value}
+    task.request.trace = tracing.start_remote_span(
+        task.name, carrier, **{"celery.task_id": task.request.id}
+    )
+    task.request.started_at = time.perf_counter()
+    published_at = getattr(task.request, "published_at", None)
+    if published_at is not None:
+        queued = max(time.time() - published_at, 0)
+        metrics.TASK_PHASE.labels(task.name, "queued").observe(queued)
+
+
+@signals.task_postrun.connect
+def record_run_time(task=None, **kwargs):
+    from core import metrics, tracing
+
+    started_at = getattr(task.request, "started_at", None)
+    if started_at is not None:
+        metrics.TASK_PHASE.labels(task.name, "run").observe(time.perf_counter() - started_at)
+
+    trace = getattr(task.request, "trace", None)
+    if trace is not None:
+        tracing.end_remote_span(*trace)
+        task.request.trace = None
+
+
+def runs_tasks_in_process(pool_cls) -> bool:
+    """Whether the pool runs tasks in the worker process, without worker_process_init."""
+    from celery.concurrency import get_implementation, prefork, solo
+
+    return not issubclass(get_implementation(pool_cls), (prefork.TaskPool, solo.TaskPool))
+
+
+@signals.worker_process_init.connect
+def configure_tracing(**kwargs):
+    # NOTE: Per child, the span exporter's thread does not survive the fork.
+    from core import tracing
+
+    tracing.configure()
+
+
+@signals.worker_init.connect
+def configure_tracing_in_process(sender=None, **kwargs):
+    # NOTE: Thread and green pools fork no children, the worker itself runs the tasks.
+    from core import tracing
+
+    if runs_tasks_in_process(sender.pool_cls):
+        tracing.configure()
+
+
+@signals.worker_process_shutdown.connect
+def mark_process_dead(pid=None, **kwargs):
+    from core import metrics
+
+    metrics.mark_process_dead(pid or os.getpid())
+
+
+@signals.worker_shutdown.connect
+def mark_worker_dead(sender=None, **kwargs):
+    from core import metrics
+
+    if runs_tasks_in_process(sender.pool_cls):
+        metrics.mark_process_dead(os.getpid())
@@ -0,0 +1,102 @@
+"""Shared HTTP connection pools for calls to external APIs.
+
+Every ``requests`` session that mounts the shared adapter reuses the same
+keep-alive connections instead of opening a new TLS connection per session.
+Served through core.asgi, async views share one ``httpx.AsyncClient`` per event
+loop the same way. Under WSGI every async view runs on an event loop of its own,
+so there each async_client() is a new client closed after use. Calls through
+either are timed by host and endpoint and traced, see core.metrics and
+core.tracing.
+"""
+import asyncio
+import time
+import weakref
+from contextlib import asynccontextmanager
+
+import httpx
+from django.conf import settings
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+from . import metrics, tracing
+
+
+def external_span(method: str, url: str):
+    host, endpoint = metrics.endpoint_of(url)
+    return tracing.span(f"{method} {host}{endpoint}", **{"http.method": method, "http.url": url})
+
+
+class InstrumentedHTTPAdapter(HTTPAdapter):
+    def send(self, request, *args, **kwargs):
+        started = time.perf_counter()
+        status = "error"
+        with external_span(request.method, request.url) as current:
+            try:
+                response = super().send(request, *args, **kwargs)
+                status = response.status_code
+                return response
+            finally:
+                current.set_attribute("http.status_code", status)
+                metrics.observe_external(request.url, status, time.perf_counter() - started)
+
+
+class InstrumentedAsyncTransport(httpx.AsyncHTTPTransport):
+    async def handle_async_request(self, request):
+        started = time.perf_counter()
+        status = "error"
+        with external_span(request.method, str(request.url)) as current:
+            try:
+                response = await super().handle_async_request(request)
+                status = response.status_code
+                return response
+            finally:
+                current.set_attribute("http.status_code", status)
+                metrics.observe_external(str(request.url), status, time.perf_counter() - started)
+
+
+adapter = InstrumentedHTTPAdapter(
+    pool_connections=settings.HTTP_POOL_CONNECTIONS,
+    pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+)
+
+
+def mount_shared_adapter(session: Session) -> Session:
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+session = mount_shared_adapter(Session())
+
+async_clients = weakref.WeakKeyDictionary()
+# NOTE: Turned on by core.asgi, whose event loop lives as long as the process.
+share_async_clients = False
+
+
+def create_async_client(**kwargs) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_ASYNC_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_POOL_MAXSIZE,
+    )
+    transport = InstrumentedAsyncTransport(limits=limits)
+    return httpx.AsyncClient(transport=transport, timeout=settings.HTTP_ASYNC_TIMEOUT, **kwargs)
+
+
+def get_async_client() -> httpx.AsyncClient:
+    # NOTE: httpx connections belong to the loop that opened them, an ASGI
+    # worker runs a single loop so in practice this is one client per process.
+    loop = asyncio.get_running_loop()
+    client = async_clients.get(loop)
+    if client is None:
+        client = async_clients[loop] = create_async_client()
+    return client
+
+
+@asynccontextmanager
+async def async_client():
+    if share_async_clients:
+        yield get_async_client()
+        return
+
+    async with create_async_client() as client:
+        yield client
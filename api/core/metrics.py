@@ -0,0 +1,115 @@
+"""Prometheus metrics of the API, the celery workers and their calls to external APIs.
+
+Every process keeps its own values. When PROMETHEUS_MULTIPROC_DIR is set, the
+client library writes them to memory mapped files in that directory instead and
+the /metrics view adds up the files of every process, which is what multi
+process web servers and celery's prefork pool need. The directory has to be
+emptied whenever the whole service restarts.
+"""
+import os
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from . import tracing
+
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time spent answering a request, by route.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database queries made by a request, by route.",
+    ["method", "route"],
+    buckets=QUERY_BUCKETS,
+)
+EXTERNAL_LATENCY = Histogram(
+    "external_request_duration_seconds",
+    "Time spent on calls to external APIs, by host and endpoint.",
+    ["host", "endpoint", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+TASK_PHASE = Histogram(
+    "celery_task_phase_duration_seconds",
+    "Time celery tasks spend queued, running and in named phases of their work.",
+    ["task", "phase"],
+    buckets=TASK_BUCKETS,
+)
+CACHE_EVENTS = Counter(
+    "cache_events_total",
+    "Hits, misses and refreshes of the application caches.",
+    ["cache", "event"],
+)
+GAME_ADMISSIONS = Counter(
+    "game_admissions_total",
+    "Game creations started, put in the waiting room or turned away.",
+    ["outcome"],
+)
+REAPED_GAMES = Counter(
+    "game_creations_reaped_total",
+    "Stuck game creations retried or deleted by the reaper, by the phase they were stuck in.",
+    ["phase", "outcome"],
+)
+
+# NOTE: Path segments following these are ids, they are folded into one label value.
+ID_COLLECTIONS = {"albums", "artists", "playlists", "songs", "tracks", "users"}
+
+
+def endpoint_of(url: str):
+    """Host and templated path of an external call, /v1/users/run2dos is /v1/users/:id."""
+    parts = urlsplit(url)
+    segments = parts.path.strip("/").split("/")
+    endpoint = [
+        ":id" if index and segments[index - 1] in ID_COLLECTIONS else segment
+        for index, segment in enumerate(segments)
+    ]
+    return parts.hostname or "", "/" + "/".join(endpoint)
+
+
+def observe_external(url: str, status, seconds: float):
+    host, endpoint = endpoint_of(url)
+    EXTERNAL_LATENCY.labels(host, endpoint, str(status)).observe(seconds)
+
+
+@contextmanager
+def task_phase(task: str, phase: str):
+    """Time and trace a named phase of a celery task."""
+    started = time.perf_counter()
+    try:
+        with tracing.span(f"{task} {phase}"):
+            yield
+    finally:
+        TASK_PHASE.labels(task, phase).observe(time.perf_counter() - started)
+
+
+def render():
+    """Text exposition of every metric and its content type."""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int):
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
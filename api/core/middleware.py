@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+from django.db import connection
+
+from . import metrics, tracing
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def route_of(request) -> str:
+    # NOTE: The url pattern, not the path, keeps the number of label values bounded.
+    match = getattr(request, "resolver_match", None)
+    return match.route if match is not None else "unmatched"
+
+
+class MetricsMiddleware:
+    """Latency of every request and the database queries it made, labelled by route.
+
+    Queries are only counted for sync views, async views run theirs on other threads.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        queries = QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        seconds = time.perf_counter() - started
+
+        route = route_of(request)
+        metrics.REQUEST_LATENCY.labels(request.method, route, str(response.status_code)).observe(
+            seconds
+        )
+        metrics.REQUEST_QUERIES.labels(request.method, route).observe(queries.count)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        seconds = time.perf_counter() - started
+
+        route = route_of(request)
+        metrics.REQUEST_LATENCY.labels(request.method, route, str(response.status_code)).observe(
+            seconds
+        )
+        return response
+
+
+class TracingMiddleware:
+    """Root span of every request, continuing the caller's trace when it sent one."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        current, token = tracing.start_remote_span(request.method, request.headers)
+        try:
+            response = self.get_response(request)
+            self.finish(current, request, response)
+            return response
+        finally:
+            tracing.end_remote_span(current, token)
+
+    async def __acall__(self, request):
+        current, token = tracing.start_remote_span(request.method, request.headers)
+        try:
+            response = await self.get_response(request)
+            self.finish(current, request, response)
+            return response
+        finally:
+            tracing.end_remote_span(current, token)
+
+    def finish(self, current, request, response):
+        route = route_of(request)
+        current.update_name(f"{request.method} {route}")
+        current.set_attribute("http.method", request.method)
+        current.set_attribute("http.route", route)
+        current.set_attribute("http.status_code", response.status_code)
@@ -0,0 +1,30 @@
+"""orjson rendering for every API response.
+
+Views on hot paths that already hold plain dicts return ``render(data)`` to skip
+the response schema entirely, their payloads are checked against the schemas in
+the tests instead.
+"""
+import orjson
+from django.http import HttpResponse
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+
+encoder = NinjaJSONEncoder()
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = "application/json"
+
+    def render(self, request, data, *, response_status):
+        # NOTE: orjson handles dicts, lists, datetimes and UUIDs itself, anything
+        # else (pydantic models, Decimal, lazy strings) falls back to ninja's encoder.
+        return orjson.dumps(data, default=encoder.default, option=orjson.OPT_NON_STR_KEYS)
+
+
+renderer = ORJSONRenderer()
+
+
+def render(data, *, status: int = 200) -> HttpResponse:
+    content = renderer.render(None, data, response_status=status)
+    content_type = f"{renderer.media_type}; charset={renderer.charset}"
+    return HttpResponse(content, status=status, content_type=content_type)
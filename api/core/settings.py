@@ -48,9 +48,20 @@ INSTALLED_APPS = [
     "game_api.apps.GameApiConfig",
     "assets.apps.AssetsConfig",
     "play_api.apps.PlayApiConfig",
+    "analytics.apps.AnalyticsConfig",
+    "benchmarks.apps.BenchmarksConfig",
 ]
 
+# NOTE: The channels app only swaps runserver for one that serves websockets too, and
+# importing it loads daphne and twisted. Only development servers turn it on, web and
+# celery workers start without it, core.asgi serves websockets either way.
+CHANNELS_RUNSERVER = env.bool("CHANNELS_RUNSERVER", default=False)
+if CHANNELS_RUNSERVER:
+    INSTALLED_APPS.insert(INSTALLED_APPS.index("corsheaders") + 1, "channels")
+
 MIDDLEWARE = [
+    "core.middleware.TracingMiddleware",
+    "core.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -80,6 +91,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "core.wsgi.application"
+ASGI_APPLICATION = "core.asgi.application"
 
 
 # Database
@@ -97,6 +109,26 @@ DATABASES = {
 }
 # TODO: change to postgres
 
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+# NOTE: Without a redis url each process keeps its own local memory cache.
+
+REDIS_CACHE_URL = env("REDIS_CACHE_URL", default=None)
+
+if REDIS_CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -147,6 +179,48 @@ ORIGINS = ["http://134.122.30.228"]
 CORS_ALLOWED_ORIGINS = ORIGINS
 CSRF_TRUSTED_ORIGINS = ORIGINS
 
+# Channels
+# https://channels.readthedocs.io/en/stable/topics/channel_layers.html
+# NOTE: The in memory layer only reaches sockets held by the same process.
+
+CHANNEL_LAYER_REDIS_URL = env("CHANNEL_LAYER_REDIS_URL", default=REDIS_CACHE_URL)
+
+if CHANNEL_LAYER_REDIS_URL:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {"hosts": [CHANNEL_LAYER_REDIS_URL]},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+# requests
+# https://docs.python-requests.org/en/latest/api/#requests.adapters.HTTPAdapter
+
+HTTP_POOL_CONNECTIONS = env.int("HTTP_POOL_CONNECTIONS", default=10)
+HTTP_POOL_MAXSIZE = env.int("HTTP_POOL_MAXSIZE", default=20)
+
+# httpx, used by async views
+# https://www.python-httpx.org/advanced/#pool-limit-configuration
+
+HTTP_ASYNC_MAX_CONNECTIONS = env.int("HTTP_ASYNC_MAX_CONNECTIONS", default=200)
+HTTP_ASYNC_TIMEOUT = env.float("HTTP_ASYNC_TIMEOUT", default=10.0)
+
+# Prometheus
+# https://github.com/prometheus/client_python#multiprocess-mode-eg-gunicorn
+# NOTE: Set PROMETHEUS_MULTIPROC_DIR in the environment, not here, to share metrics
+# between the processes of a worker. /metrics requires METRICS_TOKEN when it is set.
+
+METRICS_TOKEN = env("METRICS_TOKEN", default=None)
+
+# OpenTelemetry
+# https://opentelemetry-python.readthedocs.io/en/stable/sdk/trace.export.html
+# "console" prints finished spans, "file" appends them to TRACING_FILE as JSON lines.
+
+TRACING_EXPORTER = env("TRACING_EXPORTER", default=None)
+TRACING_FILE = env("TRACING_FILE", default=str(BASE_DIR / "traces.jsonl"))
+
 # python-jose
 # https://github.com/mpdavis/python-jose
 
@@ -158,6 +232,46 @@ JWT_ALGORITHM = env("JWT_ALGORITHM")
 SPOTIFY_CLIENT = env("SPOTIFY_CLIENT")
 SPOTIFY_SECRET = env("SPOTIFY_SECRET")
 SPOTIFY_REDIRECT = env("SPOTIFY_REDIRECT")
+# Seconds before expires_at that a users token is considered stale and refreshed.
+SPOTIFY_TOKEN_REFRESH_MARGIN = env.int("SPOTIFY_TOKEN_REFRESH_MARGIN", default=300)
+SPOTIFY_TOKEN_REFRESH_INTERVAL = env.int("SPOTIFY_TOKEN_REFRESH_INTERVAL", default=60)
+# Seconds since their last login that a users token is still refreshed ahead of time, the
+# lifetime of a JWT. Other tokens are refreshed when they are next used.
+SPOTIFY_TOKEN_REFRESH_ACTIVE = env.int("SPOTIFY_TOKEN_REFRESH_ACTIVE", default=60 * 60 * 2)
+
+# Public profile cache, in seconds.
+PROFILE_CACHE_TTL = env.int("PROFILE_CACHE_TTL", default=300)
+PROFILE_CACHE_STALE_TTL = env.int("PROFILE_CACHE_STALE_TTL", default=3600)
+PROFILE_CACHE_NOT_FOUND_TTL = env.int("PROFILE_CACHE_NOT_FOUND_TTL", default=60)
+
+# Assembled payloads of finished games, in seconds.
+PLAY_GAME_PAYLOAD_TTL = env.int("PLAY_GAME_PAYLOAD_TTL", default=60 * 60 * 24)
+# Answer keys of finished games kept in each worker, optionally shared through the cache.
+PLAY_ANSWER_KEY_CACHE_SIZE = env.int("PLAY_ANSWER_KEY_CACHE_SIZE", default=512)
+PLAY_ANSWER_KEY_SHARED = env.bool("PLAY_ANSWER_KEY_SHARED", default=False)
+# All time leaderboard, a redis sorted set or a per process stand-in without a url.
+LEADERBOARD_REDIS_URL = env("LEADERBOARD_REDIS_URL", default=REDIS_CACHE_URL)
+
+# Answer event journal, flushed per worker in batches then rolled up into aggregates.
+ANALYTICS_EVENT_BATCH_SIZE = env.int("ANALYTICS_EVENT_BATCH_SIZE", default=500)
+ANALYTICS_EVENT_FLUSH_INTERVAL = env.float("ANALYTICS_EVENT_FLUSH_INTERVAL", default=5.0)
+ANALYTICS_ROLLUP_INTERVAL = env.int("ANALYTICS_ROLLUP_INTERVAL", default=60)
+ANALYTICS_ROLLUP_LAG = env.int("ANALYTICS_ROLLUP_LAG", default=30)
+ANALYTICS_PARTITION_DAYS_AHEAD = env.int("ANALYTICS_PARTITION_DAYS_AHEAD", default=7)
+
+# Game creation admission, see game_api.admission. Slots expire after the timeout and the
+# estimate is the creation time, in seconds, assumed until one has been measured.
+GAME_CREATION_BUDGET = env.int("GAME_CREATION_BUDGET", default=8)
+GAME_CREATION_USER_SLOTS = env.int("GAME_CREATION_USER_SLOTS", default=1)
+GAME_CREATION_MAX_WAITING = env.int("GAME_CREATION_MAX_WAITING", default=100)
+GAME_CREATION_TIMEOUT = env.int("GAME_CREATION_TIMEOUT", default=60 * 10)
+GAME_CREATION_ESTIMATE = env.int("GAME_CREATION_ESTIMATE", default=30)
+GAME_CREATION_DISPATCH_INTERVAL = env.int("GAME_CREATION_DISPATCH_INTERVAL", default=30)
+# Creations whose heartbeat is older than the timeout are retried, then deleted, see game_api.reaper.
+# Heartbeats are recorded between phases, the timeout must exceed the slowest phase.
+GAME_HEARTBEAT_TIMEOUT = env.int("GAME_HEARTBEAT_TIMEOUT", default=60 * 5)
+GAME_CREATION_RETRIES = env.int("GAME_CREATION_RETRIES", default=2)
+GAME_REAPER_INTERVAL = env.int("GAME_REAPER_INTERVAL", default=60)
 
 # Celery Task
 # https://docs.celeryproject.org/en/stable/django/first-steps-with-django.html
@@ -165,6 +279,66 @@ SPOTIFY_REDIRECT = env("SPOTIFY_REDIRECT")
 CELERY_BROKER_URL = env("CELERY_BROKER_URL")
 CELERY_RESULT_BACKEND = env("CELERY_RESULT_BACKEND")
 
+# Tasks are queued by what they wait on. "games" and "sync" tasks spend their time on
+# Genius and Spotify calls and run on the threaded io workers, "db" tasks on the prefork
+# db workers. Unrouted tasks land on "default", consumed by the db workers.
+CELERY_TASK_DEFAULT_QUEUE = "default"
+# NOTE: On redis, 0 is the highest priority. Messages are taken by priority first across
+# every queue a worker consumes, so game creation overtakes queued background resyncs.
+CELERY_TASK_DEFAULT_PRIORITY = 6
+CELERY_TASK_ROUTES = {
+    "game_api.tasks.create_game": {"queue": "games", "priority": 0},
+    "game_api.tasks.dispatch_waiting_games": {"queue": "games", "priority": 0},
+    "assets.tasks.get_users_top_data": {"queue": "sync", "priority": 3},
+    "profile_api.tasks.refresh_public_profile": {"queue": "sync", "priority": 6},
+    "auth_api.tasks.refresh_spotify_token": {"queue": "sync", "priority": 9},
+    "auth_api.tasks.refresh_expiring_spotify_tokens": {"queue": "db"},
+    "game_api.tasks.reap_stuck_games": {"queue": "db"},
+    "analytics.tasks.*": {"queue": "db"},
+}
+CELERY_BROKER_TRANSPORT_OPTIONS = {"priority_steps": [0, 3, 6, 9]}
+
+# Started with `python -m core.workers <profile>`. Threads suit tasks that wait on the
+# network, a long game no longer holds one of a few processes. Prefetching one task per
+# thread keeps a queued game from waiting behind a busy thread.
+WORKER_PROFILES = {
+    "io": {
+        "queues": ["games", "sync"],
+        "pool": "threads",
+        "concurrency": env.int("CELERY_IO_CONCURRENCY", default=32),
+        "prefetch_multiplier": env.int("CELERY_IO_PREFETCH_MULTIPLIER", default=1),
+    },
+    "db": {
+        "queues": ["db", "default"],
+        "pool": "prefork",
+        "concurrency": env.int("CELERY_DB_CONCURRENCY", default=4),
+        "prefetch_multiplier": env.int("CELERY_DB_PREFETCH_MULTIPLIER", default=4),
+    },
+}
+
+CELERY_BEAT_SCHEDULE = {
+    "refresh-expiring-spotify-tokens": {
+        "task": "auth_api.tasks.refresh_expiring_spotify_tokens",
+        "schedule": SPOTIFY_TOKEN_REFRESH_INTERVAL,
+    },
+    "rollup-answer-events": {
+        "task": "analytics.tasks.rollup_answer_events",
+        "schedule": ANALYTICS_ROLLUP_INTERVAL,
+    },
+    "create-answer-event-partitions": {
+        "task": "analytics.tasks.create_answer_event_partitions",
+        "schedule": 60 * 60 * 6,
+    },
+    "dispatch-waiting-games": {
+        "task": "game_api.tasks.dispatch_waiting_games",
+        "schedule": GAME_CREATION_DISPATCH_INTERVAL,
+    },
+    "reap-stuck-games": {
+        "task": "game_api.tasks.reap_stuck_games",
+        "schedule": GAME_REAPER_INTERVAL,
+    },
+}
+
 # Genius
 # https://docs.genius.com/
 GENIUS_CLIENT_TOKEN = env("GENIUS_CLIENT_TOKEN")
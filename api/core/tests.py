@@ -0,0 +1,109 @@
+from types import SimpleNamespace
+
+import pytest
+from django.conf import settings
+from django.urls import reverse
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from . import celery, metrics, tracing, workers
+
+
+def test_external_endpoints_are_templated():
+    url = "https://api.spotify.com/v1/artists/0OdUWJ0sBjDrqHygGUXeCF/top-tracks?market=US"
+    assert metrics.endpoint_of(url) == ("api.spotify.com", "/v1/artists/:id/top-tracks")
+    assert metrics.endpoint_of("https://api.spotify.com/v1/me/top/artists") == (
+        "api.spotify.com",
+        "/v1/me/top/artists",
+    )
+    assert metrics.endpoint_of("https://api.genius.com/search?q=abba") == (
+        "api.genius.com",
+        "/search",
+    )
+
+
+def test_metrics_endpoint_reports_routes(db, client, settings):
+    settings.METRICS_TOKEN = "scrape"
+    client.get(reverse("api-1.0.0:auth"))
+    metrics.observe_external("https://api.genius.com/songs/378195", 200, 0.2)
+
+    assert client.get(reverse("metrics")).status_code == 401
+
+    response = client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape")
+    content = response.content.decode()
+    assert response.status_code == 200
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="api/auth",status="200"}' in content
+    )
+    assert 'http_request_db_queries_count{method="GET",route="api/auth"}' in content
+    assert 'endpoint="/songs/:id",host="api.genius.com"' in content
+
+
+@pytest.fixture(scope="session")
+def spans():
+    # NOTE: Session scoped, a process can only install one tracer provider.
+    exporter = InMemorySpanExporter()
+    provider = tracing.configure(exporter)
+
+    def finished():
+        provider.force_flush()
+        return {span.name: span for span in exporter.get_finished_spans()}
+
+    return finished
+
+
+def test_requests_continue_the_callers_trace(db, client, spans):
+    trace_id = "0af7651916cd43dd8448eb211c80319c"
+    traceparent = f"00-{trace_id}-b7ad6b7169203331-01"
+    client.get(reverse("api-1.0.0:auth"), HTTP_TRACEPARENT=traceparent)
+
+    request_span = spans()["GET api/auth"]
+    assert format(request_span.context.trace_id, "032x") == trace_id
+    assert request_span.attributes["http.status_code"] == 200
+
+
+def test_tasks_join_the_trace_that_queued_them(spans):
+    headers = {}
+    with tracing.span("queue") as queue_span:
+        celery.stamp_published_at(headers=headers)
+
+    request = SimpleNamespace(id="task-id", **headers)
+    task = SimpleNamespace(name="game_api.tasks.create_game", request=request)
+    celery.record_queued_time(task=task)
+    with metrics.task_phase(task.name, "save"):
+        pass
+    celery.record_run_time(task=task)
+
+    finished = spans()
+    task_span = finished["game_api.tasks.create_game"]
+    assert task_span.context.trace_id == queue_span.get_span_context().trace_id
+    assert task_span.parent.span_id == queue_span.get_span_context().span_id
+    assert finished["game_api.tasks.create_game save"].parent.span_id == task_span.context.span_id
+
+
+def test_tasks_are_routed_by_what_they_wait_on():
+    def route(name):
+        options = celery.app.amqp.router.route({}, name)
+        return options["queue"].name, options.get("priority")
+
+    assert route("game_api.tasks.create_game") == ("games", 0)
+    assert route("assets.tasks.get_users_top_data") == ("sync", 3)
+    assert route("auth_api.tasks.refresh_spotify_token") == ("sync", 9)
+    assert route("analytics.tasks.rollup_answer_events")[0] == "db"
+    assert route("core.celery.debug_task")[0] == "default"
+
+    consumed = {
+        queue for profile in settings.WORKER_PROFILES.values() for queue in profile["queues"]
+    }
+    assert consumed == {"games", "sync", "db", "default"}
+
+
+def test_worker_profiles(monkeypatch):
+    argv = workers.worker_argv("io")
+    assert "--pool=threads" in argv and "--queues=games,sync" in argv
+
+    configured = []
+    monkeypatch.setattr(tracing, "configure", lambda: configured.append(True))
+    celery.configure_tracing_in_process(sender=SimpleNamespace(pool_cls="prefork"))
+    assert configured == []
+    celery.configure_tracing_in_process(sender=SimpleNamespace(pool_cls="threads"))
+    assert configured == [True]
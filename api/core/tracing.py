@@ -0,0 +1,111 @@
+"""Traces linking a request to the celery tasks it queues and their external calls.
+
+Spans are opened by TracingMiddleware for every request, by the celery signals
+in core.celery for every task, by core.http for every external call and by
+``traced`` around slow functions. The trace context travels to celery workers
+in W3C traceparent message headers.
+
+TRACING_EXPORTER picks where finished spans go: "console" prints them, "file"
+appends one JSON object per span to TRACING_FILE, anything else turns tracing
+off and every span becomes a no-op.
+"""
+import functools
+import json
+import threading
+
+from django.conf import settings
+from opentelemetry import context, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+
+SERVICE_NAME = "spotifyle-api"
+
+# NOTE: Only traceparent is carried. opentelemetry.propagate would build the same
+# propagator from entry points, scanning every installed package at import.
+propagator = TraceContextTextMapPropagator()
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends finished spans to a file as JSON lines."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def export(self, spans):
+        lines = [json.dumps(json.loads(span.to_json())) + "\n" for span in spans]
+        with self.lock, open(self.path, "a") as file:
+            file.writelines(lines)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+def create_exporter(name: str):
+    if name == "console":
+        return ConsoleSpanExporter()
+    if name == "file":
+        return FileSpanExporter(settings.TRACING_FILE)
+    return None
+
+
+def configure(exporter=None):
+    """Install the tracer provider, once per process."""
+    exporter = exporter or create_exporter(settings.TRACING_EXPORTER)
+    if exporter is None:
+        return None
+
+    provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    return provider
+
+
+def get_tracer():
+    return trace.get_tracer("spotifyle")
+
+
+def span(name: str, **attributes):
+    return get_tracer().start_as_current_span(name, attributes=attributes)
+
+
+def traced(name: str):
+    """Run the decorated function inside a span called name."""
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def inject(carrier: dict):
+    propagator.inject(carrier)
+
+
+def start_remote_span(name: str, carrier, **attributes):
+    """Start a span continuing the trace found in carrier and make it current.
+
+    Returns the span and the token to hand to end_remote_span.
+    """
+    parent = propagator.extract(carrier)
+    current = get_tracer().start_span(name, context=parent, attributes=attributes)
+    token = context.attach(trace.set_span_in_context(current, parent))
+    return current, token
+
+
+def end_remote_span(current, token):
+    context.detach(token)
+    current.end()
@@ -17,5 +17,10 @@ from django.contrib import admin
 from django.urls import path
 
 from .api import api
+from .views import metrics_view
 
-urlpatterns = [path("admin/", admin.site.urls), path("api/", api.urls)]
+urlpatterns = [
+    path("admin/", admin.site.urls),
+    path("api/", api.urls),
+    path("metrics", metrics_view, name="metrics"),
+]
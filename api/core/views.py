@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.http import HttpResponse
+
+from . import metrics
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint, behind a bearer token when METRICS_TOKEN is set."""
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponse(status=401)
+
+    content, content_type = metrics.render()
+    return HttpResponse(content, content_type=content_type)
@@ -0,0 +1,227 @@
+"""Word tables for generated names.
+
+Picked once from Faker's color, job and faker_music's subgenre lists so
+generating a name is a random.choice instead of building a Faker, see
+game_api.stages.generate_game_name and profile_api.schemas.Profile.
+"""
+
+COLORS = (
+    "AliceBlue",
+    "AntiqueWhite",
+    "Aqua",
+    "Aquamarine",
+    "Black",
+    "Blue",
+    "CadetBlue",
+    "Chartreuse",
+    "Coral",
+    "Crimson",
+    "Cyan",
+    "DarkGray",
+    "DarkKhaki",
+    "DarkOrchid",
+    "DarkRed",
+    "DarkSalmon",
+    "DarkSeaGreen",
+    "DeepSkyBlue",
+    "DodgerBlue",
+    "ForestGreen",
+    "GhostWhite",
+    "Green",
+    "HoneyDew",
+    "HotPink",
+    "IndianRed",
+    "Indigo",
+    "LawnGreen",
+    "LemonChiffon",
+    "LightBlue",
+    "LightCoral",
+    "LightCyan",
+    "LightGray",
+    "LightPink",
+    "LightSalmon",
+    "LightSkyBlue",
+    "LightYellow",
+    "Magenta",
+    "MediumBlue",
+    "MediumOrchid",
+    "MidnightBlue",
+    "Moccasin",
+    "NavajoWhite",
+    "Navy",
+    "Orchid",
+    "PapayaWhip",
+    "PeachPuff",
+    "Peru",
+    "Pink",
+    "Plum",
+    "Purple",
+    "Red",
+    "SandyBrown",
+    "SeaGreen",
+    "Sienna",
+    "SkyBlue",
+    "SlateGray",
+    "Snow",
+    "SpringGreen",
+    "Tan",
+    "Thistle",
+    "Wheat",
+    "White",
+    "WhiteSmoke",
+    "Yellow",
+)
+
+SUBGENRES = (
+    "Afro Punk",
+    "Arab Pop",
+    "Argentine tango",
+    "Avant-Garde",
+    "Bossa Nova",
+    "Bubblegum Pop",
+    "Classic Country",
+    "Close Harmony",
+    "Country Gospel",
+    "Country-Rap",
+    "Dancehall",
+    "Dansband",
+    "Deep House",
+    "Electro",
+    "Ethio-jazz",
+    "Goth",
+    "Gregorian Chant",
+    "Grind Core",
+    "Hard Rock",
+    "Harmonica Blues",
+    "Hi-Nrg",
+    "Hokum Blues",
+    "Indie Rock",
+    "Jazz-Funk",
+    "Klezmer",
+    "Liquid Dub",
+    "Lovers Rock",
+    "Lubbock Sound",
+    "Lyrical Hip Hop",
+    "Mainstream Jazz",
+    "Mathcore",
+    "Midwest Hip Hop",
+    "Modern Classical",
+    "Noise",
+    "Noise Rock",
+    "Northern Soul",
+    "Power Pop",
+    "Psychobilly",
+    "Punk",
+    "Punta",
+    "Qawwali",
+    "Rockabilly",
+    "Schlager",
+    "Sophisti-Pop",
+    "Soul Blues",
+    "Sung Poetry",
+    "Surf Pop",
+    "Swamp Blues",
+    "Teen Pop",
+    "Trip-hop",
+    "Urban Blues",
+    "Vaudeville",
+    "Viking Metal",
+    "Vocal Jazz",
+    "West Coast Rap",
+)
+
+OCCUPATIONS = (
+    "Academic Librarian",
+    "Accounting Technician",
+    "Adult Guidance Worker",
+    "Adult Nurse",
+    "Advertising Account Planner",
+    "Advertising Art Director",
+    "Advice Worker",
+    "Agricultural Consultant",
+    "Aid Worker",
+    "Air Cabin Crew",
+    "Arboriculturist",
+    "Artist",
+    "Arts Administrator",
+    "Banker",
+    "Biomedical Engineer",
+    "Building Services Engineer",
+    "Building Surveyor",
+    "Call Centre Manager",
+    "Charity Officer",
+    "Chief Operating Officer",
+    "Clinical Psychologist",
+    "Clinical Research Associate",
+    "Communications Engineer",
+    "Community Development Worker",
+    "Community Pharmacist",
+    "Comptroller",
+    "Counselling Psychologist",
+    "Curator",
+    "Dentist",
+    "Dietitian",
+    "Electrical Engineer",
+    "Energy Engineer",
+    "Energy Manager",
+    "Environmental Consultant",
+    "Event Organiser",
+    "Exhibition Designer",
+    "Fast Food Restaurant Manager",
+    "Financial Manager",
+    "Financial Risk Analyst",
+    "Forensic Scientist",
+    "Gaffer",
+    "Geoscientist",
+    "Health Promotion Specialist",
+    "Health Service Manager",
+    "Health Visitor",
+    "Herpetologist",
+    "Holiday Representative",
+    "Hospital Doctor",
+    "Industrial Buyer",
+    "Information Officer",
+    "Insurance Underwriter",
+    "IT Consultant",
+    "Jewellery Designer",
+    "Learning Disability Nurse",
+    "Legal Secretary",
+    "Licensed Conveyancer",
+    "Marine Scientist",
+    "Market Researcher",
+    "Materials Engineer",
+    "Mechanical Engineer",
+    "Medical Technical Officer",
+    "Meteorologist",
+    "Midwife",
+    "Museum Education Officer",
+    "Nature Conservation Officer",
+    "Neurosurgeon",
+    "Newspaper Journalist",
+    "Nutritional Therapist",
+    "Occupational Psychologist",
+    "Operational Researcher",
+    "Osteopath",
+    "Paediatric Nurse",
+    "Patent Examiner",
+    "Pathologist",
+    "Pension Scheme Manager",
+    "Pensions Consultant",
+    "Pharmacologist",
+    "Phytotherapist",
+    "Press Sub",
+    "Prison Officer",
+    "Proofreader",
+    "Public Affairs Consultant",
+    "Public Librarian",
+    "Quantity Surveyor",
+    "Recruitment Consultant",
+    "Science Writer",
+    "Social Worker",
+    "Solicitor",
+    "Tax Inspector",
+    "Therapeutic Radiographer",
+    "Trade Union Research Officer",
+    "Waste Management Officer",
+    "Wellsite Geologist",
+)
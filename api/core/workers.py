@@ -0,0 +1,38 @@
+"""Start a celery worker from one of the WORKER_PROFILES in settings.
+
+    python -m core.workers io
+    python -m core.workers db --loglevel INFO
+
+Extra arguments are passed on to ``celery worker`` and win over the profile.
+"""
+import sys
+from typing import List
+
+from django.conf import settings
+
+from .celery import app
+
+
+def worker_argv(profile: str) -> List[str]:
+    options = settings.WORKER_PROFILES[profile]
+    return [
+        "worker",
+        f"--hostname={profile}@%h",
+        f"--queues={','.join(options['queues'])}",
+        f"--pool={options['pool']}",
+        f"--concurrency={options['concurrency']}",
+        f"--prefetch-multiplier={options['prefetch_multiplier']}",
+    ]
+
+
+def main(argv: List[str]):
+    if not argv or argv[0] not in settings.WORKER_PROFILES:
+        profiles = ", ".join(settings.WORKER_PROFILES)
+        sys.exit(f"usage: python -m core.workers {{{profiles}}} [celery worker options]")
+
+    profile, *extra = argv
+    app.worker_main(worker_argv(profile) + ["--events", *extra])
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,230 @@
+"""Admission control for game creation.
+
+Each user has at most GAME_CREATION_USER_SLOTS creations in flight, waiting or
+running, and at most GAME_CREATION_BUDGET creations run at once across all
+users. Creations that find the budget used up wait in the waiting room, which
+keeps one line per user and serves the lines round robin, so a user with many
+waiting games doesn't hold up everyone else. Once GAME_CREATION_MAX_WAITING
+creations wait, new ones are turned away with an estimate of the wait.
+
+Slots are cache keys taken with cache.add, which is atomic, so they hold across
+the web and worker processes sharing the cache. They expire after
+GAME_CREATION_TIMEOUT seconds in case a worker dies before releasing its slots,
+and the dispatch_waiting_games task starts waiting creations on the slots freed
+that way. Each dispatch extends the user slots of the creations still waiting.
+"""
+import math
+import time
+from typing import Optional, Sequence
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core import metrics
+from core.cache import cache_lock
+
+BUDGET = settings.GAME_CREATION_BUDGET
+USER_SLOTS = settings.GAME_CREATION_USER_SLOTS
+MAX_WAITING = settings.GAME_CREATION_MAX_WAITING
+TIMEOUT = settings.GAME_CREATION_TIMEOUT
+ESTIMATE = settings.GAME_CREATION_ESTIMATE
+
+USER_SLOT_KEY = "game:creation:user:{user_id}:{slot}"
+RUNNING_SLOT_KEY = "game:creation:running:{slot}"
+TICKET_KEY = "game:creation:ticket:{ticket}"
+WAITING_KEY = "game:creation:waiting"
+DURATION_KEY = "game:creation:duration"
+LOCK_KEY = "game:creation:lock"
+
+
+class Rejected(Exception):
+    def __init__(self, message: str, *, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def user_slot_keys(user_id: int):
+    return [USER_SLOT_KEY.format(user_id=user_id, slot=slot) for slot in range(USER_SLOTS)]
+
+
+def running_slot_keys():
+    return [RUNNING_SLOT_KEY.format(slot=slot) for slot in range(BUDGET)]
+
+
+def take(keys: Sequence[str], ticket: str) -> Optional[int]:
+    """Index of the first of keys taken for ticket, None if every one is held."""
+    for index, key in enumerate(keys):
+        if cache.add(key, ticket, TIMEOUT):
+            return index
+    return None
+
+
+def give_back(key: str, ticket: str):
+    # NOTE: An expired slot may have been taken by another creation since.
+    if cache.get(key) == ticket:
+        cache.delete(key)
+
+
+def estimated_wait(ahead: int) -> int:
+    """Seconds until a creation with ahead creations waiting before it starts."""
+    average = cache.get(DURATION_KEY) or ESTIMATE
+    return math.ceil(average * (ahead // BUDGET + 1))
+
+
+def record_duration(seconds: float):
+    average = cache.get(DURATION_KEY)
+    average = seconds if average is None else 0.8 * average + 0.2 * seconds
+    cache.set(DURATION_KEY, average, None)
+
+
+def load_waiting() -> dict:
+    return cache.get(WAITING_KEY) or {"users": [], "requests": {}}
+
+
+def waiting_count(waiting: dict) -> int:
+    return sum(len(requests) for requests in waiting["requests"].values())
+
+
+def start(request: dict, slot: int):
+    # NOTE: Imported here, the tasks release their slots through this module.
+    from . import tasks
+
+    ticket = request["ticket"]
+    cache.set(
+        TICKET_KEY.format(ticket=ticket), {**request, "slot": slot, "started": time.time()}, TIMEOUT
+    )
+    cache.touch(
+        USER_SLOT_KEY.format(user_id=request["user_id"], slot=request["user_slot"]), TIMEOUT
+    )
+    # NOTE: The ticket is the task id, clients poll /check with it while the creation waits.
+    tasks.create_game.apply_async(
+        kwargs={"publisher_id": request["user_id"], "max_stages": request["max_stages"]},
+        task_id=ticket,
+    )
+    metrics.GAME_ADMISSIONS.labels("started").inc()
+
+
+def admit(user_id: int, *, max_stages: int) -> str:
+    """Ticket of a new creation for the user, started now or once a slot frees up.
+
+    Raises Rejected when the user has no slot left or the waiting room is full.
+    """
+    ticket = str(uuid4())
+    user_slot = take(user_slot_keys(user_id), ticket)
+    if user_slot is None:
+        metrics.GAME_ADMISSIONS.labels("rejected").inc()
+        ahead = waiting_count(load_waiting())
+        raise Rejected("Game already being processed.", retry_after=estimated_wait(ahead))
+
+    request = {
+        "ticket": ticket,
+        "user_id": user_id,
+        "user_slot": user_slot,
+        "max_stages": max_stages,
+    }
+    user_slot_key = USER_SLOT_KEY.format(user_id=user_id, slot=user_slot)
+
+    with cache_lock(LOCK_KEY) as locked:
+        if not locked:
+            give_back(user_slot_key, ticket)
+            metrics.GAME_ADMISSIONS.labels("rejected").inc()
+            raise Rejected("Game creation is busy.", retry_after=1)
+
+        waiting = load_waiting()
+        # NOTE: Nobody skips the waiting room, a free slot goes to whoever waits first.
+        if not waiting["users"]:
+            slot = take(running_slot_keys(), ticket)
+            if slot is not None:
+                try:
+                    start(request, slot)
+                except Exception:
+                    give_back(RUNNING_SLOT_KEY.format(slot=slot), ticket)
+                    give_back(user_slot_key, ticket)
+                    raise
+                return ticket
+
+        ahead = waiting_count(waiting)
+        if ahead >= MAX_WAITING:
+            give_back(user_slot_key, ticket)
+            metrics.GAME_ADMISSIONS.labels("rejected").inc()
+            raise Rejected("Too many games being processed.", retry_after=estimated_wait(ahead))
+
+        if user_id not in waiting["requests"]:
+            waiting["users"].append(user_id)
+        waiting["requests"].setdefault(user_id, []).append(request)
+        cache.set(WAITING_KEY, waiting, None)
+        metrics.GAME_ADMISSIONS.labels("waiting").inc()
+    return ticket
+
+
+def dispatch_waiting() -> int:
+    """Start waiting creations on the free slots, one user after another. Returns how many."""
+    started = 0
+    with cache_lock(LOCK_KEY) as locked:
+        if not locked:
+            # NOTE: Whoever holds the lock dispatches, or the periodic task catches up.
+            return started
+
+        waiting = load_waiting()
+        # NOTE: A creation can wait longer than its user slot lasts, every pass extends them.
+        for requests in waiting["requests"].values():
+            for request in requests:
+                key = USER_SLOT_KEY.format(user_id=request["user_id"], slot=request["user_slot"])
+                cache.touch(key, TIMEOUT)
+
+        try:
+            while waiting["users"]:
+                user_id = waiting["users"][0]
+                request = waiting["requests"][user_id][0]
+                slot = take(running_slot_keys(), request["ticket"])
+                if slot is None:
+                    break
+
+                waiting["users"].pop(0)
+                waiting["requests"][user_id].pop(0)
+                if waiting["requests"][user_id]:
+                    waiting["users"].append(user_id)
+                else:
+                    del waiting["requests"][user_id]
+
+                try:
+                    start(request, slot)
+                except Exception:
+                    # NOTE: Back to the front of its line, the next pass starts it again.
+                    give_back(RUNNING_SLOT_KEY.format(slot=slot), request["ticket"])
+                    if user_id in waiting["users"]:
+                        waiting["users"].remove(user_id)
+                    waiting["users"].insert(0, user_id)
+                    waiting["requests"].setdefault(user_id, []).insert(0, request)
+                    raise
+                started += 1
+        finally:
+            cache.set(WAITING_KEY, waiting, None)
+    return started
+
+
+def renew(ticket: str):
+    """Extends the slots of a creation handed to a new task."""
+    running = cache.get(TICKET_KEY.format(ticket=ticket))
+    if running is None:
+        return
+
+    cache.touch(TICKET_KEY.format(ticket=ticket), TIMEOUT)
+    cache.touch(RUNNING_SLOT_KEY.format(slot=running["slot"]), TIMEOUT)
+    cache.touch(
+        USER_SLOT_KEY.format(user_id=running["user_id"], slot=running["user_slot"]), TIMEOUT
+    )
+
+
+def release(ticket: str):
+    """Frees the slots of a finished creation and starts the next waiting ones."""
+    running = cache.get(TICKET_KEY.format(ticket=ticket))
+    if running is None:
+        return
+
+    record_duration(time.time() - running["started"])
+    give_back(RUNNING_SLOT_KEY.format(slot=running["slot"]), ticket)
+    give_back(USER_SLOT_KEY.format(user_id=running["user_id"], slot=running["user_slot"]), ticket)
+    cache.delete(TICKET_KEY.format(ticket=ticket))
+    dispatch_waiting()
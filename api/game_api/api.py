@@ -3,10 +3,13 @@ from typing import List, Optional
 from celery.result import AsyncResult
 from django.shortcuts import get_list_or_404
 from django.db.models import Q
+from django.http import Http404
 from ninja import Router
 from ninja.pagination import paginate, PageNumberPagination
 
-from . import models, schemas, tasks
+from core import renderers
+
+from . import admission, models, schemas
 
 from play_api import models as play_models
 
@@ -23,15 +26,20 @@ router = Router()
 # Create a new game
 
 
-@router.post("", response={200: schemas.Status, 429: schemas.Message})
-def create_game(request, publisher_id: int, max_stages: int = 5):
-    if models.Game.objects.filter(publisher_id=publisher_id, processed=False).exists():
-        return 429, schemas.Message(message="Game already being processed.")
-
+@router.post("", response={200: schemas.Status, 429: schemas.Busy})
+def create_game(request, max_stages: int = 5):
     # TODO: Cannot create game if owner has unplayed games created by owner.
 
-    status = tasks.create_game.delay(publisher_id=publisher_id, max_stages=max_stages)
-    return 200, schemas.Status(task_id=status.id, **status._get_task_meta())
+    try:
+        ticket = admission.admit(request.auth.id, max_stages=max_stages)
+    except admission.Rejected as rejected:
+        busy = schemas.Busy(message=str(rejected), retry_after=rejected.retry_after)
+        response = renderers.render(busy.dict(), status=429)
+        response["Retry-After"] = str(rejected.retry_after)
+        return response
+
+    # NOTE: Started or waiting, the task is pending until a worker picks it up.
+    return 200, schemas.Status(task_id=ticket, status="PENDING")
 
 
 @router.get("/check", response=schemas.Status)
@@ -44,16 +52,33 @@ def check_status(request, status_id: str):
 PAGE_SIZE = 10
 
 
-@router.get("", response=List[schemas.GameResponse])
-@paginate(PageNumberPagination, page_size=PAGE_SIZE)
-def list_games(request, **kwargs):
-    return models.Game.objects.all()
+GAME_FIELDS = tuple(schemas.GameResponse.__fields__)
 
 
-@router.get("/published/{publisher_id}", response=List[schemas.GameResponse])
-@paginate(PageNumberPagination, page_size=PAGE_SIZE)
-def list_games_by_publisher(request, publisher_id: int, **kwargs):
-    return get_list_or_404(models.Game.objects.order_by("-id"), publisher_id=publisher_id)
+def page_of(queryset, page: int):
+    start = (max(page, 1) - 1) * PAGE_SIZE
+    return list(queryset[start : start + PAGE_SIZE])
+
+
+# NOTE: Game pages are built from .values() rows already in GameResponse's shape and
+# rendered as is, see the contract tests in game_api.tests.
+
+
+@router.get("", response=List[schemas.GameResponse], url_name="games")
+def list_games(request, page: int = 1):
+    games = models.Game.objects.order_by("id").values(*GAME_FIELDS)
+    return renderers.render(page_of(games, page))
+
+
+@router.get(
+    "/published/{publisher_id}", response=List[schemas.GameResponse], url_name="published_games"
+)
+def list_games_by_publisher(request, publisher_id: int, page: int = 1):
+    games = models.Game.objects.filter(publisher_id=publisher_id).order_by("-id")
+    games = page_of(games.values(*GAME_FIELDS), page)
+    if not games and page == 1:
+        raise Http404("No Game matches the given query.")
+    return renderers.render(games)
 
 
 from ninja import Schema
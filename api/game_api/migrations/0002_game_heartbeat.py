@@ -0,0 +1,50 @@
+# Generated by Django 4.0.10 on 2026-10-19 05:42
+
+from django.db import migrations, models
+
+
+def mark_processed_games_done(apps, schema_editor):
+    Game = apps.get_model("game_api", "Game")
+    Game.objects.filter(processed=True).update(phase="done")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("game_api", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="game",
+            name="attempts",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="game",
+            name="heartbeat_at",
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name="game",
+            name="max_stages",
+            field=models.PositiveSmallIntegerField(default=5),
+        ),
+        migrations.AddField(
+            model_name="game",
+            name="phase",
+            field=models.CharField(
+                choices=[
+                    ("created", "Created"),
+                    ("stage_three", "Stage Three"),
+                    ("stage_two", "Stage Two"),
+                    ("stage_one", "Stage One"),
+                    ("saving", "Saving"),
+                    ("done", "Done"),
+                ],
+                default="created",
+                max_length=16,
+            ),
+        ),
+        migrations.RunPython(mark_processed_games_done, migrations.RunPython.noop),
+    ]
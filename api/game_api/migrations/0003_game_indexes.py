@@ -0,0 +1,29 @@
+# Generated by Django 4.0.10 on 2026-10-19 05:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("game_api", "0002_game_heartbeat"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="choice",
+            index=models.Index(fields=["stage", "correct"], name="choice_stage_correct"),
+        ),
+        migrations.AddIndex(
+            model_name="game",
+            index=models.Index(fields=["publisher", "-id"], name="game_publisher_latest"),
+        ),
+        migrations.AddIndex(
+            model_name="game",
+            index=models.Index(
+                condition=models.Q(("processed", False)),
+                fields=["heartbeat_at"],
+                name="game_unprocessed",
+            ),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.0.10 on 2026-10-19 06:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("game_api", "0003_game_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="choice",
+            name="stage",
+            field=models.ForeignKey(
+                db_index=False, on_delete=django.db.models.deletion.CASCADE, to="game_api.stage"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="game",
+            name="publisher",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
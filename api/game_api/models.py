@@ -6,11 +6,36 @@ from assets.models import SpotifyAsset
 
 # Create your models here.
 class Game(models.Model):
+    class Phase(models.TextChoices):
+        CREATED = "created"
+        STAGE_THREE = "stage_three"
+        STAGE_TWO = "stage_two"
+        STAGE_ONE = "stage_one"
+        SAVING = "saving"
+        DONE = "done"
+
     game_code = models.SlugField(max_length=256)
-    publisher = models.ForeignKey(User, on_delete=models.CASCADE)
+    # NOTE: Indexed by game_publisher_latest, which leads with the publisher.
+    publisher = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     task_id = models.SlugField(max_length=256)
     processed = models.BooleanField(default=False)
     name = models.CharField(max_length=256)
+    # NOTE: Kept up to date by create_game, see game_api.reaper.
+    max_stages = models.PositiveSmallIntegerField(default=5)
+    phase = models.CharField(max_length=16, choices=Phase.choices, default=Phase.CREATED)
+    heartbeat_at = models.DateTimeField(null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["publisher", "-id"], name="game_publisher_latest"),
+            # NOTE: Holds only the few games being created, for the reaper.
+            models.Index(
+                fields=["heartbeat_at"],
+                condition=models.Q(processed=False),
+                name="game_unprocessed",
+            ),
+        ]
 
 
 class Stage(models.Model):
@@ -25,7 +50,13 @@ class Stage(models.Model):
 
 
 class Choice(models.Model):
-    stage = models.ForeignKey(Stage, on_delete=models.CASCADE)
+    # NOTE: Indexed by choice_stage_correct, which leads with the stage.
+    stage = models.ForeignKey(Stage, on_delete=models.CASCADE, db_index=False)
     description = models.CharField(max_length=256, null=True)
     spotify_asset = models.ForeignKey(SpotifyAsset, on_delete=models.CASCADE)
     correct = models.BooleanField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["stage", "correct"], name="choice_stage_correct"),
+        ]
@@ -0,0 +1,126 @@
+"""Heartbeats of create_game, and the reaper of the games whose task stopped beating.
+
+create_game records the phase it is in and a heartbeat on its game as it goes,
+and keeps the stages of each finished phase in the cache. An unprocessed game
+whose heartbeat is older than GAME_HEARTBEAT_TIMEOUT seconds is stuck, its task
+died with its worker. reap() hands it to a new create_game task, which skips
+the phases whose stages were kept, up to GAME_CREATION_RETRIES times. After
+that the game is deleted and its publisher's admission slots released.
+
+Reaping a game bumps its attempts and hands the claimed attempt to the retry.
+A task only beats, and finishes, while the attempts match the one it was given,
+so a slow task that got reaped stops at its next heartbeat with Superseded
+instead of racing the retry.
+
+Heartbeats are recorded between phases, so GAME_HEARTBEAT_TIMEOUT must exceed
+the slowest phase. Each processor runs one query over the publisher's assets
+and shuffles in memory, and saving is one transaction of a few hundred rows,
+seconds at worst against the five minute default.
+"""
+import logging
+from datetime import timedelta
+from typing import List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core import metrics
+
+from . import admission, models
+from .stages import Stage
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_TIMEOUT = settings.GAME_HEARTBEAT_TIMEOUT
+RETRIES = settings.GAME_CREATION_RETRIES
+
+PHASE_KEY = "game:creation:phase:{game_id}:{phase}"
+KEPT_PHASES = [
+    models.Game.Phase.STAGE_THREE,
+    models.Game.Phase.STAGE_TWO,
+    models.Game.Phase.STAGE_ONE,
+]
+
+
+class Superseded(Exception):
+    """The game was reaped and handed to another task."""
+
+
+def beat(game_id: int, attempt: int, phase: str):
+    updated = models.Game.objects.filter(pk=game_id, attempts=attempt).update(
+        phase=phase, heartbeat_at=timezone.now()
+    )
+    if not updated:
+        raise Superseded(game_id)
+
+
+def finish(game_id: int, attempt: int):
+    updated = models.Game.objects.filter(pk=game_id, attempts=attempt, processed=False).update(
+        processed=True, phase=models.Game.Phase.DONE, heartbeat_at=timezone.now()
+    )
+    if not updated:
+        raise Superseded(game_id)
+
+
+def keep(game_id: int, phase: str, stages: List[Stage]):
+    key = PHASE_KEY.format(game_id=game_id, phase=phase)
+    cache.set(key, [stage.dict() for stage in stages], admission.TIMEOUT)
+
+
+def kept(game_id: int, phase: str) -> Optional[List[Stage]]:
+    stages = cache.get(PHASE_KEY.format(game_id=game_id, phase=phase))
+    if stages is None:
+        return None
+    return [Stage(**stage) for stage in stages]
+
+
+def forget(game_id: int):
+    cache.delete_many([PHASE_KEY.format(game_id=game_id, phase=phase) for phase in KEPT_PHASES])
+
+
+def stuck_games():
+    cutoff = timezone.now() - timedelta(seconds=HEARTBEAT_TIMEOUT)
+    # NOTE: Games created before heartbeats were recorded have none.
+    stale = Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True)
+    return models.Game.objects.filter(stale, processed=False)
+
+
+def reap() -> dict:
+    """Retries or deletes every stuck game. Returns how many of each."""
+    # NOTE: Imported here, create_game beats through this module.
+    from . import tasks
+
+    reaped = {"retried": 0, "deleted": 0}
+    for game in stuck_games().order_by("pk"):
+        game_id = game.pk
+        claimed = models.Game.objects.filter(
+            pk=game_id, attempts=game.attempts, heartbeat_at=game.heartbeat_at, processed=False
+        ).update(attempts=F("attempts") + 1, heartbeat_at=timezone.now())
+        if not claimed:
+            # NOTE: It finished, beat or got reaped by someone else since.
+            continue
+
+        if game.attempts < RETRIES:
+            outcome = "retried"
+            admission.renew(game.task_id)
+            tasks.create_game.apply_async(
+                kwargs={
+                    "publisher_id": game.publisher_id,
+                    "max_stages": game.max_stages,
+                    "game_id": game_id,
+                    "attempt": game.attempts + 1,
+                },
+                task_id=game.task_id,
+            )
+        else:
+            outcome = "deleted"
+            game.delete()
+            forget(game_id)
+            admission.release(game.task_id)
+
+        logger.warning(f"{outcome} game {game_id}, stuck in {game.phase}")
+        metrics.REAPED_GAMES.labels(game.phase, outcome).inc()
+        reaped[outcome] += 1
+    return reaped
@@ -17,6 +17,10 @@ class Message(Schema):
     message: str
 
 
+class Busy(Message):
+    retry_after: int
+
+
 from pydantic import validator
 
 
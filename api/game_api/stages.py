@@ -3,12 +3,11 @@ import random
 from typing import List
 from uuid import uuid4
 
-from faker import Faker
-from faker_music import MusicProvider
 from ninja import Schema
 
 import copy
 from assets import models as asset_models
+from core import words
 
 from . import models, trivia
 
@@ -26,13 +25,8 @@ def generate_game_code():
 
 
 def generate_game_name(game_code):
-    fake = Faker()
-    fake.add_provider(MusicProvider)
-
-    sub = fake.music_subgenre()
-    color = fake.color_name()
-    # TODO: strip/replace punctuation here with a space.
-    # TODO: max color/sub length
+    sub = random.choice(words.SUBGENRES)
+    color = random.choice(words.COLORS)
 
     return f"{color} {sub} {game_code[:8]}".replace(" ", "-").upper()
 
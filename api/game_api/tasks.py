@@ -1,66 +1,120 @@
 import random
+from typing import Optional
 
 from celery import shared_task
 from celery.utils.log import get_task_logger
+from django.db import transaction
+from django.utils import timezone
 
 from assets import models as asset_models
+from core.metrics import task_phase
 
-from . import models
+from . import admission, models, reaper
 from . import stages as stage_creator
 
 logger = get_task_logger(__name__)
 
 
+Phase = models.Game.Phase
+
+# NOTE: type one is the slowest that is why its switched to last.
+PROCESSORS = [
+    (Phase.STAGE_THREE, stage_creator.stage_three_processor),
+    (Phase.STAGE_TWO, stage_creator.stage_two_processor),
+    (Phase.STAGE_ONE, stage_creator.stage_one_processor),
+]
+
+
 @shared_task(bind=True)
-def create_game(self, *, publisher_id: int, max_stages: int):
-    game_code = stage_creator.generate_game_code()
-    game_name = stage_creator.generate_game_name(game_code=game_code)
-    logger.info("created game code")
-
-    game_object = models.Game.objects.create(
-        name=game_name,
-        publisher_id=publisher_id,
-        game_code=game_code,
-        task_id=self.request.id,
-        processed=False,
-    )
-
-    self.update_state(state="STAGING", meta={"current": 1, "total": 3})
-
-    type_three = stage_creator.stage_three_processor(
-        publisher_id=publisher_id, max_stages=max_stages
-    )
-    logger.info("first stage processor complete")
-
-    self.update_state(state="STAGING", meta={"current": 2, "total": 3})
-    type_two = stage_creator.stage_two_processor(publisher_id=publisher_id, max_stages=max_stages)
-    logger.info("second stage processor complete")
-
-    self.update_state(state="STAGING", meta={"current": 3, "total": 3})
-    type_one = stage_creator.stage_one_processor(publisher_id=publisher_id, max_stages=max_stages)
-    logger.info("third stage processor complete")
-    # NOTE: type one is the slowest that is why its switched to last.
-
-    stages = type_one + type_two + type_three
+def create_game(
+    self,
+    *,
+    publisher_id: int,
+    max_stages: int,
+    game_id: Optional[int] = None,
+    attempt: int = 0,
+):
+    superseded = False
+    try:
+        return build_game(
+            self, publisher_id=publisher_id, max_stages=max_stages, game_id=game_id, attempt=attempt
+        )
+    except reaper.Superseded:
+        # NOTE: The reaper handed the game, and its admission slots, to another task.
+        superseded = True
+        logger.warning(f"game {game_id} was reaped while being created.")
+    finally:
+        if not superseded:
+            admission.release(self.request.id)
+
+
+def build_game(task, *, publisher_id: int, max_stages: int, game_id: Optional[int], attempt: int):
+    if game_id is None:
+        game_code = stage_creator.generate_game_code()
+        game_name = stage_creator.generate_game_name(game_code=game_code)
+        logger.info("created game code")
+
+        game_object = models.Game.objects.create(
+            name=game_name,
+            publisher_id=publisher_id,
+            game_code=game_code,
+            task_id=task.request.id,
+            processed=False,
+            max_stages=max_stages,
+            heartbeat_at=timezone.now(),
+        )
+    else:
+        # NOTE: The attempt is the one the reaper claimed, if it was reaped again since this
+        # task was queued the first heartbeat raises Superseded.
+        game_object = models.Game.objects.get(pk=game_id)
+        logger.info(f"resuming game {game_id} stuck in {game_object.phase}.")
+
+    stages = []
+    for current, (phase, processor) in enumerate(PROCESSORS, start=1):
+        reaper.beat(game_object.pk, attempt, phase)
+        task.update_state(state="STAGING", meta={"current": current, "total": len(PROCESSORS)})
+
+        created = reaper.kept(game_object.pk, phase)
+        if created is None:
+            with task_phase(task.name, phase):
+                created = processor(publisher_id=publisher_id, max_stages=max_stages)
+            reaper.keep(game_object.pk, phase, created)
+        logger.info(f"{phase} processor complete")
+        stages += created
+
     random.shuffle(stages)
     logger.info("shuffled stages")
 
+    reaper.beat(game_object.pk, attempt, Phase.SAVING)
     saved = 0
-    for index, stage in enumerate(stages):
-        self.update_state(state="SAVING", meta={"current": index, "total": len(stages)})
-        stage_object = game_object.stage_set.create(
-            **stage.dict(include={"puzzle_type", "question"})
-        )
-        saved += 1
-        for choice in stage.choices:
-            choice_object = stage_object.choice_set.create(
-                correct=choice.correct, spotify_asset_id=choice.id
+    # NOTE: One transaction, so a crash while saving leaves no partial stages behind.
+    with task_phase(task.name, "save"), transaction.atomic():
+        for index, stage in enumerate(stages):
+            task.update_state(state="SAVING", meta={"current": index, "total": len(stages)})
+            stage_object = game_object.stage_set.create(
+                **stage.dict(include={"puzzle_type", "question"})
             )
             saved += 1
+            for choice in stage.choices:
+                choice_object = stage_object.choice_set.create(
+                    correct=choice.correct, spotify_asset_id=choice.id
+                )
+                saved += 1
+        reaper.finish(game_object.pk, attempt)
 
     logger.info("game creation completed.")
     logger.info(f"{saved} assets saved to database.")
 
-    game_object.processed = True
-    game_object.save()
-    return {"game_code": game_code}
+    reaper.forget(game_object.pk)
+    return {"game_code": game_object.game_code}
+
+
+@shared_task
+def dispatch_waiting_games():
+    # NOTE: Starts waiting creations on slots that expired instead of being released.
+    return admission.dispatch_waiting()
+
+
+@shared_task
+def reap_stuck_games():
+    return reaper.reap()
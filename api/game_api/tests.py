@@ -1 +1,189 @@
-from django.test import TestCase
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+
+import auth_api
+from assets.models import SpotifyAsset
+from auth_api import jwt
+
+from . import admission, models, reaper, schemas, stages, tasks
+
+
+@pytest.fixture
+def publisher(db, django_user_model):
+    return django_user_model.objects.create_user(id=1, username="run2dos")
+
+
+@pytest.fixture
+def started(monkeypatch):
+    cache.clear()
+    monkeypatch.setattr(admission, "BUDGET", 2)
+    monkeypatch.setattr(admission, "MAX_WAITING", 3)
+    started = []
+    monkeypatch.setattr(
+        tasks.create_game, "apply_async", lambda kwargs, task_id: started.append(task_id)
+    )
+    yield started
+    cache.clear()
+
+
+@pytest.fixture
+def headers(publisher):
+    verified_user = auth_api.schemas.User.from_orm(publisher)
+    token = jwt.create_access_token(verified_user=verified_user)
+    return {"HTTP_AUTHORIZATION": f"Bearer {token.access_token}"}
+
+
+def test_game_pages_match_game_response(client, headers, publisher):
+    models.Game.objects.bulk_create(
+        models.Game(game_code=f"GAME{index}", publisher=publisher, task_id="task", name="game")
+        for index in range(12)
+    )
+
+    response = client.get(reverse("api-1.0.0:games"), {"page": 2}, **headers)
+    games = response.json()
+    assert [game["game_code"] for game in games] == ["GAME10", "GAME11"]
+    assert [schemas.GameResponse(**game).dict() for game in games] == games
+
+    route = reverse("api-1.0.0:published_games", kwargs={"publisher_id": publisher.id})
+    games = client.get(route, **headers).json()
+    assert len(games) == 10
+    assert [schemas.GameResponse(**game).dict() for game in games] == games
+
+    route = reverse("api-1.0.0:published_games", kwargs={"publisher_id": 2})
+    assert client.get(route, **headers).status_code == 404
+
+
+def test_generate_game_name():
+    name = stages.generate_game_name(game_code="ABCDEF1234567890")
+
+    assert name.endswith("-ABCDEF12")
+    assert " " not in name and name == name.upper()
+
+
+def test_create_game_admits_one_creation_per_user(client, headers, publisher, started):
+    route = reverse("api-1.0.0:games")
+
+    response = client.post(route, {"publisher_id": 2}, **headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "PENDING"
+    assert started == [response.json()["task_id"]]
+
+    response = client.post(route, **headers)
+    assert response.status_code == 429
+    assert int(response["Retry-After"]) == response.json()["retry_after"] > 0
+
+    admission.release(started[0])
+    assert client.post(route, **headers).status_code == 200
+
+
+def test_waiting_creations_start_round_robin(started, monkeypatch):
+    monkeypatch.setattr(admission, "USER_SLOTS", 4)
+    heavy = [admission.admit(1, max_stages=5) for _ in range(2)]
+    waiting = [admission.admit(1, max_stages=5) for _ in range(2)]
+    assert started == heavy
+
+    light = admission.admit(2, max_stages=5)
+
+    with pytest.raises(admission.Rejected) as rejected:
+        admission.admit(3, max_stages=5)
+    assert rejected.value.retry_after == 2 * admission.ESTIMATE
+
+    admission.release(heavy[0])
+    admission.release(heavy[1])
+    assert started == heavy + [waiting[0], light]
+
+    admission.release(light)
+    assert started[-1] == waiting[1]
+
+
+def test_waiting_creations_keep_their_user_slots(started, monkeypatch):
+    admitted = [admission.admit(user_id, max_stages=5) for user_id in range(1, 4)]
+    assert started == admitted[:2]
+    touched = []
+    monkeypatch.setattr(admission.cache, "touch", lambda key, timeout: touched.append(key))
+
+    assert admission.dispatch_waiting() == 0
+    assert touched == [admission.USER_SLOT_KEY.format(user_id=3, slot=0)]
+
+
+def test_waiting_creations_that_fail_to_start_wait_again(started, monkeypatch):
+    running = [admission.admit(user_id, max_stages=5) for user_id in range(1, 3)]
+    waiting = admission.admit(3, max_stages=5)
+
+    def broker_down(kwargs, task_id):
+        raise ConnectionError
+
+    monkeypatch.setattr(tasks.create_game, "apply_async", broker_down)
+    with pytest.raises(ConnectionError):
+        admission.release(running[0])
+    assert admission.load_waiting() == {
+        "users": [3],
+        "requests": {3: [{"ticket": waiting, "user_id": 3, "user_slot": 0, "max_stages": 5}]},
+    }
+
+    monkeypatch.setattr(
+        tasks.create_game, "apply_async", lambda kwargs, task_id: started.append(task_id)
+    )
+    assert admission.dispatch_waiting() == 1
+    assert started == running + [waiting]
+
+
+@pytest.fixture
+def stuck_game(publisher):
+    stale = timezone.now() - timedelta(seconds=reaper.HEARTBEAT_TIMEOUT + 1)
+    return models.Game.objects.create(
+        game_code="STUCK",
+        publisher=publisher,
+        task_id="stuck",
+        name="stuck",
+        max_stages=1,
+        phase=models.Game.Phase.STAGE_TWO,
+        heartbeat_at=stale,
+    )
+
+
+def test_reaper_retries_stuck_games_from_kept_phases(stuck_game, started):
+    asset = SpotifyAsset.objects.create(name="track", spotify_uri="track", spotify_type="track")
+    stage = stages.Stage(puzzle_type=2, question="?", choices=[{"id": asset.id, "correct": True}])
+    for phase in reaper.KEPT_PHASES:
+        reaper.keep(stuck_game.pk, phase, [stage])
+
+    assert reaper.reap() == {"retried": 1, "deleted": 0}
+    assert reaper.reap() == {"retried": 0, "deleted": 0}
+    assert started == ["stuck"]
+
+    # NOTE: The task it was taken from stops at its next heartbeat.
+    with pytest.raises(reaper.Superseded):
+        reaper.beat(stuck_game.pk, 0, models.Game.Phase.SAVING)
+
+    kwargs = {
+        "publisher_id": stuck_game.publisher_id,
+        "max_stages": 1,
+        "game_id": stuck_game.pk,
+        "attempt": 1,
+    }
+    assert tasks.create_game.apply(kwargs=kwargs, task_id="stuck").get() == {"game_code": "STUCK"}
+
+    # NOTE: A finished game can not be finished again by a task that was reaped meanwhile.
+    with pytest.raises(reaper.Superseded):
+        reaper.finish(stuck_game.pk, 1)
+
+    stuck_game.refresh_from_db()
+    assert stuck_game.processed and stuck_game.phase == models.Game.Phase.DONE
+    assert stuck_game.stage_set.count() == 3
+    assert reaper.kept(stuck_game.pk, models.Game.Phase.STAGE_ONE) is None
+
+
+def test_reaper_deletes_games_out_of_retries(stuck_game, started):
+    ticket = admission.admit(stuck_game.publisher_id, max_stages=1)
+    models.Game.objects.filter(pk=stuck_game.pk).update(task_id=ticket, attempts=reaper.RETRIES)
+    with pytest.raises(admission.Rejected):
+        admission.admit(stuck_game.publisher_id, max_stages=1)
+
+    assert reaper.reap() == {"retried": 0, "deleted": 1}
+    assert not models.Game.objects.exists()
+    assert admission.admit(stuck_game.publisher_id, max_stages=1)
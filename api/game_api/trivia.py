@@ -2,9 +2,11 @@ import random
 import string
 from collections import Counter
 
-import requests
 from django.conf import settings
 
+from core import http
+from core.tracing import traced
+
 from .stop_words import STOP_WORDS
 
 TOKEN = settings.GENIUS_CLIENT_TOKEN
@@ -63,8 +65,9 @@ def parse_artist_id(hits, artist_name):
     return None
 
 
+@traced("trivia.fetch_artist_id")
 def fetch_artist_id(*, artist_name):
-    response = requests.get(f"https://api.genius.com/search?q={artist_name}", headers=HEADERS)
+    response = http.session.get(f"https://api.genius.com/search?q={artist_name}", headers=HEADERS)
 
     response = response.json().get("response")
     if not response:
@@ -77,8 +80,9 @@ def fetch_artist_id(*, artist_name):
     return parse_artist_id(hits, artist_name)
 
 
+@traced("trivia.get_artist_description")
 def get_artist_description(*, artist_id):
-    response = requests.get(
+    response = http.session.get(
         f"https://api.genius.com/artists/{artist_id}?text_format=plain", headers=HEADERS
     )
     if response.ok:
@@ -0,0 +1,166 @@
+"""Per game answer keys so answers are checked without reading choices from postgres.
+
+Choice.correct never changes once a game is processed. The key of a game is read
+from the database once, kept in a bounded LRU in each worker and, when
+PLAY_ANSWER_KEY_SHARED is set, in the shared cache for the other workers.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+
+from core.tracing import traced
+from game_api import models as game_models
+
+from . import games
+
+ANSWER_KEY_CACHE_KEY = "play:answer-key:{game_id}"
+ANSWER_KEY_CACHE_SIZE = settings.PLAY_ANSWER_KEY_CACHE_SIZE
+ANSWER_KEY_SHARED = settings.PLAY_ANSWER_KEY_SHARED
+
+CHOICE_FIELDS = (
+    "id",
+    "correct",
+    "stage_id",
+    "stage__game_id",
+    "stage__game__processed",
+    "stage__puzzle_type",
+    "spotify_asset__name",
+    "spotify_asset__spotify_uri",
+    "spotify_asset__spotify_type",
+    "spotify_asset__image",
+    "spotify_asset__preview",
+)
+
+
+class ChoiceKey(NamedTuple):
+    stage_id: int
+    puzzle_type: int
+    correct: bool
+
+
+class AnswerKey(NamedTuple):
+    game_id: int
+    choices: Dict[int, ChoiceKey]
+    # Correct choice of every trivia and find the track stage.
+    correct: Dict[int, int]
+    # (front, back) choice pairs of every lock in stage.
+    lock_in: Dict[int, List[Tuple[int, int]]]
+    # ChoiceOut payloads, answer responses echo them back.
+    assets: Dict[int, dict]
+
+
+@traced("play.build_answer_key")
+def build_answer_key(game_id: int):
+    rows = game_models.Choice.objects.filter(stage__game_id=game_id).values(*CHOICE_FIELDS)
+    rows = list(rows.order_by("id"))
+
+    if not rows or not rows[0]["stage__game__processed"]:
+        return None
+
+    choices, correct, assets, stage_choices = {}, {}, {}, {}
+    for row in rows:
+        choice_id, stage_id = row["id"], row["stage_id"]
+        choices[choice_id] = ChoiceKey(stage_id, row["stage__puzzle_type"], row["correct"])
+        stage_choices.setdefault(stage_id, []).append(choice_id)
+
+        if row["correct"] and row["stage__puzzle_type"] in [1, 2]:
+            correct[stage_id] = choice_id
+
+        assets[choice_id] = games.build_choice(row)
+
+    lock_in = {
+        stage_id: list(zip(*games.split_choices(choice_ids)))
+        for stage_id, choice_ids in stage_choices.items()
+        if choices[choice_ids[0]].puzzle_type == 3
+    }
+
+    return AnswerKey(game_id, choices, correct, lock_in, assets)
+
+
+class AnswerKeyCache:
+    """Bounded LRU of answer keys plus an index from choice id to game id."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.keys = OrderedDict()
+        self.choice_index = {}
+        self.lock = threading.Lock()
+
+    def get(self, game_id):
+        with self.lock:
+            answer_key = self.keys.get(game_id)
+            if answer_key is not None:
+                self.keys.move_to_end(game_id)
+            return answer_key
+
+    def game_id_for_choice(self, choice_id):
+        with self.lock:
+            return self.choice_index.get(choice_id)
+
+    def put(self, answer_key: AnswerKey):
+        with self.lock:
+            self.keys[answer_key.game_id] = answer_key
+            self.keys.move_to_end(answer_key.game_id)
+            self.choice_index.update(dict.fromkeys(answer_key.choices, answer_key.game_id))
+
+            while len(self.keys) > self.size:
+                _, evicted = self.keys.popitem(last=False)
+                for choice_id in evicted.choices:
+                    self.choice_index.pop(choice_id, None)
+
+    def discard(self, game_id):
+        with self.lock:
+            evicted = self.keys.pop(game_id, None)
+            if evicted is not None:
+                for choice_id in evicted.choices:
+                    self.choice_index.pop(choice_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.keys.clear()
+            self.choice_index.clear()
+
+
+local_keys = AnswerKeyCache(size=ANSWER_KEY_CACHE_SIZE)
+
+
+def get_answer_key(game_id: int) -> AnswerKey:
+    answer_key = local_keys.get(game_id)
+    if answer_key is not None:
+        return answer_key
+
+    cache_key = ANSWER_KEY_CACHE_KEY.format(game_id=game_id)
+    if ANSWER_KEY_SHARED:
+        answer_key = cache.get(cache_key)
+
+    if answer_key is None:
+        answer_key = build_answer_key(game_id)
+        if answer_key is None:
+            # NOTE: Choices of a game still being created may change, they are not scored.
+            raise Http404("Game not found or still being created.")
+        if ANSWER_KEY_SHARED:
+            cache.set(cache_key, answer_key, timeout=games.PAYLOAD_TTL)
+
+    local_keys.put(answer_key)
+    return answer_key
+
+
+def get_answer_key_for_choice(choice_id: int) -> AnswerKey:
+    game_id = local_keys.game_id_for_choice(choice_id)
+
+    if game_id is None:
+        choice = game_models.Choice.objects.filter(id=choice_id)
+        game_id = choice.values_list("stage__game_id", flat=True).first()
+        if game_id is None:
+            raise Http404("Choice not found.")
+
+    return get_answer_key(game_id)
+
+
+def invalidate_answer_key(game_id: int):
+    local_keys.discard(game_id)
+    cache.delete(ANSWER_KEY_CACHE_KEY.format(game_id=game_id))
@@ -1,16 +1,23 @@
 from django.contrib.auth.models import User
+from django.db.models import F, Window
+from django.db.models.functions import Rank
 from django.http import HttpResponseBadRequest
-from django.shortcuts import get_list_or_404, get_object_or_404
+from django.shortcuts import get_object_or_404
 from ninja import Router
 
+from analytics import journal
+from core import renderers
 from game_api import models as game_models
 from profile_api import models as profile_models
 from profile_api import schemas as profile_schemas
 
-from . import models, schemas
+from . import games, leaderboard, models, schemas, scoring
+from . import answer_key as key
 
 router = Router()
 
+PAGE_SIZE = 10
+
 
 # [x] get all game assets by gamecode GET /play
 
@@ -22,14 +29,12 @@ router = Router()
 # player consume single star POST /play/star -> star count
 # |- if player has 0 star return 400 code or unable code
 # |- let players skip questions with stars
-import random
-from pprint import pprint
 
 
-@router.get("", response=schemas.ActiveGame)
+@router.get("", response=schemas.ActiveGame, url_name="play")
 def get_game_by_gamecode(request, game_code: str, player_id: int):
     game = get_object_or_404(game_models.Game, game_code=game_code)
-    player = get_object_or_404(User, id=player_id)
+    player = get_object_or_404(User.objects.only("id"), id=player_id)
 
     scoreboard, created_scoreboard = models.ScoreBoard.objects.get_or_create(
         game=game, player=player, defaults={"score": 0}
@@ -38,59 +43,15 @@ def get_game_by_gamecode(request, game_code: str, player_id: int):
     if not created_scoreboard:
         return HttpResponseBadRequest("Player has already attempted this game.")
 
-    # TODO: REPLACE THIS IS FOR DEBUGGIN ONLY
-
-    def split_choices(choices):
-        half = len(choices) // 2
-        return choices[:half], choices[half:]
-
-    stages = []
-    stages_orm = get_list_or_404(game.stage_set)
-
-    for stage in stages_orm:
-        choices = []
-        if stage.puzzle_type == 1:
-            for choice in stage.choice_set.all():
-                choices.append(schemas.ChoiceOut.from_orm(choice))
-            random.shuffle(choices)
-
-        elif stage.puzzle_type == 2:
-            for choice in stage.choice_set.all():
-                choices.append(schemas.ChoiceOut.from_orm(choice))
-
-            # NOTE: Used to make sure all the assets have the same preview.
-            # This is to make sure no one can find the correct choice
-            # by snooping in on the mp3 id.
-            correct = list(filter(lambda item: item.correct == True, choices))
-            assert len(correct) == 1
-            target_preview = correct.pop().spotify_asset.preview
-            for choice in choices:
-                choice.spotify_asset.preview = target_preview
-
-            # random.shuffle(choices)
-        elif stage.puzzle_type == 3:
-            # TODO: FIXME: HACK: super hacky. Need to fix a bug on the puzzle three creation
-            # NOTE: Need to check if two assets have the same image before
-            # creating stage three assets.
-            # Songs maybe different with the same album art.
-
-            for front, back in zip(*split_choices(list(stage.choice_set.all()))):
-                choice_out = schemas.ChoiceOut.from_orm(front)
-
-                if front.correct is False:
-                    # swap the images on the wrong answers.
-                    choice_out.spotify_asset.image = back.spotify_asset.image
-
-                choices.append(choice_out)
-
-        stages.append(
-            schemas.StageOut(
-                puzzle_type=stage.puzzle_type, question=stage.question, choices=choices
-            )
-        )
+    stages = games.personalize_stages(games.get_stages_payload(game))
 
-    game_out = schemas.GameOut.from_orm(game)
-    return schemas.ActiveGame(game=game_out, stages=stages)
+    if game.processed:
+        # NOTE: Loads the answer key before the first answer of this game arrives.
+        key.get_answer_key(game.id)
+
+    game_out = {field: getattr(game, field) for field in schemas.GameOut.__fields__}
+    # NOTE: Rendered as is, the payload is already in ActiveGame's shape.
+    return renderers.render({"game": game_out, "stages": stages})
 
 
 from typing import List, Union
@@ -105,76 +66,133 @@ def get_players_profile(request, player_id: int):
     return output
 
 
-@router.post("/answer")
+@router.post("/answer", url_name="answer")
 def submit_players_answer(request, player_id: int, choice_id: int, wager: int):
     # TODO: Add gamecode to check if answer is in the correct game
     # TODO: bonus points for streak, frontend keeps track of streak
     # TODO: add bonus points as input. default to 0.
-
-    players_choice = get_object_or_404(game_models.Choice, id=choice_id)
-
-    score_board = get_object_or_404(
-        models.ScoreBoard, game_id=players_choice.stage.game_id, player_id=player_id
-    )
-
-    player_profile = get_object_or_404(models.PlayerProfile, player_id=player_id)
-
     # TODO: the frontend should check if the players has points to wager
 
-    if players_choice.stage.puzzle_type in [1, 2]:
-        correct_choice = players_choice.stage.choice_set.get(correct=True)
-        answered_correct = players_choice.correct and correct_choice.correct
-
-        if answered_correct:
-            score_board.score += wager
-            player_profile.update_gainers_and_losers(wager)
-            # TODO: if bonus points add here
-        else:
-            score_board.score -= wager
-            player_profile.update_gainers_and_losers(-wager)
+    answer_key = key.get_answer_key_for_choice(choice_id)
+    answered_correct, correct_choice_id = scoring.check_answer(answer_key, choice_id)
 
-        score_board.save()
+    # TODO: if bonus points add here
+    delta = wager if answered_correct else -wager
+    player_profile = scoring.apply_wager(
+        game_id=answer_key.game_id,
+        player_id=player_id,
+        stage_id=answer_key.choices[choice_id].stage_id,
+        delta=delta,
+    )
+    journal.record(
+        [
+            scoring.answer_event(
+                answer_key,
+                player_id=player_id,
+                choice_id=choice_id,
+                wager=wager,
+                correct=answered_correct,
+            )
+        ]
+    )
 
-        return schemas.AnswerResponse(
-            players_choice=players_choice,
-            correct_choice=correct_choice,
-            answered_correct=answered_correct,
-            player_profile=schemas.PlayerProfile.from_player_profile_orm(player_profile),
-        )
+    return schemas.AnswerResponse(
+        players_choice=answer_key.assets[choice_id],
+        correct_choice=answer_key.assets[correct_choice_id],
+        answered_correct=answered_correct,
+        player_profile=schemas.PlayerProfile.from_player_profile_orm(player_profile),
+    )
 
 
-@router.post("/answer/three", response=schemas.PuzzleThreeAnswerResponse)
+@router.post("/answer/three", response=schemas.PuzzleThreeAnswerResponse, url_name="answer_three")
 def submit_players_puzzle_three_answer(
     request, player_id: int, wager: int, choices: List[schemas.PuzzleThreePlayerAnswer]
 ):
+    if not choices:
+        raise scoring.InvalidAnswer("Each choice must be answered exactly once.")
+
+    answer_key = key.get_answer_key_for_choice(choices[0].id)
+    answered_correct = scoring.check_lock_in(answer_key, choices)
+
+    delta = wager if answered_correct else -wager
+    player_profile = scoring.apply_wager(
+        game_id=answer_key.game_id,
+        player_id=player_id,
+        stage_id=answer_key.choices[choices[0].id].stage_id,
+        delta=delta,
+    )
+    journal.record(
+        [
+            scoring.answer_event(
+                answer_key,
+                player_id=player_id,
+                choice_id=choices[0].id,
+                wager=wager,
+                correct=answered_correct,
+            )
+        ]
+    )
 
-    first_choice = get_object_or_404(game_models.Choice, id=choices[0].id)
-
-    score_board = get_object_or_404(
-        models.ScoreBoard, game_id=first_choice.stage.game_id, player_id=player_id
+    return schemas.PuzzleThreeAnswerResponse(
+        answered_correct=answered_correct,
+        player_profile=schemas.PlayerProfile.from_player_profile_orm(player_profile),
     )
 
-    player_profile = get_object_or_404(models.PlayerProfile, player_id=player_id)
 
-    answered_correct = None
+@router.post("/answers", response=schemas.BatchAnswerResponse, url_name="answers")
+def submit_players_answers(request, player_id: int, batch: schemas.BatchAnswers):
+    """Answers and wagers of many stages of one game, scored in a single transaction.
+
+    A game may be submitted whole or in chunks, each chunk is validated on its own.
+    """
+    game = get_object_or_404(game_models.Game.objects.only("id"), game_code=batch.game_code)
+    answer_key = key.get_answer_key(game.id)
+
+    results, events = [], []
+    for answer in batch.answers:
+        if answer.choice_id is not None:
+            answered_correct, correct_choice_id = scoring.check_answer(answer_key, answer.choice_id)
+            choice_id = answer.choice_id
+        elif answer.choices:
+            answered_correct = scoring.check_lock_in(answer_key, answer.choices)
+            correct_choice_id = None
+            choice_id = answer.choices[0].id
+        else:
+            raise scoring.InvalidAnswer("Each answer needs a choice_id or a list of choices.")
+
+        event = scoring.answer_event(
+            answer_key,
+            player_id=player_id,
+            choice_id=choice_id,
+            wager=answer.wager,
+            correct=answered_correct,
+        )
+        events.append(event)
+        results.append(
+            schemas.StageResult(
+                stage_id=event.stage_id,
+                answered_correct=answered_correct,
+                correct_choice_id=correct_choice_id,
+                delta=event.delta,
+            )
+        )
 
-    for choice in choices:
-        correct_choice = get_object_or_404(game_models.Choice, id=choice.id)
-        if correct_choice.correct != choice.answer:
-            answered_correct = False
-            score_board.score -= wager
-            player_profile.update_gainers_and_losers(-wager)
-            break
+    if len({result.stage_id for result in results}) != len(results):
+        raise scoring.InvalidAnswer("Each stage can only be answered once.")
 
-    else:
-        answered_correct = True
-        score_board.score += wager
-        player_profile.update_gainers_and_losers(wager)
+    if not results:
+        raise scoring.InvalidAnswer("No answers submitted.")
 
-    score_board.save()
+    player_profile = scoring.apply_wagers(
+        game_id=game.id,
+        player_id=player_id,
+        stage_ids=[result.stage_id for result in results],
+        deltas=[result.delta for result in results],
+    )
+    journal.record(events)
 
-    return schemas.PuzzleThreeAnswerResponse(
-        answered_correct=answered_correct,
+    return schemas.BatchAnswerResponse(
+        results=results,
         player_profile=schemas.PlayerProfile.from_player_profile_orm(player_profile),
     )
 
@@ -190,24 +208,59 @@ def consume_one_star(request, player_id: int):
     return schemas.PlayerProfile.from_player_profile_orm(player_profile=player_profile)
 
 
-from ninja import Schema
-
-
-class Player(Schema):
-    username: str
-
-
-class GameOut(Schema):
-    name: str
-    game_code: str
+@router.get("/scoreboard", response=List[schemas.ScoreboardOut], url_name="scoreboard")
+def get_scoreboard(request, game_code: str, page: int = 1):
+    game = get_object_or_404(
+        game_models.Game.objects.only("id", "name", "game_code"), game_code=game_code
+    )
+    start = (max(page, 1) - 1) * PAGE_SIZE
+    # NOTE: Ranks are computed over the whole game before the page is sliced off.
+    rows = (
+        models.ScoreBoard.objects.filter(game=game)
+        .annotate(rank=Window(Rank(), order_by=F("score").desc(nulls_last=True)))
+        .order_by(F("score").desc(nulls_last=True), "id")
+        .values("rank", "score", "player__username")[start : start + PAGE_SIZE]
+    )
+    scoreboard_game = {"name": game.name, "game_code": game.game_code}
+    return renderers.render(
+        [
+            {
+                "rank": row["rank"],
+                "game": scoreboard_game,
+                "player": {"username": row["player__username"]},
+                "score": row["score"],
+            }
+            for row in rows
+        ]
+    )
 
 
-class ScoreboardOut(Schema):
-    game: GameOut
-    player: Player
-    score: int
+@router.get("/leaderboard", response=List[schemas.LeaderboardEntry], url_name="leaderboard")
+def get_leaderboard(request, page: int = 1):
+    start = (max(page, 1) - 1) * PAGE_SIZE
+    entries = leaderboard.leaderboard.page(start, start + PAGE_SIZE)
 
+    player_ids = [player_id for player_id, _ in entries]
+    usernames = dict(User.objects.filter(id__in=player_ids).values_list("id", "username"))
 
-@router.get("/scoreboard", response=List[ScoreboardOut])
-def get_scoreboard(request, game_code: str):
-    return get_list_or_404(models.ScoreBoard, game__game_code=game_code)
+    return [
+        schemas.LeaderboardEntry(
+            rank=start + index + 1,
+            player_id=player_id,
+            username=usernames.get(player_id, ""),
+            points=points,
+        )
+        for index, (player_id, points) in enumerate(entries)
+    ]
+
+
+@router.get("/leaderboard/me", response=schemas.LeaderboardRank, url_name="leaderboard_me")
+def get_my_leaderboard_rank(request):
+    board = leaderboard.leaderboard
+    player_id = request.auth.id
+    return schemas.LeaderboardRank(
+        player_id=player_id,
+        rank=board.rank(player_id),
+        points=board.points(player_id) or 0,
+        players=board.count(),
+    )
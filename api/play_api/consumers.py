@@ -0,0 +1,76 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.http import Http404
+from jose import JWTError
+from pydantic import ValidationError
+
+from . import rooms, scoring
+
+
+class GameRoomConsumer(AsyncJsonWebsocketConsumer):
+    """Live room of a game, connect to ws/play/<game_code>?token=<jwt>.
+
+    Players send {"type": "answer", "wager": ..., "choice_id": ...} or, for lock in
+    stages, {"type": "answer", "wager": ..., "choices": [...]}. Every score change
+    is broadcast to the room as a "score" event.
+    """
+
+    async def connect(self):
+        query = parse_qs(self.scope["query_string"].decode())
+        token = query.get("token", [""]).pop()
+        game_code = self.scope["url_route"]["kwargs"]["game_code"]
+
+        try:
+            self.player = await database_sync_to_async(rooms.authenticate)(token)
+            game = await database_sync_to_async(rooms.get_room_game)(game_code)
+        except (ValidationError, JWTError, Http404, rooms.User.DoesNotExist):
+            await self.close(code=4401)
+            return
+
+        self.game_id = game.id
+        self.group = rooms.room_group(game.id)
+
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+
+        board = await database_sync_to_async(rooms.get_board)(self.game_id)
+        await self.send_json({"type": "board", "board": board})
+        await self.broadcast("joined", player_id=self.player.id, username=self.player.username)
+
+    async def disconnect(self, code):
+        if not hasattr(self, "group"):
+            return
+        await self.channel_layer.group_discard(self.group, self.channel_name)
+        await self.broadcast("left", player_id=self.player.id, username=self.player.username)
+
+    async def receive_json(self, content, **kwargs):
+        message_type = content.pop("type", None)
+
+        if message_type == "ping":
+            await self.send_json({"type": "pong"})
+            return
+
+        if message_type != "answer":
+            await self.send_json({"type": "error", "detail": "Unknown message type."})
+            return
+
+        try:
+            result, event = await database_sync_to_async(rooms.submit_answer)(
+                game_id=self.game_id, player_id=self.player.id, message=content
+            )
+        except (scoring.InvalidAnswer, ValidationError, Http404) as e:
+            await self.send_json({"type": "error", "detail": str(e)})
+            return
+
+        await self.send_json({"type": "answer.result", **result})
+        await self.broadcast("score", username=self.player.username, **event)
+
+    async def broadcast(self, event_type, **event):
+        await self.channel_layer.group_send(
+            self.group, {"type": "room.event", "event": {"type": event_type, **event}}
+        )
+
+    async def room_event(self, message):
+        await self.send_json(message["event"])
@@ -0,0 +1,143 @@
+import copy
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+
+from core.cache import cache_lock
+from core.tracing import traced
+from game_api import models as game_models
+
+# NOTE: Bump when StageOut or the assembly below changes so old payloads are ignored.
+# The assembled dicts are checked against StageOut in play_api.tests.
+PAYLOAD_VERSION = 1
+PAYLOAD_KEY = "play:game-payload:{game_id}:v{version}"
+PAYLOAD_TTL = settings.PLAY_GAME_PAYLOAD_TTL
+
+STAGE_FIELDS = ("id", "puzzle_type", "question")
+CHOICE_FIELDS = (
+    "id",
+    "stage_id",
+    "correct",
+    "spotify_asset__name",
+    "spotify_asset__spotify_uri",
+    "spotify_asset__spotify_type",
+    "spotify_asset__image",
+    "spotify_asset__preview",
+)
+
+
+def split_choices(choices):
+    half = len(choices) // 2
+    return choices[:half], choices[half:]
+
+
+@traced("play.load_stages")
+def load_stages(game):
+    """Stage and choice rows of a game, always two queries."""
+    stages = list(game.stage_set.values(*STAGE_FIELDS).order_by("id"))
+    if not stages:
+        raise Http404("No Stage matches the given query.")
+
+    choices = game_models.Choice.objects.filter(stage__game_id=game.id).values(*CHOICE_FIELDS)
+    stage_choices = {stage["id"]: [] for stage in stages}
+    for choice in choices.order_by("id"):
+        stage_choices[choice["stage_id"]].append(choice)
+
+    return [(stage, stage_choices[stage["id"]]) for stage in stages]
+
+
+def build_choice(row):
+    """A ChoiceOut dict straight from a CHOICE_FIELDS row."""
+    asset = {
+        field.split("__").pop(): value
+        for field, value in row.items()
+        if field.startswith("spotify_asset__")
+    }
+    return {"id": row["id"], "spotify_asset": asset, "correct": row["correct"]}
+
+
+def build_stage(stage, stage_choices):
+    choices = []
+
+    if stage["puzzle_type"] == 1:
+        for row in stage_choices:
+            choices.append(build_choice(row))
+        random.shuffle(choices)
+
+    elif stage["puzzle_type"] == 2:
+        for row in stage_choices:
+            choices.append(build_choice(row))
+
+        # NOTE: Used to make sure all the assets have the same preview.
+        # This is to make sure no one can find the correct choice
+        # by snooping in on the mp3 id.
+        correct = list(filter(lambda item: item["correct"] == True, choices))
+        assert len(correct) == 1
+        target_preview = correct.pop()["spotify_asset"]["preview"]
+        for choice in choices:
+            choice["spotify_asset"]["preview"] = target_preview
+
+        # random.shuffle(choices)
+    elif stage["puzzle_type"] == 3:
+        # TODO: FIXME: HACK: super hacky. Need to fix a bug on the puzzle three creation
+        # NOTE: Need to check if two assets have the same image before
+        # creating stage three assets.
+        # Songs maybe different with the same album art.
+
+        for front, back in zip(*split_choices(stage_choices)):
+            choice_out = build_choice(front)
+
+            if front["correct"] is False:
+                # swap the images on the wrong answers.
+                choice_out["spotify_asset"]["image"] = back["spotify_asset__image"]
+
+            choices.append(choice_out)
+
+    return {"puzzle_type": stage["puzzle_type"], "question": stage["question"], "choices": choices}
+
+
+def build_stages(game):
+    """StageOut dicts of a game, built from rows without going through the schemas."""
+    return [build_stage(stage, stage_choices) for stage, stage_choices in load_stages(game)]
+
+
+def payload_key(game_id):
+    return PAYLOAD_KEY.format(game_id=game_id, version=PAYLOAD_VERSION)
+
+
+def get_stages_payload(game):
+    """Assembled stages of a game as plain dicts.
+
+    Finished games never change, so their payload is cached and shared by every
+    player. Only one request per game assembles a missing payload, the others
+    wait for it. Games still being processed are always assembled fresh.
+    """
+    if not game.processed:
+        return build_stages(game)
+
+    key = payload_key(game.id)
+    payload = cache.get(key)
+
+    if payload is None:
+        with cache_lock(f"{key}:lock", timeout=30, wait=10):
+            payload = cache.get(key)
+            if payload is None:
+                payload = build_stages(game)
+                cache.set(key, payload, timeout=PAYLOAD_TTL)
+
+    return payload
+
+
+def personalize_stages(payload):
+    """Copy of a cached payload with the per player choice order applied."""
+    stages = copy.deepcopy(payload)
+    for stage in stages:
+        if stage["puzzle_type"] == 1:
+            random.shuffle(stage["choices"])
+    return stages
+
+
+def invalidate_stages_payload(game_id):
+    cache.delete(payload_key(game_id))
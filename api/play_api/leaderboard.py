@@ -0,0 +1,123 @@
+"""All time leaderboard of player points.
+
+Kept in a redis sorted set when LEADERBOARD_REDIS_URL is set. Without redis a
+per process stand-in with the same interface is loaded from PlayerProfile on
+first use. Both answer rank lookups in O(log n).
+"""
+import threading
+from bisect import bisect_left, insort
+from typing import Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from . import models
+
+LEADERBOARD_KEY = "play:leaderboard"
+LEADERBOARD_REDIS_URL = settings.LEADERBOARD_REDIS_URL
+
+
+class RedisLeaderboard:
+    def __init__(self, url: str, key: str = LEADERBOARD_KEY):
+        import redis
+
+        self.redis = redis.Redis.from_url(url)
+        self.key = key
+
+    def set(self, player_id: int, points: int):
+        self.redis.zadd(self.key, {player_id: points})
+
+    def rank(self, player_id: int) -> Optional[int]:
+        rank = self.redis.zrevrank(self.key, player_id)
+        return None if rank is None else rank + 1
+
+    def points(self, player_id: int) -> Optional[int]:
+        points = self.redis.zscore(self.key, player_id)
+        return None if points is None else int(points)
+
+    def page(self, start: int, stop: int) -> List[Tuple[int, int]]:
+        entries = self.redis.zrevrange(self.key, start, stop - 1, withscores=True)
+        return [(int(player_id), int(points)) for player_id, points in entries]
+
+    def count(self) -> int:
+        return self.redis.zcard(self.key)
+
+    def replace(self, entries: Iterable[Tuple[int, int]]):
+        staging = f"{self.key}:staging"
+        pipeline = self.redis.pipeline()
+        pipeline.delete(staging)
+        for player_id, points in entries:
+            pipeline.zadd(staging, {player_id: points})
+        pipeline.execute()
+        # NOTE: rename swaps the rebuilt board in atomically, if it isn't empty.
+        if self.redis.exists(staging):
+            self.redis.rename(staging, self.key)
+        else:
+            self.redis.delete(self.key)
+
+
+class LocalLeaderboard:
+    """In process stand-in for the redis sorted set."""
+
+    def __init__(self):
+        self.scores = {}
+        # (-points, player_id) pairs, best first.
+        self.ranking = []
+        self.lock = threading.Lock()
+        self.loaded = False
+
+    def _load(self):
+        if not self.loaded:
+            self.replace(models.PlayerProfile.objects.values_list("player_id", "points"))
+
+    def set(self, player_id: int, points: int):
+        self._load()
+        with self.lock:
+            previous = self.scores.get(player_id)
+            if previous is not None:
+                del self.ranking[bisect_left(self.ranking, (-previous, player_id))]
+            self.scores[player_id] = points
+            insort(self.ranking, (-points, player_id))
+
+    def rank(self, player_id: int) -> Optional[int]:
+        self._load()
+        with self.lock:
+            points = self.scores.get(player_id)
+            if points is None:
+                return None
+            return bisect_left(self.ranking, (-points, player_id)) + 1
+
+    def points(self, player_id: int) -> Optional[int]:
+        self._load()
+        return self.scores.get(player_id)
+
+    def page(self, start: int, stop: int) -> List[Tuple[int, int]]:
+        self._load()
+        with self.lock:
+            return [(player_id, -points) for points, player_id in self.ranking[start:stop]]
+
+    def count(self) -> int:
+        self._load()
+        return len(self.scores)
+
+    def replace(self, entries: Iterable[Tuple[int, int]]):
+        scores = dict(entries)
+        with self.lock:
+            self.scores = scores
+            self.ranking = sorted((-points, player_id) for player_id, points in scores.items())
+            self.loaded = True
+
+
+if LEADERBOARD_REDIS_URL:
+    leaderboard = RedisLeaderboard(LEADERBOARD_REDIS_URL)
+else:
+    leaderboard = LocalLeaderboard()
+
+
+def update_player(player_id: int, points: int):
+    """Set a players points on the leaderboard once the current transaction commits."""
+    transaction.on_commit(lambda: leaderboard.set(player_id, points))
+
+
+def rebuild():
+    leaderboard.replace(models.PlayerProfile.objects.values_list("player_id", "points").iterator())
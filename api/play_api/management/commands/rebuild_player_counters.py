@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from play_api import leaderboard, scoring
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the points and stars counters of player profiles from their scoreboards, "
+        "then reload the all time leaderboard from the counters."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("player_ids", nargs="*", type=int, help="Only rebuild these players.")
+
+    def handle(self, *args, player_ids, **options):
+        updated = scoring.rebuild_player_counters(player_ids=player_ids or None)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt counters of {updated} player profiles."))
+
+        leaderboard.rebuild()
+        self.stdout.write(self.style.SUCCESS("Reloaded the leaderboard."))
@@ -0,0 +1,94 @@
+import asyncio
+import time
+import tracemalloc
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.http import Http404
+
+from auth_api import jwt, schemas as auth_schemas
+from core.asgi import application
+from play_api import rooms
+
+
+class Command(BaseCommand):
+    help = (
+        "Fan-out check of one game room, run inside this process. Opens many in-memory "
+        "websockets as one player and reports how long connecting and a broadcast to the "
+        "whole room take, and the memory held per socket. Every join is broadcast to the "
+        "sockets already open, so connecting grows with the square of the sockets. This is "
+        "not a load test of an ASGI server, no real connections or workers are involved."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("game_code")
+        parser.add_argument("--sockets", type=int, default=1000)
+        parser.add_argument("--batch", type=int, default=100, help="Sockets connected at once.")
+        parser.add_argument(
+            "--player-id", type=int, help="Connect as this player, the publisher by default."
+        )
+
+    def handle(self, *args, game_code, sockets, batch, player_id, **options):
+        try:
+            game = rooms.get_room_game(game_code)
+        except Http404:
+            raise CommandError(f"No game with game code {game_code}.")
+
+        player = User.objects.get(id=player_id or game.publisher_id)
+        verified_user = auth_schemas.User.from_orm(player)
+        token = jwt.create_access_token(verified_user=verified_user).access_token
+
+        report = async_to_sync(self.run)(game, game_code, token, sockets, batch)
+        for name, value in report.items():
+            self.stdout.write(f"{name}: {value}")
+
+    async def run(self, game, game_code, token, sockets, batch):
+        path = f"/ws/play/{game_code}?token={token}"
+        headers = [(b"origin", b"http://localhost")]
+        communicators = []
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        for offset in range(0, sockets, batch):
+            opened = [
+                WebsocketCommunicator(application, path, headers=headers)
+                for _ in range(min(batch, sockets - offset))
+            ]
+            results = await asyncio.gather(
+                *(communicator.connect(timeout=30) for communicator in opened)
+            )
+            for communicator, (connected, _) in zip(opened, results):
+                if not connected:
+                    raise CommandError("A websocket was refused, see the room consumer.")
+                communicators.append(communicator)
+        connect_seconds = time.perf_counter() - started
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # NOTE: Drain the board and join messages so only the broadcast is timed.
+        for communicator in communicators:
+            while not await communicator.receive_nothing(timeout=0.01):
+                await communicator.receive_json_from()
+
+        started = time.perf_counter()
+        await get_channel_layer().group_send(
+            rooms.room_group(game.id),
+            {"type": "room.event", "event": {"type": "ping"}},
+        )
+        await asyncio.gather(
+            *(communicator.receive_json_from(timeout=30) for communicator in communicators)
+        )
+        broadcast_seconds = time.perf_counter() - started
+
+        await asyncio.gather(*(communicator.disconnect() for communicator in communicators))
+
+        return {
+            "sockets": len(communicators),
+            "connect seconds": round(connect_seconds, 3),
+            "connects per second": round(len(communicators) / connect_seconds, 1),
+            "broadcast seconds": round(broadcast_seconds, 3),
+            "memory per socket KiB": round(memory / len(communicators) / 1024, 1),
+        }
@@ -0,0 +1,48 @@
+# Generated by Django 4.0 on 2026-10-19 05:08
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_player_counters(apps, schema_editor):
+    PlayerProfile = apps.get_model("play_api", "PlayerProfile")
+    ScoreBoard = apps.get_model("play_api", "ScoreBoard")
+
+    points = (
+        ScoreBoard.objects.filter(player_id=OuterRef("player_id"))
+        .values("player_id")
+        .annotate(total=Sum("score"))
+        .values("total")
+    )
+    stars = (
+        ScoreBoard.objects.filter(game__publisher_id=OuterRef("player_id"))
+        .values("game__publisher_id")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    PlayerProfile.objects.update(
+        points=Coalesce(Subquery(points), Value(0)),
+        stars=Coalesce(Subquery(stars), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("play_api", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="playerprofile",
+            name="points",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="playerprofile",
+            name="stars",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_player_counters, migrations.RunPython.noop),
+    ]
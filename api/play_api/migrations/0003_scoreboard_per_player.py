@@ -0,0 +1,30 @@
+# Generated by Django 4.0 on 2026-10-19 05:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("game_api", "0001_initial"),
+        ("play_api", "0002_player_counters"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="scoreboard",
+            name="game",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, to="game_api.game"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="scoreboard",
+            index=models.Index(fields=["game", "-score"], name="scoreboard_game_score"),
+        ),
+        migrations.AddConstraint(
+            model_name="scoreboard",
+            constraint=models.UniqueConstraint(fields=("game", "player"), name="players_score"),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.0.10 on 2026-10-19 05:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("play_api", "0003_scoreboard_per_player"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="scoreboard",
+            index=models.Index(fields=["player", "score"], name="scoreboard_player_score"),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.0.10 on 2026-10-19 06:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("play_api", "0004_scoreboard_player_index"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="scoreboard",
+            name="player",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.0.10 on 2026-10-19 06:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("game_api", "0004_covered_foreign_keys"),
+        ("play_api", "0005_covered_foreign_keys"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnsweredStage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "scoreboard",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="play_api.scoreboard",
+                    ),
+                ),
+                (
+                    "stage",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="game_api.stage"
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="answeredstage",
+            constraint=models.UniqueConstraint(
+                fields=("scoreboard", "stage"), name="answered_once"
+            ),
+        ),
+    ]
@@ -1,18 +1,37 @@
 from django.contrib.auth.models import User
 from django.db import models
-from django.db.models import Sum
+from django.db.models import F
 
 from game_api.models import Game
 
 
 class ScoreBoard(models.Model):
-    game = models.OneToOneField(Game, on_delete=models.CASCADE)
-    player = models.ForeignKey(User, on_delete=models.CASCADE)
+    game = models.ForeignKey(Game, on_delete=models.CASCADE)
+    # NOTE: Indexed by scoreboard_player_score, which leads with the player.
+    player = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     score = models.BigIntegerField(null=True)
 
-    constraints = models.constraints.UniqueConstraint(
-        fields=["game", "player"], name="players_score"
-    )
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["game", "player"], name="players_score"),
+        ]
+        indexes = [
+            models.Index(fields=["game", "-score"], name="scoreboard_game_score"),
+            models.Index(fields=["player", "score"], name="scoreboard_player_score"),
+        ]
+
+
+class AnsweredStage(models.Model):
+    """A stage a player was scored on, a stage is only ever scored once per scoreboard."""
+
+    # NOTE: Indexed by answered_once, which leads with the scoreboard.
+    scoreboard = models.ForeignKey(ScoreBoard, on_delete=models.CASCADE, db_index=False)
+    stage = models.ForeignKey("game_api.Stage", on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["scoreboard", "stage"], name="answered_once"),
+        ]
 
 
 class PlayerProfile(models.Model):
@@ -20,33 +39,15 @@ class PlayerProfile(models.Model):
     consumed_stars = models.IntegerField(default=0)
     biggest_gainer = models.BigIntegerField(default=0)
     biggest_loser = models.BigIntegerField(default=0)
-
-    def update_gainers_and_losers(self, wager):
-        if wager > self.biggest_gainer:
-            self.biggest_gainer = wager
-
-        if wager < self.biggest_loser:
-            self.biggest_loser = wager
-
-        self.save()
-
-    @property
-    def points(self):
-        points = (
-            ScoreBoard.objects.filter(player=self.player).aggregate(Sum("score")).get("score__sum")
-        )
-        if points is None:
-            return 0
-        return points
-
-    @property
-    def stars(self):
-        return ScoreBoard.objects.filter(game__publisher=self.player).count()
+    # NOTE: Counters kept in step with ScoreBoard by play_api.scoring and play_api.signals.
+    # Rebuild them from the scoreboards with `manage.py rebuild_player_counters`.
+    points = models.BigIntegerField(default=0)
+    stars = models.IntegerField(default=0)
 
     @property
     def available_stars(self):
         return self.stars - self.consumed_stars
 
     def consume_star(self):
-        self.consumed_stars += 1
-        self.save()
+        PlayerProfile.objects.filter(pk=self.pk).update(consumed_stars=F("consumed_stars") + 1)
+        self.refresh_from_db(fields=["consumed_stars"])
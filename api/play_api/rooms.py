@@ -0,0 +1,97 @@
+"""Game rooms, the players of one game_code connected over websockets.
+
+Everything here is synchronous and socket agnostic, consumers.GameRoomConsumer
+calls it from a worker thread.
+"""
+from django.contrib.auth.models import User
+from django.shortcuts import get_object_or_404
+
+from analytics import journal
+from auth_api import jwt, schemas as auth_schemas
+from game_api import models as game_models
+
+from . import answer_key, models, schemas, scoring
+
+ROOM_GROUP = "game.{game_id}"
+BOARD_SIZE = 10
+
+
+def room_group(game_id: int) -> str:
+    return ROOM_GROUP.format(game_id=game_id)
+
+
+def authenticate(token: str) -> User:
+    jwt_token = auth_schemas.JsonWebToken(access_token=token, token_type="Bearer")
+    decoded_user = jwt.verify_access_token(token=jwt_token)
+    return User.objects.only("id", "username").get(id=decoded_user.id)
+
+
+def get_room_game(game_code: str) -> game_models.Game:
+    return get_object_or_404(game_models.Game.objects.only("id"), game_code=game_code)
+
+
+def get_board(game_id: int):
+    scoreboards = (
+        models.ScoreBoard.objects.filter(game_id=game_id)
+        .order_by("-score", "id")
+        .values("player_id", "player__username", "score")[:BOARD_SIZE]
+    )
+    return [
+        {"player_id": row["player_id"], "username": row["player__username"], "score": row["score"]}
+        for row in scoreboards
+    ]
+
+
+def get_rank(game_id: int, score: int) -> int:
+    # NOTE: Served by the (game, -score) index, the same rank the scoreboard endpoint reports.
+    return models.ScoreBoard.objects.filter(game_id=game_id, score__gt=score).count() + 1
+
+
+def submit_answer(*, game_id: int, player_id: int, message: dict):
+    """Score a room answer message, returns the players result and the event for the room."""
+    answer = schemas.StageAnswer(**message)
+    key = answer_key.get_answer_key(game_id)
+
+    correct_choice_id = None
+    if answer.choice_id is not None:
+        answered_correct, correct_choice_id = scoring.check_answer(key, answer.choice_id)
+        choice_id = answer.choice_id
+    elif answer.choices:
+        answered_correct = scoring.check_lock_in(key, answer.choices)
+        choice_id = answer.choices[0].id
+    else:
+        raise scoring.InvalidAnswer("Each answer needs a choice_id or a list of choices.")
+
+    delta = answer.wager if answered_correct else -answer.wager
+    player_profile = scoring.apply_wager(
+        game_id=game_id, player_id=player_id, stage_id=key.choices[choice_id].stage_id, delta=delta
+    )
+    journal.record(
+        [
+            scoring.answer_event(
+                key,
+                player_id=player_id,
+                choice_id=choice_id,
+                wager=answer.wager,
+                correct=answered_correct,
+            )
+        ]
+    )
+    score = models.ScoreBoard.objects.filter(game_id=game_id, player_id=player_id).values_list(
+        "score", flat=True
+    )[0]
+
+    result = {
+        "answered_correct": answered_correct,
+        "correct_choice_id": correct_choice_id,
+        "delta": delta,
+        "score": score,
+        "points": player_profile.points,
+    }
+    event = {
+        "player_id": player_id,
+        "delta": delta,
+        "score": score,
+        "rank": get_rank(game_id, score),
+    }
+    return result, event
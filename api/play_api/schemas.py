@@ -75,3 +75,57 @@ class PuzzleThreePlayerAnswer(Schema):
 class PuzzleThreeAnswerResponse(Schema):
     answered_correct: bool
     player_profile: PlayerProfile
+
+
+class StageAnswer(Schema):
+    wager: int
+    # Trivia and find the track stages answer with one choice, lock in stages with a list.
+    choice_id: Optional[int]
+    choices: Optional[List[PuzzleThreePlayerAnswer]]
+
+
+class BatchAnswers(Schema):
+    game_code: str
+    answers: List[StageAnswer]
+
+
+class StageResult(Schema):
+    stage_id: int
+    answered_correct: bool
+    correct_choice_id: Optional[int]
+    delta: int
+
+
+class BatchAnswerResponse(Schema):
+    results: List[StageResult]
+    player_profile: PlayerProfile
+
+
+class Player(Schema):
+    username: str
+
+
+class ScoreboardGame(Schema):
+    name: str
+    game_code: str
+
+
+class ScoreboardOut(Schema):
+    rank: int
+    game: ScoreboardGame
+    player: Player
+    score: int
+
+
+class LeaderboardEntry(Schema):
+    rank: int
+    player_id: int
+    username: str
+    points: int
+
+
+class LeaderboardRank(Schema):
+    player_id: int
+    rank: Optional[int]
+    points: int
+    players: int
@@ -0,0 +1,141 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.http import Http404
+
+from analytics.models import AnswerEvent
+
+from . import leaderboard, models
+from .answer_key import AnswerKey
+
+
+class InvalidAnswer(Exception):
+    pass
+
+
+def check_answer(answer_key: AnswerKey, choice_id: int):
+    """Returns whether a trivia or find the track answer is correct and the correct choice id."""
+    players_choice = answer_key.choices.get(choice_id)
+
+    if players_choice is None:
+        raise InvalidAnswer("Choice does not belong to this game.")
+
+    if players_choice.puzzle_type not in [1, 2]:
+        raise InvalidAnswer("Lock in stages are answered with a list of choices.")
+
+    return players_choice.correct, answer_key.correct[players_choice.stage_id]
+
+
+def check_lock_in(answer_key: AnswerKey, choices) -> bool:
+    """Whether every shown choice of a lock in stage was answered correctly.
+
+    choices are the players answers, an id and an answer for each front choice of the stage.
+    """
+    answers = {choice.id: choice.answer for choice in choices}
+    if not answers or len(answers) != len(choices):
+        raise InvalidAnswer("Each choice must be answered exactly once.")
+
+    stored_choices = [answer_key.choices.get(choice_id) for choice_id in answers]
+
+    if None in stored_choices or len({choice.stage_id for choice in stored_choices}) != 1:
+        raise InvalidAnswer("Choices must belong to the same stage.")
+
+    if stored_choices[0].puzzle_type != 3:
+        raise InvalidAnswer("Only lock in stages are answered with a list of choices.")
+
+    # NOTE: Players see the front choice of each pair, all of them must be answered.
+    fronts = {front for front, _ in answer_key.lock_in[stored_choices[0].stage_id]}
+    if set(answers) != fronts:
+        raise InvalidAnswer("Each choice must be answered exactly once.")
+
+    return all(
+        stored_choice.correct == answer
+        for stored_choice, answer in zip(stored_choices, answers.values())
+    )
+
+
+def answer_event(
+    answer_key: AnswerKey, *, player_id: int, choice_id: int, wager: int, correct: bool
+) -> AnswerEvent:
+    """Journal entry of an answer, choice_id is any choice of the stage for lock in stages."""
+    choice = answer_key.choices[choice_id]
+    return AnswerEvent(
+        game_id=answer_key.game_id,
+        stage_id=choice.stage_id,
+        player_id=player_id,
+        puzzle_type=choice.puzzle_type,
+        choice_id=choice_id if choice.puzzle_type != 3 else None,
+        wager=wager,
+        delta=wager if correct else -wager,
+        correct=correct,
+    )
+
+
+def apply_wager(*, game_id: int, player_id: int, stage_id: int, delta: int) -> models.PlayerProfile:
+    return apply_wagers(game_id=game_id, player_id=player_id, stage_ids=[stage_id], deltas=[delta])
+
+
+def apply_wagers(*, game_id: int, player_id: int, stage_ids, deltas) -> models.PlayerProfile:
+    """Add deltas to a players score for a game, their points and their biggest gain and loss.
+
+    Every change is a single UPDATE computed by the database, so concurrent
+    answers never overwrite each other. The stages are recorded as answered in
+    the same transaction, raises InvalidAnswer if any already was, by this or an
+    earlier request.
+    """
+    total = sum(deltas)
+
+    try:
+        # NOTE: A stage answered before fails the insert and rolls the whole change back.
+        with transaction.atomic():
+            scoreboard = models.ScoreBoard.objects.filter(game_id=game_id, player_id=player_id)
+            scoreboard_id = scoreboard.values_list("id", flat=True).first()
+            if scoreboard_id is None:
+                raise Http404("Scoreboard not found.")
+
+            models.AnsweredStage.objects.bulk_create(
+                models.AnsweredStage(scoreboard_id=scoreboard_id, stage_id=stage_id)
+                for stage_id in stage_ids
+            )
+            models.ScoreBoard.objects.filter(pk=scoreboard_id).update(
+                score=Coalesce(F("score"), Value(0)) + total
+            )
+
+            updated = models.PlayerProfile.objects.filter(player_id=player_id).update(
+                points=F("points") + total,
+                biggest_gainer=Greatest(F("biggest_gainer"), Value(max(deltas))),
+                biggest_loser=Least(F("biggest_loser"), Value(min(deltas))),
+            )
+            if not updated:
+                raise Http404("Player profile not found.")
+
+            player_profile = models.PlayerProfile.objects.get(player_id=player_id)
+            leaderboard.update_player(player_id, player_profile.points)
+            return player_profile
+    except IntegrityError:
+        raise InvalidAnswer("Each stage can only be answered once.")
+
+
+def rebuild_player_counters(player_ids=None) -> int:
+    """Recompute points and stars of player profiles from their scoreboards in one UPDATE."""
+    points = (
+        models.ScoreBoard.objects.filter(player_id=OuterRef("player_id"))
+        .values("player_id")
+        .annotate(total=Sum("score"))
+        .values("total")
+    )
+    stars = (
+        models.ScoreBoard.objects.filter(game__publisher_id=OuterRef("player_id"))
+        .values("game__publisher_id")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+
+    player_profiles = models.PlayerProfile.objects.all()
+    if player_ids is not None:
+        player_profiles = player_profiles.filter(player_id__in=player_ids)
+
+    return player_profiles.update(
+        points=Coalesce(Subquery(points), Value(0)),
+        stars=Coalesce(Subquery(stars), Value(0)),
+    )
@@ -1,13 +1,49 @@
-from django.db.models.signals import post_save
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
-from profile_api.models import Profile
+from game_api.models import Game
+
+from . import answer_key, games, leaderboard
+from .models import PlayerProfile, ScoreBoard
+
+
+@receiver(post_delete, sender=Game)
+def invalidate_game_payload(sender, instance, **kwargs):
+    games.invalidate_stages_payload(instance.id)
+    answer_key.invalidate_answer_key(instance.id)
+
 
-from .models import PlayerProfile
+def _publisher_profile(scoreboard):
+    publisher_id = Game.objects.filter(id=scoreboard.game_id).values("publisher_id")
+    return PlayerProfile.objects.filter(player_id=Subquery(publisher_id))
 
 
-@receiver(post_save, sender=Profile)
-def create_player_profile(sender, instance, created, **kwargs):
+@receiver(post_save, sender=ScoreBoard)
+def add_publisher_star(sender, instance, created, **kwargs):
+    # NOTE: Every player of a game earns its publisher a star.
     if not created:
         return
-    PlayerProfile.objects.create(player_id=instance.user_id)
+    _publisher_profile(instance).update(stars=F("stars") + 1)
+
+
+@receiver(pre_delete, sender=ScoreBoard)
+def remove_scoreboard_counters(sender, instance, **kwargs):
+    # NOTE: Runs before the delete so the stored score is read, not the one in memory.
+    score = ScoreBoard.objects.filter(pk=instance.pk).values("score")
+    PlayerProfile.objects.filter(player_id=instance.player_id).update(
+        points=F("points") - Coalesce(Subquery(score), Value(0))
+    )
+    _publisher_profile(instance).update(stars=F("stars") - 1)
+
+    transaction.on_commit(partial(_sync_leaderboard, player_id=instance.player_id))
+
+
+def _sync_leaderboard(*, player_id):
+    points = PlayerProfile.objects.filter(player_id=player_id).values_list("points", flat=True)
+    for player_points in points:
+        leaderboard.leaderboard.set(player_id, player_points)
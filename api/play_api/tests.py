@@ -1,3 +1,511 @@
-from django.test import TestCase
+import io
 
-# Create your tests here.
+import pytest
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+import auth_api
+from analytics import journal
+from analytics.models import AnswerEvent
+from assets.models import SpotifyAsset
+from auth_api import jwt
+from game_api import models as game_models
+
+from . import answer_key, games, leaderboard, models, rooms, schemas, scoring
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    answer_key.local_keys.clear()
+    yield
+    cache.clear()
+    answer_key.local_keys.clear()
+    journal.buffer.reset()
+
+
+@pytest.fixture
+def player(db, django_user_model):
+    return django_user_model.objects.create_user(id=1, username="run2dos")
+
+
+@pytest.fixture
+def headers(player):
+    verified_user = auth_api.schemas.User.from_orm(player)
+    token = jwt.create_access_token(verified_user=verified_user)
+    return {"HTTP_AUTHORIZATION": f"Bearer {token.access_token}"}
+
+
+@pytest.fixture
+def create_game(player):
+    def make_game(*, stages_per_type=5):
+        assets = SpotifyAsset.objects.bulk_create(
+            SpotifyAsset(
+                name=f"track {index}",
+                spotify_uri=f"track{index}",
+                spotify_type="track",
+                image=f"/image/{index}",
+                preview=f"/preview/{index}",
+            )
+            for index in range(10)
+        )
+        game = game_models.Game.objects.create(
+            game_code="GAMECODE", publisher=player, task_id="task", processed=True, name="game"
+        )
+
+        layouts = {
+            1: [True, False, False, False],
+            2: [False] * 4 + [True] + [False] * 5,
+            3: [True, False, True, False] * 2,
+        }
+        for puzzle_type, layout in layouts.items():
+            for _ in range(stages_per_type):
+                stage = game.stage_set.create(puzzle_type=puzzle_type, question="question")
+                game_models.Choice.objects.bulk_create(
+                    game_models.Choice(stage=stage, spotify_asset=asset, correct=correct)
+                    for asset, correct in zip(assets, layout)
+                )
+        return game
+
+    return make_game
+
+
+def test_get_game_by_gamecode_query_budget(
+    client, headers, player, create_game, django_assert_max_num_queries
+):
+    game = create_game(stages_per_type=5)
+    route = reverse("api-1.0.0:play")
+
+    # auth, game, player, scoreboard get_or_create, publisher star,
+    # stages and choices with assets, answer key.
+    with django_assert_max_num_queries(12):
+        response = client.get(
+            route, {"game_code": game.game_code, "player_id": player.id}, **headers
+        )
+
+    assert response.status_code == 200
+    stages = response.json()["stages"]
+    assert len(stages) == 15
+    assert models.ScoreBoard.objects.filter(game=game, player=player).exists()
+
+    for stage in filter(lambda stage: stage["puzzle_type"] == 2, stages):
+        previews = {choice["spotify_asset"]["preview"] for choice in stage["choices"]}
+        assert previews == {"/preview/4"}
+
+    for stage in filter(lambda stage: stage["puzzle_type"] == 3, stages):
+        assert len(stage["choices"]) == 4
+
+    # NOTE: The payload skips the response schema, it must still match it exactly.
+    assert schemas.ActiveGame(**response.json()).dict() == response.json()
+
+
+def test_game_payload_cached_until_game_deleted(create_game, django_assert_num_queries):
+    game = create_game(stages_per_type=2)
+    payload = games.get_stages_payload(game)
+
+    with django_assert_num_queries(0):
+        assert games.get_stages_payload(game) == payload
+
+    personalized = games.personalize_stages(payload)
+    assert [stage["question"] for stage in personalized] == [stage["question"] for stage in payload]
+    assert personalized is not payload
+
+    game_id = game.id
+    game.delete()
+    assert cache.get(games.payload_key(game_id)) is None
+
+
+@pytest.fixture
+def scoreboard(player, create_game):
+    game = create_game(stages_per_type=1)
+    models.PlayerProfile.objects.create(player=player, biggest_gainer=5, biggest_loser=-5)
+    scoreboard = models.ScoreBoard.objects.create(game=game, player=player, score=0)
+    # NOTE: Loading the game warms the answer key, see get_game_by_gamecode.
+    answer_key.get_answer_key(game.id)
+    return scoreboard
+
+
+def answer_choice(scoreboard, *, puzzle_type, correct):
+    stage = scoreboard.game.stage_set.get(puzzle_type=puzzle_type)
+    return stage.choice_set.filter(correct=correct).first()
+
+
+def test_submit_players_answer(client, headers, player, scoreboard, django_assert_max_num_queries):
+    route = reverse("api-1.0.0:answer")
+    choice = answer_choice(scoreboard, puzzle_type=1, correct=True)
+
+    with django_assert_max_num_queries(10):
+        response = client.post(
+            f"{route}?player_id={player.id}&choice_id={choice.id}&wager=20", **headers
+        )
+
+    assert response.status_code == 200
+    assert response.json()["answered_correct"] is True
+    assert response.json()["correct_choice"]["id"] == choice.id
+
+    wrong = answer_choice(scoreboard, puzzle_type=2, correct=False)
+    response = client.post(
+        f"{route}?player_id={player.id}&choice_id={wrong.id}&wager=30", **headers
+    )
+    assert response.json()["answered_correct"] is False
+    assert response.json()["players_choice"]["id"] == wrong.id
+
+    scoreboard.refresh_from_db()
+    assert scoreboard.score == -10
+    player_profile = models.PlayerProfile.objects.get(player=player)
+    assert player_profile.biggest_gainer == 20
+    assert player_profile.biggest_loser == -30
+
+
+def test_submit_players_puzzle_three_answer(
+    client, headers, player, scoreboard, django_assert_max_num_queries
+):
+    route = reverse("api-1.0.0:answer_three")
+    stage = scoreboard.game.stage_set.get(puzzle_type=3)
+    fronts = stage.choice_set.order_by("id")[:4]
+    choices = [{"id": choice.id, "answer": choice.correct} for choice in fronts]
+
+    # NOTE: Answering only some of the choices can't win the wager.
+    response = client.post(
+        f"{route}?player_id={player.id}&wager=10",
+        choices[1:],
+        content_type="application/json",
+        **headers,
+    )
+    assert response.status_code == 400
+
+    with django_assert_max_num_queries(10):
+        response = client.post(
+            f"{route}?player_id={player.id}&wager=40",
+            choices,
+            content_type="application/json",
+            **headers,
+        )
+
+    assert response.status_code == 200
+    assert response.json()["answered_correct"] is True
+
+    # NOTE: The stage is answered, a second try is not scored again.
+    choices[0]["answer"] = not choices[0]["answer"]
+    response = client.post(
+        f"{route}?player_id={player.id}&wager=10",
+        choices,
+        content_type="application/json",
+        **headers,
+    )
+    assert response.status_code == 400
+
+    scoreboard.refresh_from_db()
+    assert scoreboard.score == 40
+
+
+def test_submit_players_puzzle_three_answer_rejects_mixed_stages(
+    client, headers, player, scoreboard
+):
+    route = reverse("api-1.0.0:answer_three")
+    lock_in = scoreboard.game.stage_set.get(puzzle_type=3).choice_set.first()
+    trivia = scoreboard.game.stage_set.get(puzzle_type=1).choice_set.first()
+    choices = [{"id": lock_in.id, "answer": True}, {"id": trivia.id, "answer": True}]
+
+    response = client.post(
+        f"{route}?player_id={player.id}&wager=10",
+        choices,
+        content_type="application/json",
+        **headers,
+    )
+
+    assert response.status_code == 400
+    scoreboard.refresh_from_db()
+    assert scoreboard.score == 0
+
+
+def test_answer_key(scoreboard, django_assert_num_queries):
+    game = scoreboard.game
+    answer_key.local_keys.clear()
+    key = answer_key.get_answer_key(game.id)
+
+    trivia = game.stage_set.get(puzzle_type=1)
+    correct = trivia.choice_set.get(correct=True)
+    assert key.correct[trivia.id] == correct.id
+    assert key.choices[correct.id] == (trivia.id, 1, True)
+    assert (
+        key.assets[correct.id]["spotify_asset"]["spotify_uri"] == correct.spotify_asset.spotify_uri
+    )
+
+    lock_in = game.stage_set.get(puzzle_type=3)
+    choice_ids = list(lock_in.choice_set.order_by("id").values_list("id", flat=True))
+    assert key.lock_in[lock_in.id] == list(zip(choice_ids[:4], choice_ids[4:]))
+
+    with django_assert_num_queries(0):
+        assert answer_key.get_answer_key_for_choice(correct.id) is key
+
+
+def test_submit_players_answer_reads_no_choices(client, headers, player, scoreboard):
+    route = reverse("api-1.0.0:answer")
+    choice = answer_choice(scoreboard, puzzle_type=1, correct=True)
+
+    with CaptureQueriesContext(connection) as queries:
+        client.post(f"{route}?player_id={player.id}&choice_id={choice.id}&wager=20", **headers)
+
+    assert not any("game_api_choice" in query["sql"] for query in queries.captured_queries)
+
+
+def test_answers_to_games_being_created_are_not_found(client, headers, player, scoreboard):
+    route = reverse("api-1.0.0:answer")
+    choice = answer_choice(scoreboard, puzzle_type=1, correct=True)
+    game_models.Game.objects.filter(pk=scoreboard.game_id).update(processed=False)
+    answer_key.local_keys.clear()
+
+    response = client.post(
+        f"{route}?player_id={player.id}&choice_id={choice.id}&wager=20", **headers
+    )
+
+    assert response.status_code == 404
+    scoreboard.refresh_from_db()
+    assert scoreboard.score == 0
+
+
+def test_player_counters_follow_scoreboards(player, create_game, django_user_model):
+    publisher = models.PlayerProfile.objects.create(player=player)
+    guest = django_user_model.objects.create_user(username="guest")
+    models.PlayerProfile.objects.create(player=guest)
+
+    game = create_game(stages_per_type=1)
+    scoreboard = models.ScoreBoard.objects.create(game=game, player=guest, score=0)
+    stage = game.stage_set.first()
+    scoring.apply_wager(game_id=game.id, player_id=guest.id, stage_id=stage.id, delta=25)
+
+    publisher.refresh_from_db()
+    assert publisher.stars == 1
+    assert publisher.available_stars == 1
+    assert models.PlayerProfile.objects.get(player=guest).points == 25
+
+    publisher.consume_star()
+    assert publisher.available_stars == 0
+
+    scoreboard.delete()
+    publisher.refresh_from_db()
+    assert publisher.stars == 0
+    assert models.PlayerProfile.objects.get(player=guest).points == 0
+
+
+def test_rebuild_player_counters(player, scoreboard):
+    models.ScoreBoard.objects.filter(id=scoreboard.id).update(score=70)
+    models.PlayerProfile.objects.filter(player=player).update(points=0, stars=0)
+
+    call_command("rebuild_player_counters", stdout=io.StringIO())
+
+    player_profile = models.PlayerProfile.objects.get(player=player)
+    assert player_profile.points == 70
+    assert player_profile.stars == 1
+
+
+def test_get_scoreboard_ranked(client, headers, player, create_game, django_user_model):
+    game = create_game(stages_per_type=1)
+    scores = {"first": 50, "second": 20, "third": 20, "last": -10}
+    for username, score in scores.items():
+        user = django_user_model.objects.create_user(username=username)
+        models.ScoreBoard.objects.create(game=game, player=user, score=score)
+
+    route = reverse("api-1.0.0:scoreboard")
+    response = client.get(route, {"game_code": game.game_code}, **headers)
+
+    assert response.status_code == 200
+    ranked = [(entry["rank"], entry["player"]["username"]) for entry in response.json()]
+    assert ranked == [(1, "first"), (2, "second"), (2, "third"), (4, "last")]
+    assert [schemas.ScoreboardOut(**entry).dict() for entry in response.json()] == response.json()
+
+    response = client.get(route, {"game_code": "MISSING"}, **headers)
+    assert response.status_code == 404
+
+
+def test_local_leaderboard():
+    board = leaderboard.LocalLeaderboard()
+    board.replace([(1, 10), (2, 30), (3, 20)])
+
+    assert board.rank(2) == 1
+    assert board.rank(1) == 3
+    assert board.rank(4) is None
+
+    board.set(1, 40)
+    assert board.rank(1) == 1
+    assert board.page(0, 2) == [(1, 40), (2, 30)]
+    assert board.count() == 3
+
+
+def test_leaderboard_follows_answers(
+    client, headers, player, scoreboard, django_capture_on_commit_callbacks
+):
+    leaderboard.rebuild()
+    choice = answer_choice(scoreboard, puzzle_type=1, correct=True)
+    route = reverse("api-1.0.0:answer")
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post(f"{route}?player_id={player.id}&choice_id={choice.id}&wager=15", **headers)
+
+    response = client.get(reverse("api-1.0.0:leaderboard_me"), **headers)
+    assert response.json() == {"player_id": player.id, "rank": 1, "points": 15, "players": 1}
+
+    response = client.get(reverse("api-1.0.0:leaderboard"), **headers)
+    assert response.json() == [
+        {"rank": 1, "player_id": player.id, "username": "run2dos", "points": 15}
+    ]
+
+
+def test_submit_players_answers_batch(
+    client, headers, player, create_game, django_assert_max_num_queries
+):
+    game = create_game(stages_per_type=2)
+    models.PlayerProfile.objects.create(player=player)
+    models.ScoreBoard.objects.create(game=game, player=player, score=0)
+
+    answers = []
+    for stage in game.stage_set.order_by("id"):
+        choices = list(stage.choice_set.order_by("id"))
+        if stage.puzzle_type == 3:
+            lock_in = [{"id": choice.id, "answer": choice.correct} for choice in choices[:4]]
+            answers.append({"wager": 10, "choices": lock_in})
+        else:
+            wrong = next(choice for choice in choices if not choice.correct)
+            answers.append({"wager": 5, "choice_id": wrong.id})
+
+    route = reverse("api-1.0.0:answers")
+    batch = {"game_code": game.game_code, "answers": answers}
+    with django_assert_max_num_queries(10):
+        response = client.post(
+            f"{route}?player_id={player.id}", batch, content_type="application/json", **headers
+        )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["answered_correct"] for result in results] == [False] * 4 + [True] * 2
+    assert response.json()["player_profile"]["points"] == 0
+
+    player_profile = models.PlayerProfile.objects.get(player=player)
+    assert player_profile.biggest_gainer == 10
+    assert player_profile.biggest_loser == -5
+
+    batch = {"game_code": game.game_code, "answers": answers[:1] * 2}
+    response = client.post(
+        f"{route}?player_id={player.id}", batch, content_type="application/json", **headers
+    )
+    assert response.status_code == 400
+
+    # NOTE: Stages answered by an earlier request are refused, in a batch or one by one.
+    batch = {"game_code": game.game_code, "answers": answers[:1]}
+    response = client.post(
+        f"{route}?player_id={player.id}", batch, content_type="application/json", **headers
+    )
+    assert response.status_code == 400
+
+    single = answers[0]
+    response = client.post(
+        reverse("api-1.0.0:answer")
+        + f"?player_id={player.id}&choice_id={single['choice_id']}&wager=5",
+        **headers,
+    )
+    assert response.status_code == 400
+    assert models.PlayerProfile.objects.get(player=player).points == 0
+
+
+@pytest.fixture
+def room(settings, player, scoreboard):
+    settings.CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+    verified_user = auth_api.schemas.User.from_orm(player)
+    token = jwt.create_access_token(verified_user=verified_user).access_token
+    return f"/ws/play/{scoreboard.game.game_code}?token={token}"
+
+
+async def connect_to_room(path):
+    from core.asgi import application
+
+    communicator = WebsocketCommunicator(
+        application, path, headers=[(b"origin", b"http://localhost")]
+    )
+    connected, _ = await communicator.connect()
+    return communicator, connected
+
+
+@pytest.mark.django_db(transaction=True)
+def test_game_room_broadcasts_scores(room, player, scoreboard):
+    choice = answer_choice(scoreboard, puzzle_type=1, correct=True)
+
+    async def play():
+        watcher, connected = await connect_to_room(room)
+        assert connected
+        assert (await watcher.receive_json_from())["type"] == "board"
+        assert (await watcher.receive_json_from())["type"] == "joined"
+
+        answering, _ = await connect_to_room(room)
+        await answering.receive_json_from()
+        await answering.receive_json_from()
+        assert (await watcher.receive_json_from())["type"] == "joined"
+
+        await answering.send_json_to({"type": "answer", "wager": 15, "choice_id": choice.id})
+        result = await answering.receive_json_from()
+        event = await watcher.receive_json_from()
+        assert await answering.receive_json_from() == event
+
+        await answering.send_json_to({"type": "answer", "wager": 15})
+        error = await answering.receive_json_from()
+
+        await answering.disconnect()
+        left = await watcher.receive_json_from()
+        await watcher.disconnect()
+        return result, event, error, left
+
+    result, event, error, left = async_to_sync(play)()
+
+    assert result["type"] == "answer.result"
+    assert result["answered_correct"] is True
+    assert result["score"] == 15
+    assert event == {
+        "type": "score",
+        "player_id": player.id,
+        "username": "run2dos",
+        "delta": 15,
+        "score": 15,
+        "rank": 1,
+    }
+    assert error["type"] == "error"
+    assert left["type"] == "left"
+
+
+def test_game_room_lock_in_rejects_repeated_choices(player, scoreboard):
+    stage = scoreboard.game.stage_set.get(puzzle_type=3)
+    fronts = list(stage.choice_set.order_by("id")[:4])
+    choices = [{"id": choice.id, "answer": choice.correct} for choice in fronts]
+    message = {"wager": 10, "choices": choices[:3] + choices[:1]}
+
+    with pytest.raises(scoring.InvalidAnswer):
+        rooms.submit_answer(game_id=scoreboard.game_id, player_id=player.id, message=message)
+
+    scoreboard.refresh_from_db()
+    assert scoreboard.score == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_game_room_refuses_bad_tokens(scoreboard):
+    async def connect():
+        communicator, connected = await connect_to_room("/ws/play/GAMECODE?token=nope")
+        return connected
+
+    assert async_to_sync(connect)() is False
+
+
+def test_answers_are_journaled(
+    client, headers, player, scoreboard, django_capture_on_commit_callbacks
+):
+    choice = answer_choice(scoreboard, puzzle_type=1, correct=False)
+    route = reverse("api-1.0.0:answer")
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post(f"{route}?player_id={player.id}&choice_id={choice.id}&wager=15", **headers)
+    journal.buffer.flush()
+
+    event = AnswerEvent.objects.get()
+    assert (event.stage_id, event.choice_id, event.puzzle_type) == (choice.stage_id, choice.id, 1)
+    assert (event.wager, event.delta, event.correct) == (15, -15, False)
@@ -1,26 +1,18 @@
 from django.contrib.auth.models import User
-from django.http import Http404
 from django.shortcuts import get_object_or_404
 from ninja import Router
 
-from auth_api import spotify
-
-from . import models, schemas
-
-SPOTIFY_PUBLIC_USER_URL = "https://api.spotify.com/v1/users/{username}"
+from auth_api.jwt import AsyncAuthBearer, requires_existing_user
 
+from . import cache, models, schemas
 
 router = Router()
 
 
-@router.get("", response=schemas.SpotifyPublicProfile, url_name="profile")
-def get_users_public_profile_information(request, username):
-    session = spotify.create_spotify_backend_session()
-    url = SPOTIFY_PUBLIC_USER_URL.format(username=username)
-    response = session.get(url)
-    if not response.ok:
-        raise Http404("Profile Not Found.")
-    return response.json()
+@router.get("", response=schemas.SpotifyPublicProfile, url_name="profile", auth=AsyncAuthBearer())
+@requires_existing_user
+async def get_users_public_profile_information(request, username):
+    return await cache.aget_public_profile(username)
 
 
 @router.get("/me", response=schemas.Profile, url_name="me")
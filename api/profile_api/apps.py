@@ -4,6 +4,3 @@ from django.apps import AppConfig
 class ProfileApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "profile_api"
-
-    def ready(self):
-        from . import signals
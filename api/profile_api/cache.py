@@ -0,0 +1,129 @@
+"""Public spotify profiles cached by username.
+
+Entries are served fresh for PROFILE_CACHE_TTL seconds. After that they are
+served stale for up to PROFILE_CACHE_STALE_TTL seconds while a celery task
+fetches a new copy. Profiles spotify reports as missing are cached for
+PROFILE_CACHE_NOT_FOUND_TTL seconds so repeated lookups don't reach spotify.
+"""
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+
+from auth_api import spotify
+from core import metrics
+from core.cache import async_cache_lock, cache_lock
+
+SPOTIFY_PUBLIC_USER_URL = "https://api.spotify.com/v1/users/{username}"
+
+PROFILE_CACHE_KEY = "profile:public:{username}"
+PROFILE_CACHE_TTL = settings.PROFILE_CACHE_TTL
+PROFILE_CACHE_STALE_TTL = settings.PROFILE_CACHE_STALE_TTL
+PROFILE_CACHE_NOT_FOUND_TTL = settings.PROFILE_CACHE_NOT_FOUND_TTL
+
+
+def record(event: str):
+    metrics.CACHE_EVENTS.labels("public_profile", event).inc()
+
+
+def _fresh_for(entry) -> int:
+    if entry["status"] == 404:
+        return PROFILE_CACHE_NOT_FOUND_TTL
+    return PROFILE_CACHE_TTL
+
+
+def is_fresh(entry) -> bool:
+    return time.time() - entry["fetched_at"] < _fresh_for(entry)
+
+
+def entry_from_response(response):
+    """Cache entry and timeout of a spotify response, (None, None) if it should not be cached."""
+    record("refresh")
+
+    if response.status_code == 404:
+        return {"status": 404, "data": None, "fetched_at": time.time()}, PROFILE_CACHE_NOT_FOUND_TTL
+
+    if 200 <= response.status_code < 300:
+        # NOTE: The raw spotify payload is cached, SpotifyPublicProfile parses it on the way out.
+        entry = {"status": 200, "data": response.json(), "fetched_at": time.time()}
+        return entry, PROFILE_CACHE_TTL + PROFILE_CACHE_STALE_TTL
+
+    # Rate limits and server errors are not cached.
+    record("error")
+    return None, None
+
+
+def refresh_public_profile(username: str):
+    session = spotify.create_spotify_backend_session()
+    response = session.get(SPOTIFY_PUBLIC_USER_URL.format(username=username))
+
+    entry, timeout = entry_from_response(response)
+    if entry is not None:
+        cache.set(PROFILE_CACHE_KEY.format(username=username), entry, timeout=timeout)
+    return entry
+
+
+async def arefresh_public_profile(username: str):
+    token = await spotify.aget_spotify_backend_token()
+    url = SPOTIFY_PUBLIC_USER_URL.format(username=username)
+    response = await spotify.aget_spotify_api(url, access_token=token["access_token"])
+
+    entry, timeout = entry_from_response(response)
+    if entry is not None:
+        await cache.aset(PROFILE_CACHE_KEY.format(username=username), entry, timeout=timeout)
+    return entry
+
+
+def schedule_refresh(username: str):
+    from . import tasks
+
+    key = PROFILE_CACHE_KEY.format(username=username)
+    if cache.add(f"{key}:refreshing", True, timeout=30):
+        tasks.refresh_public_profile.delay(username=username)
+
+
+def profile_data(entry):
+    if entry is None or entry["status"] != 200:
+        if entry is not None:
+            record("not_found")
+        raise Http404("Profile Not Found.")
+
+    return entry["data"]
+
+
+def get_public_profile(username: str):
+    key = PROFILE_CACHE_KEY.format(username=username)
+    entry = cache.get(key)
+
+    if entry is None:
+        record("miss")
+        with cache_lock(f"{key}:lock"):
+            # NOTE: Whoever held the lock may have filled the entry already.
+            entry = cache.get(key) or refresh_public_profile(username)
+    elif is_fresh(entry):
+        record("hit")
+    else:
+        record("stale")
+        schedule_refresh(username)
+
+    return profile_data(entry)
+
+
+async def aget_public_profile(username: str):
+    """get_public_profile for async views, spotify is called without holding a thread."""
+    key = PROFILE_CACHE_KEY.format(username=username)
+    entry = await cache.aget(key)
+
+    if entry is None:
+        record("miss")
+        async with async_cache_lock(f"{key}:lock"):
+            entry = await cache.aget(key) or await arefresh_public_profile(username)
+    elif is_fresh(entry):
+        record("hit")
+    else:
+        record("stale")
+        await sync_to_async(schedule_refresh)(username)
+
+    return profile_data(entry)
@@ -0,0 +1,23 @@
+from django.db import transaction
+
+from auth_api.schemas import SpotifyProfile
+from play_api.models import PlayerProfile
+
+from . import schemas
+from .models import Profile
+
+
+def create_profile(*, owner, spotify_profile: SpotifyProfile) -> Profile:
+    """Create the profile and player profile for a user from their spotify /me payload.
+
+    Safe to call on every login, existing profiles are left untouched.
+    """
+    profile_data = schemas.Profile(user_id=owner.id, **spotify_profile.dict())
+
+    with transaction.atomic():
+        profile, _ = Profile.objects.get_or_create(
+            user_id=owner.id, defaults=profile_data.dict(exclude={"user_id"})
+        )
+        PlayerProfile.objects.get_or_create(player_id=owner.id)
+
+    return profile
@@ -1,16 +1,15 @@
+import random
 from typing import Optional
 
-from faker import Faker
 from ninja import Field, Schema
 from pydantic import HttpUrl, validator
 
 from auth_api.schemas import SpotifyProfile
-
-fake = Faker()
+from core import words
 
 
 def create_fake_occupation():
-    return fake.job().title()
+    return random.choice(words.OCCUPATIONS)
 
 
 class SpotifyPublicProfile(SpotifyProfile):
@@ -32,7 +31,7 @@ class Profile(Schema):
     user_id: int
     display_name: Optional[str]
     image: Optional[str]
-    occupation: str = create_fake_occupation()
+    occupation: str = Field(default_factory=create_fake_occupation)
     country: Optional[str]
     bio: Optional[str]
     twitter: Optional[str]
@@ -0,0 +1,13 @@
+from celery import shared_task
+from django.core.cache import cache
+
+from . import cache as profile_cache
+
+
+@shared_task(bind=True)
+def refresh_public_profile(self, *, username: str):
+    try:
+        profile_cache.refresh_public_profile(username)
+    finally:
+        key = profile_cache.PROFILE_CACHE_KEY.format(username=username)
+        cache.delete(f"{key}:refreshing")
@@ -1,10 +1,21 @@
+import asyncio
+import time
+
+import httpx
 import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache as django_cache
+from django.http import Http404
 from django.urls import reverse
 
 import auth_api
-from auth_api import jwt
+from auth_api import jwt, spotify
+from core import http, words
+
+from play_api.models import PlayerProfile
 
-from . import schemas
+from . import cache, profiles, schemas, tasks
+from .models import Profile
 
 
 @pytest.fixture
@@ -62,3 +73,143 @@ def test_public_profile_route(db, client, route, django_user_model):
     assert response.json().get("followers") == 1
     assert response.json().get("type") == "user"
     assert response.json().get("uri") == "spotify:user:run2dos"
+
+
+@pytest.fixture
+def profile_cache(spotify_public_profile_response):
+    key = cache.PROFILE_CACHE_KEY.format(username="run2dos")
+    django_cache.delete_many([key, f"{key}:refreshing"])
+
+    def make_entry(*, status=200, age=0):
+        data = spotify_public_profile_response if status == 200 else None
+        entry = {"status": status, "data": data, "fetched_at": time.time() - age}
+        django_cache.set(key, entry)
+        return entry
+
+    yield make_entry
+    django_cache.delete_many([key, f"{key}:refreshing"])
+
+
+def test_public_profile_cache_hit(profile_cache, monkeypatch):
+    entry = profile_cache()
+    monkeypatch.setattr(cache, "refresh_public_profile", pytest.fail)
+
+    assert cache.get_public_profile("run2dos") == entry["data"]
+
+
+def test_public_profile_cache_serves_stale_and_refreshes(profile_cache, monkeypatch):
+    entry = profile_cache(age=cache.PROFILE_CACHE_TTL + 1)
+    refreshed = []
+    monkeypatch.setattr(tasks.refresh_public_profile, "delay", lambda **kw: refreshed.append(kw))
+
+    assert cache.get_public_profile("run2dos") == entry["data"]
+    assert cache.get_public_profile("run2dos") == entry["data"]
+    assert refreshed == [{"username": "run2dos"}]
+
+
+def test_public_profile_cache_not_found(profile_cache, monkeypatch):
+    profile_cache(status=404)
+    monkeypatch.setattr(cache, "refresh_public_profile", pytest.fail)
+
+    with pytest.raises(Http404):
+        cache.get_public_profile("run2dos")
+
+
+def test_public_profile_route_rejects_bad_tokens(client, route):
+    response = client.get(route, {"username": "run2dos"}, HTTP_AUTHORIZATION="Bearer nope")
+    assert response.status_code == 401
+
+
+def test_public_profile_route_rejects_deleted_users(db, client, route, monkeypatch):
+    monkeypatch.setattr(cache, "aget_public_profile", pytest.fail)
+    verified_user = auth_api.schemas.User(id=1, username="run2dos")
+    token = jwt.create_access_token(verified_user=verified_user)
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {token.access_token}"}
+
+    response = client.get(route, {"username": "run2dos"}, **headers)
+    assert response.status_code == 401
+
+
+def test_async_clients_are_closed_under_wsgi(monkeypatch):
+    clients = []
+
+    def create_async_client():
+        clients.append(
+            httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+        )
+        return clients[-1]
+
+    monkeypatch.setattr(http, "share_async_clients", False)
+    monkeypatch.setattr(http, "create_async_client", create_async_client)
+
+    async def use_client():
+        async with http.async_client() as client:
+            return await client.get("https://api.spotify.com/v1/me")
+
+    assert async_to_sync(use_client)().status_code == 200
+    assert [client.is_closed for client in clients] == [True]
+
+
+def test_public_profile_misses_run_concurrently(
+    spotify_public_profile_response, monkeypatch, settings
+):
+    async def spotify_users(request):
+        await asyncio.sleep(0.1)
+        username = request.url.path.split("/").pop()
+        return httpx.Response(200, json={**spotify_public_profile_response, "id": username})
+
+    monkeypatch.setattr(spotify, "_backend_token", {"access_token": "app", "expires_at": 2e9})
+    monkeypatch.setattr(http, "share_async_clients", False)
+    monkeypatch.setattr(
+        http,
+        "create_async_client",
+        lambda: httpx.AsyncClient(transport=httpx.MockTransport(spotify_users)),
+    )
+    usernames = [f"user{index}" for index in range(200)]
+    django_cache.delete_many([cache.PROFILE_CACHE_KEY.format(username=name) for name in usernames])
+
+    async def get_profiles():
+        return await asyncio.gather(*(cache.aget_public_profile(name) for name in usernames))
+
+    started = time.monotonic()
+    profiles = async_to_sync(get_profiles)()
+
+    # NOTE: One after the other these calls would take 20 seconds.
+    assert time.monotonic() - started < 5
+    assert [profile["id"] for profile in profiles] == usernames
+    django_cache.delete_many([cache.PROFILE_CACHE_KEY.format(username=name) for name in usernames])
+
+
+@pytest.fixture
+def spotify_profile():
+    response = {
+        "country": "US",
+        "display_name": "Kevin",
+        "email": "run2dos@gmail.com",
+        "id": "run2dos",
+        "product": "premium",
+        "images": [],
+    }
+    return auth_api.schemas.SpotifyProfile(**response)
+
+
+def test_create_profile_from_spotify_profile(db, django_user_model, spotify_profile):
+    user = django_user_model.objects.create_user(username="run2dos", email="run2dos@gmail.com")
+
+    profile = profiles.create_profile(owner=user, spotify_profile=spotify_profile)
+    assert profile.user_id == user.id
+    assert profile.display_name == "Kevin"
+    assert profile.country == "US"
+    assert PlayerProfile.objects.filter(player_id=user.id).exists()
+
+    profile.bio = "unchanged on the next login"
+    profile.save()
+    profiles.create_profile(owner=user, spotify_profile=spotify_profile)
+    assert Profile.objects.get(user_id=user.id).bio == "unchanged on the next login"
+
+
+def test_profile_occupation_is_picked_per_profile():
+    occupations = {schemas.Profile(user_id=user_id).occupation for user_id in range(50)}
+
+    assert occupations <= set(words.OCCUPATIONS)
+    assert len(occupations) > 1